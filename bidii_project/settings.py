@@ -99,6 +99,20 @@ DATABASES = {
 }
 
 
+# Cache
+# The dashboard stats, chart cache and table versions behind the ETags must be
+# shared by every process. The local-memory default is per process and only
+# fit for development; in production set CACHE_BACKEND, e.g. to
+# django.core.cache.backends.redis.RedisCache with CACHE_LOCATION=redis://127.0.0.1:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -155,7 +169,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'construction.pagination.DefaultPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
@@ -163,6 +177,34 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Dashboard chart rendering: 'serial' renders in the request thread,
+# 'parallel' runs the plotting in a bounded process pool
+CHART_RENDER_MODE = config('CHART_RENDER_MODE', default='serial')
+CHART_RENDER_WORKERS = config('CHART_RENDER_WORKERS', default=min(4, os.cpu_count() or 1), cast=int)
+CHART_RENDER_TIMEOUT = config('CHART_RENDER_TIMEOUT', default=30, cast=int)
+
+# Seconds a cached chart is kept; writes to its tables replace it sooner
+CHART_CACHE_TIMEOUT = config('CHART_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Background dashboard exports: worker threads per process, and seconds after
+# which a pending or running job is treated as lost and no longer deduplicated
+EXPORT_JOB_WORKERS = config('EXPORT_JOB_WORKERS', default=2, cast=int)
+EXPORT_JOB_STALE_AFTER = config('EXPORT_JOB_STALE_AFTER', default=600, cast=int)
+
+# Draw PDF export charts as reportlab vector graphics instead of embedding PNGs
+EXPORT_PDF_VECTOR_CHARTS = config('EXPORT_PDF_VECTOR_CHARTS', default=True, cast=bool)
+
+# Latest estimates, jobs and invoices embedded in a customer's detail view;
+# the full lists are paged, this many per page, by the customer actions
+CUSTOMER_DETAIL_NESTED_LIMIT = config('CUSTOMER_DETAIL_NESTED_LIMIT', default=5, cast=int)
+
+# Seconds a ?count=approximate total is reused on databases without planner
+# row estimates (PostgreSQL estimates it from statistics instead)
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds the dashboard stats stay cached; writes to their tables invalidate them sooner
+DASHBOARD_STATS_CACHE_TIMEOUT = config('DASHBOARD_STATS_CACHE_TIMEOUT', default=30, cast=int)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=5),
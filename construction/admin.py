@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, Worker, Estimate, Job, Supplier, Material, Invoice, Payment
+from .models import Customer, Worker, Estimate, Job, Supplier, Material, Invoice, Payment, ExportJob
 
 
 @admin.register(Customer)
@@ -70,3 +70,12 @@ class PaymentAdmin(admin.ModelAdmin):
     search_fields = ['invoice__invoice_number', 'transaction_reference']
     ordering = ['-payment_date']
     raw_id_fields = ['invoice', 'received_by']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'export_format', 'status', 'requested_by', 'created_at', 'completed_at']
+    list_filter = ['export_format', 'status', 'created_at']
+    ordering = ['-created_at']
+    raw_id_fields = ['requested_by']
+    readonly_fields = ['request_key', 'file', 'error', 'completed_at']
@@ -0,0 +1,149 @@
+from django.contrib.auth.models import User
+from django.db.models import Sum, Count, Q, F, Value, OuterRef, Subquery, ExpressionWrapper, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from decimal import Decimal
+import math
+
+from .models import Customer, DashboardCounter, Estimate, Job, Material, Invoice, Worker
+
+MONEY_FIELD = DecimalField(max_digits=18, decimal_places=4)
+
+# Billable hours credited to a worker for each completed job
+HOURS_PER_COMPLETED_JOB = 8
+
+# The tables the dashboard counters behind get_dashboard_stats are kept from
+DASHBOARD_SOURCES = [Estimate, Invoice, Job, Material, Worker]
+
+# The tables worker_productivity reads
+PRODUCTIVITY_SOURCES = [Worker, User, Job, Job.workers.through]
+
+
+def money(expression):
+    """Wrap an arithmetic expression so the database returns a decimal"""
+    return ExpressionWrapper(expression, output_field=MONEY_FIELD)
+
+
+def material_cost_expression():
+    """Database-side equivalent of Material.total_cost"""
+    return money(F('quantity') * F('unit_cost'))
+
+
+def _percentage(part, whole):
+    return round((part / whole) * 100, 2) if whole else 0
+
+
+def _overdue_invoices(today):
+    # Relative to today, so counted through invoice_status_due_idx rather than kept as a counter
+    return Invoice.objects.filter(status__in=['SENT', 'OVERDUE'], due_date__lt=today).count()
+
+
+def _recent_activity(limit=6):
+    activity = []
+    jobs = Job.objects.order_by('-updated_at').values('job_title', 'status', 'updated_at')[:5]
+    for job in jobs:
+        activity.append({
+            'type': 'Job',
+            'title': job['job_title'],
+            'status': job['status'],
+            'timestamp': job['updated_at'].isoformat()
+        })
+    invoices = Invoice.objects.order_by('-updated_at').values('invoice_number', 'status', 'updated_at')[:5]
+    for invoice in invoices:
+        activity.append({
+            'type': 'Invoice',
+            'title': invoice['invoice_number'],
+            'status': invoice['status'],
+            'timestamp': invoice['updated_at'].isoformat()
+        })
+    return sorted(activity, key=lambda item: item['timestamp'], reverse=True)[:limit]
+
+
+def worker_productivity(queryset=None, hours_per_job=HOURS_PER_COMPLETED_JOB):
+    """
+    Annotate workers with completed_jobs, scheduled_jobs and earnings
+    Everything is computed in one grouped query over the worker/job join.
+    """
+    queryset = Worker.objects.all() if queryset is None else queryset
+    return queryset.select_related('user').annotate(
+        completed_jobs=Count('jobs', filter=Q(jobs__status='COMPLETED')),
+        scheduled_jobs=Count('jobs', filter=Q(jobs__status__in=['SCHEDULED', 'CONFIRMED']))
+    ).annotate(
+        earnings=money(F('hourly_rate') * F('completed_jobs') * Value(hours_per_job))
+    )
+
+
+CUSTOMER_REPORT_COLUMNS = ['id', 'name', 'email', 'total_jobs', 'completed_jobs', 'total_spent']
+
+
+def customer_report():
+    """
+    Customers with job counts and paid invoice totals as one annotated query
+    Spend comes from a correlated subquery so the invoice join cannot
+    multiply the job counts.
+    """
+    paid = (
+        Invoice.objects.filter(customer=OuterRef('pk'), status='PAID')
+        .values('customer')
+        .annotate(total=Sum('amount_paid'))
+        .values('total')
+    )
+    return (
+        Customer.objects.annotate(
+            total_jobs=Count('jobs'),
+            completed_jobs=Count('jobs', filter=Q(jobs__status='COMPLETED')),
+            total_spent=Coalesce(Subquery(paid, output_field=MONEY_FIELD), Value(Decimal('0')), output_field=MONEY_FIELD)
+        )
+        .order_by('id')
+        .values('id', 'first_name', 'last_name', 'email', 'total_jobs', 'completed_jobs', 'total_spent')
+    )
+
+
+def customer_report_row(row):
+    return {
+        'id': row['id'],
+        'name': f"{row['first_name']} {row['last_name']}",
+        'email': row['email'],
+        'total_jobs': row['total_jobs'],
+        'completed_jobs': row['completed_jobs'],
+        'total_spent': float(row['total_spent'])
+    }
+
+
+def get_dashboard_stats():
+    """
+    Read the dashboard KPIs from the DashboardCounter read model
+    The counters are kept current by every write, so the cost does not grow
+    with the tables: one read of the counters, plus the overdue count and the
+    recent activity, which go through their indexes.
+    """
+    today = timezone.now().date()
+    counters = DashboardCounter.totals()
+    
+    def count(*names):
+        return int(sum(counters.get(name, 0) for name in names))
+    
+    jobs_total = count(*[f'jobs:{status}' for status, _ in Job.STATUS_CHOICES])
+    completed = count('jobs:COMPLETED')
+    workers_total, workers_available = count('workers:total'), count('workers:available')
+    return {
+        'active_jobs': count('jobs:IN_PROGRESS'),
+        'scheduled_jobs': count('jobs:SCHEDULED', 'jobs:CONFIRMED'),
+        'completed_jobs': completed,
+        'pending_estimates': count('estimates:PENDING'),
+        'accepted_estimates': count('estimates:ACCEPTED'),
+        'paid_invoices': count('invoices:PAID'),
+        'overdue_invoices': _overdue_invoices(today),
+        'total_revenue': float(counters.get('invoices:revenue', 0)),
+        'pending_revenue': float(counters.get('invoices:outstanding', 0)),
+        'worker_availability': _percentage(workers_available, workers_total),
+        'worker_counts': {
+            'total': workers_total,
+            'available': workers_available
+        },
+        'material_spend': float(counters.get('materials:spend', 0)),
+        'average_job_duration': math.floor(counters.get('jobs:duration_days', 0) / jobs_total) if jobs_total else 0,
+        'customer_satisfaction': _percentage(completed, jobs_total),
+        'recent_activity': _recent_activity(),
+        'last_updated': timezone.now().isoformat()
+    }
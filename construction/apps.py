@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 
 
 class ConstructionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'construction'
+    
+    def ready(self):
+        # Registers the shared cache check run by check --deploy
+        from . import checks
+        from .search import install_search_indexes
+        post_migrate.connect(install_search_indexes, sender=self)
+        from .models import DashboardCountedModel, remove_dashboard_counters
+        for model in self.get_models():
+            if issubclass(model, DashboardCountedModel):
+                post_delete.connect(remove_dashboard_counters, sender=model)
+        from django.contrib.auth.models import User
+        from .table_versions import bump_table_version
+        for model in [*self.get_models(), User]:
+            post_save.connect(bump_table_version, sender=model)
+            post_delete.connect(bump_table_version, sender=model)
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(bump_table_version, sender=field.remote_field.through)
@@ -0,0 +1,81 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .table_versions import table_versions
+
+CACHE_PREFIX = 'dashboard-chart'
+# Bump when the shape of cached charts changes so old entries are ignored
+CACHE_VERSION = 2
+HIT_KEY = f'{CACHE_PREFIX}:hits'
+MISS_KEY = f'{CACHE_PREFIX}:misses'
+
+
+class ChartCache:
+    """
+    Cache for rendered dashboard charts keyed on a cheap data fingerprint
+    A chart is only re-rendered when the version of one of its source tables
+    changes (or the day rolls over, since several charts are relative to
+    today). Entries expire after CHART_CACHE_TIMEOUT seconds, or timeout if
+    given, which bounds staleness from writes made outside the ORM.
+    """
+
+    def __init__(self, alias='default', timeout=None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _entry_key(self, key):
+        return f'{CACHE_PREFIX}:v{CACHE_VERSION}:{key}'
+
+    def fingerprint(self, models, memo=None):
+        """Build a fingerprint for the given source models, reusing table versions from memo"""
+        memo = {} if memo is None else memo
+        missing = [model for model in models if model not in memo]
+        if missing:
+            memo.update(table_versions(missing))
+        parts = [timezone.now().date().isoformat()]
+        parts.extend(f'{model._meta.db_table}:{memo[model]}' for model in models)
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _count(self, counter_key):
+        try:
+            self.cache.incr(counter_key)
+        except ValueError:
+            self.cache.add(counter_key, 0, timeout=None)
+            self.cache.incr(counter_key)
+
+    def lookup(self, key, fingerprint):
+        """Return (hit, chart) for key, counting the hit or miss"""
+        entry = self.cache.get(self._entry_key(key))
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            self._count(HIT_KEY)
+            return True, entry['chart']
+        self._count(MISS_KEY)
+        return False, None
+
+    def store(self, key, fingerprint, chart):
+        timeout = settings.CHART_CACHE_TIMEOUT if self.timeout is None else self.timeout
+        self.cache.set(self._entry_key(key), {'fingerprint': fingerprint, 'chart': chart}, timeout)
+
+    def invalidate(self, keys):
+        """Drop the cached charts for the given chart keys"""
+        self.cache.delete_many([self._entry_key(key) for key in keys])
+
+    def stats(self):
+        counters = self.cache.get_many([HIT_KEY, MISS_KEY])
+        return {
+            'hits': counters.get(HIT_KEY, 0),
+            'misses': counters.get(MISS_KEY, 0)
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many([HIT_KEY, MISS_KEY])
+
+
+chart_cache = ChartCache()
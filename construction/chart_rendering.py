@@ -0,0 +1,134 @@
+"""
+Matplotlib plotting for the dashboard charts
+Functions in this module only take plain data (lists, strings, numbers) and
+never touch Django, so they can run in worker processes started with either
+the fork or spawn start method.
+"""
+import io
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import matplotlib.pyplot as plt
+import numpy as np
+
+PRIMARY_COLOR = '#1b5e20'
+SECONDARY_COLOR = '#2e7d32'
+ACCENT_COLOR = '#a5d6a7'
+CHART_COLORS = ['#e53935', '#43a047', '#8e24aa', '#1e88e5', '#fb8c00']
+
+
+def _palette(count, values=None, cmap_name=None):
+    if count <= 0:
+        return []
+    if not CHART_COLORS:
+        return []
+    colors = []
+    for idx in range(count):
+        colors.append(CHART_COLORS[idx % len(CHART_COLORS)])
+    return colors
+
+
+def _encode_figure(fig):
+    """Return the figure as PNG bytes; callers base64-encode only for JSON"""
+    buffer = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def plot_job_status(title, data):
+    fig, ax = plt.subplots(figsize=(6, 6))
+    colors = _palette(len(data['labels']), data['values'], 'Greens')
+    ax.pie(data['values'], labels=data['labels'], autopct='%1.1f%%', startangle=90, colors=colors)
+    ax.set_title(title, color=PRIMARY_COLOR)
+    return _encode_figure(fig)
+
+
+def plot_invoice_status(title, data):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    colors = _palette(len(data['labels']), data['values'], 'YlOrBr')
+    ax.bar(data['labels'], data['values'], color=colors)
+    ax.set_title(title, color=PRIMARY_COLOR)
+    ax.set_ylabel('Invoices')
+    plt.xticks(rotation=30, ha='right')
+    return _encode_figure(fig)
+
+
+def plot_revenue_trend(title, data):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(data['labels'], data['values'], color=CHART_COLORS[3], linewidth=3, marker='o')
+    ax.set_title(title, color=PRIMARY_COLOR)
+    ax.set_ylabel('Revenue ($)')
+    ax.set_xlabel('Month')
+    ax.grid(alpha=0.3)
+    plt.xticks(rotation=35, ha='right')
+    return _encode_figure(fig)
+
+
+def plot_top_materials(title, data):
+    # Horizontal bars read bottom-up, so reverse to show the most expensive first
+    names = data['labels'][::-1]
+    costs = data['values'][::-1]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = _palette(len(names), costs, 'YlGn')
+    ax.barh(names, costs, color=colors)
+    ax.set_title(title, color=PRIMARY_COLOR)
+    ax.set_xlabel('Cost ($)')
+    return _encode_figure(fig)
+
+
+def plot_worker_costs(title, data):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    colors = _palette(len(data['labels']), data['values'], 'BuPu')
+    ax.bar(data['labels'], data['values'], color=colors)
+    ax.set_title(title, color=PRIMARY_COLOR)
+    ax.set_ylabel('Hourly Rate Total ($)')
+    plt.xticks(rotation=35, ha='right')
+    return _encode_figure(fig)
+
+
+def plot_worker_distribution(title, data):
+    fig, ax = plt.subplots(figsize=(6, 6))
+    colors = _palette(len(data['labels']), data['values'], 'PuBuGn')
+    ax.pie(data['values'], labels=data['labels'], autopct='%1.1f%%', colors=colors)
+    ax.set_title(title, color=PRIMARY_COLOR)
+    return _encode_figure(fig)
+
+
+def plot_worker_productivity(title, data):
+    names = data['labels']
+    x = np.arange(len(names))
+    fig, ax1 = plt.subplots(figsize=(12, 6))
+    ax1.bar(x - 0.15, data['completed'], width=0.3, label='Completed', color=CHART_COLORS[0])
+    ax1.bar(x + 0.15, data['scheduled'], width=0.3, label='Scheduled', color=CHART_COLORS[1])
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(names, rotation=35, ha='right')
+    ax1.set_ylabel('Jobs')
+    ax1.legend(loc='upper left')
+    ax2 = ax1.twinx()
+    ax2.plot(x, data['earnings'], color=CHART_COLORS[2], linewidth=3, marker='o', label='Earnings')
+    ax2.set_ylabel('Earnings ($)')
+    ax2.legend(loc='upper right')
+    ax1.set_title(title, color=PRIMARY_COLOR)
+    return _encode_figure(fig)
+
+
+def plot_monthly_completion(title, data):
+    fig, ax = plt.subplots(figsize=(11, 5))
+    ax.plot(data['labels'], data['values'], color=CHART_COLORS[4], linewidth=3, marker='o')
+    ax.set_title(title, color=PRIMARY_COLOR)
+    ax.set_ylabel('Completed Jobs')
+    ax.set_xlabel('Month')
+    ax.grid(alpha=0.3)
+    plt.xticks(rotation=35, ha='right')
+    return _encode_figure(fig)
+
+
+def plot_customer_completion(title, data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = _palette(len(data['labels']), data['values'], 'YlGnBu')
+    ax.bar(data['labels'], data['values'], color=colors)
+    ax.set_title(title, color=PRIMARY_COLOR)
+    ax.set_ylabel('Completion %')
+    plt.xticks(rotation=35, ha='right')
+    return _encode_figure(fig)
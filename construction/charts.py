@@ -0,0 +1,342 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import namedtuple
+from datetime import timedelta
+import base64
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Sum, Count, Q, F, ExpressionWrapper, DecimalField
+from django.utils import timezone
+
+from . import chart_rendering
+from .analytics import worker_productivity
+from .chart_cache import chart_cache
+from .models import Customer, Worker, Job, Material, Invoice
+from .table_versions import table_versions
+from .timeseries import time_series, previous_buckets
+
+logger = logging.getLogger(__name__)
+
+# kind and series describe the chart for clients that draw it themselves:
+# series is a list of (data field, label, colour or None for the palette)
+ChartDefinition = namedtuple('ChartDefinition', ['key', 'title', 'kind', 'data', 'plot', 'sources', 'series'])
+
+RENDER_SERIAL = 'serial'
+RENDER_PARALLEL = 'parallel'
+
+
+def job_status_data():
+    data = list(Job.objects.values('status').annotate(total=Count('id')).order_by('status'))
+    if not data:
+        return None
+    return {
+        'labels': [dict(Job.STATUS_CHOICES).get(item['status'], item['status']) for item in data],
+        'values': [item['total'] for item in data]
+    }
+
+
+def invoice_status_data():
+    data = list(Invoice.objects.values('status').annotate(total=Count('id')).order_by('status'))
+    if not data:
+        return None
+    return {
+        'labels': [dict(Invoice.STATUS_CHOICES).get(item['status'], item['status']) for item in data],
+        'values': [item['total'] for item in data]
+    }
+
+
+def revenue_trend_data():
+    today = timezone.now().date()
+    series = time_series('invoice', 'invoice_date', 'total', 'month', start=today - timedelta(days=180), end=today)
+    if not any(point['value'] for point in series):
+        return None
+    return {
+        'labels': [point['period'].strftime('%b %Y') for point in series],
+        'values': [point['value'] for point in series]
+    }
+
+
+def top_materials_data():
+    materials = list(
+        Material.objects.annotate(
+            total_cost_value=ExpressionWrapper(F('quantity') * F('unit_cost'), output_field=DecimalField(max_digits=14, decimal_places=2))
+        ).order_by('-total_cost_value').values('name', 'total_cost_value')[:10]
+    )
+    if not materials:
+        return None
+    return {
+        'labels': [material['name'] for material in materials],
+        'values': [float(material['total_cost_value']) for material in materials]
+    }
+
+
+def worker_costs_data():
+    data = list(Worker.objects.values('worker_type').annotate(total=Sum('hourly_rate')).order_by('worker_type'))
+    if not data:
+        return None
+    return {
+        'labels': [dict(Worker.WORKER_TYPES).get(item['worker_type'], item['worker_type']) for item in data],
+        'values': [float(item['total']) for item in data]
+    }
+
+
+def worker_distribution_data():
+    data = list(Worker.objects.values('worker_type').annotate(total=Count('id')).order_by('worker_type'))
+    if not data:
+        return None
+    return {
+        'labels': [dict(Worker.WORKER_TYPES).get(item['worker_type'], item['worker_type']) for item in data],
+        'values': [item['total'] for item in data]
+    }
+
+
+def worker_productivity_data():
+    workers = list(
+        worker_productivity()
+        .filter(Q(completed_jobs__gt=0) | Q(scheduled_jobs__gt=0))
+        .order_by('-completed_jobs', 'worker_type', 'user__first_name')[:8]
+    )
+    if not workers:
+        return None
+    return {
+        'labels': [worker.user.get_full_name() or worker.user.username for worker in workers],
+        'completed': [worker.completed_jobs for worker in workers],
+        'scheduled': [worker.scheduled_jobs for worker in workers],
+        'earnings': [float(worker.earnings) for worker in workers]
+    }
+
+
+def monthly_completion_data():
+    today = timezone.now().date()
+    series = time_series(
+        'job', 'actual_end_date', 'count', 'month',
+        start=previous_buckets(today, 'month', 12), end=today,
+        filters={'status': 'COMPLETED'}
+    )
+    totals = [point['value'] for point in series]
+    if not any(totals):
+        return None
+    return {
+        'labels': [point['period'].strftime('%b %Y') for point in series],
+        'values': totals
+    }
+
+
+def customer_completion_data():
+    customers = list(
+        Customer.objects.annotate(
+            total_jobs=Count('jobs'),
+            completed_jobs=Count('jobs', filter=Q(jobs__status='COMPLETED'))
+        ).filter(total_jobs__gt=0).order_by('-completed_jobs')[:8]
+    )
+    if not customers:
+        return None
+    return {
+        'labels': [customer.full_name for customer in customers],
+        'values': [round((customer.completed_jobs / customer.total_jobs) * 100, 2) for customer in customers]
+    }
+
+
+CHARTS = [
+    ChartDefinition('job_status', 'Job Status Distribution', 'pie', job_status_data,
+                    chart_rendering.plot_job_status, [Job], [('values', 'Jobs', None)]),
+    ChartDefinition('invoice_status', 'Invoice Status Distribution', 'bar', invoice_status_data,
+                    chart_rendering.plot_invoice_status, [Invoice], [('values', 'Invoices', None)]),
+    ChartDefinition('revenue_trend', 'Revenue Trend (6 Months)', 'line', revenue_trend_data,
+                    chart_rendering.plot_revenue_trend, [Invoice],
+                    [('values', 'Revenue ($)', chart_rendering.CHART_COLORS[3])]),
+    ChartDefinition('materials_cost', 'Top Materials by Cost', 'barh', top_materials_data,
+                    chart_rendering.plot_top_materials, [Material], [('values', 'Cost ($)', None)]),
+    ChartDefinition('worker_costs', 'Cost Breakdown by Worker Type', 'bar', worker_costs_data,
+                    chart_rendering.plot_worker_costs, [Worker], [('values', 'Hourly Rate Total ($)', None)]),
+    ChartDefinition('worker_distribution', 'Worker Type Distribution', 'pie', worker_distribution_data,
+                    chart_rendering.plot_worker_distribution, [Worker], [('values', 'Workers', None)]),
+    ChartDefinition('worker_productivity', 'Worker Productivity Metrics', 'combo', worker_productivity_data,
+                    chart_rendering.plot_worker_productivity, [Worker, Job, Job.workers.through],
+                    [('completed', 'Completed', chart_rendering.CHART_COLORS[0]),
+                     ('scheduled', 'Scheduled', chart_rendering.CHART_COLORS[1]),
+                     ('earnings', 'Earnings ($)', chart_rendering.CHART_COLORS[2])]),
+    ChartDefinition('monthly_completion', 'Monthly Job Completion Rate', 'line', monthly_completion_data,
+                    chart_rendering.plot_monthly_completion, [Job],
+                    [('values', 'Completed Jobs', chart_rendering.CHART_COLORS[4])]),
+    ChartDefinition('customer_completion', 'Customer Completion Rates', 'bar', customer_completion_data,
+                    chart_rendering.plot_customer_completion, [Customer, Job], [('values', 'Completion %', None)]),
+]
+
+
+def chart_versions():
+    """The table versions of every chart's sources, read with one cache lookup"""
+    return table_versions({model for definition in CHARTS for model in definition.sources})
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.CHART_RENDER_WORKERS)
+        return _executor
+
+
+def _discard_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_chart_executor():
+    """Stop the chart rendering worker processes"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _chart(definition, png):
+    return {'key': definition.key, 'title': definition.title, 'png': png}
+
+
+def _render_serial(definitions):
+    for definition in definitions:
+        try:
+            data = definition.data()
+            chart = _chart(definition, definition.plot(definition.title, data)) if data else None
+        except Exception:
+            logger.exception('Failed to render chart %s', definition.key)
+            continue
+        yield definition, chart
+
+
+def _render_parallel(definitions):
+    """
+    Run the chart queries here and the plotting in the worker pool
+    Each chart gets settings.CHART_RENDER_TIMEOUT seconds from submission;
+    charts that fail or time out are skipped like in serial mode.
+    """
+    submitted = []
+    executor = _get_executor()
+    for definition in definitions:
+        try:
+            data = definition.data()
+        except Exception:
+            logger.exception('Failed to query data for chart %s', definition.key)
+            continue
+        if not data:
+            yield definition, None
+            continue
+        try:
+            future = executor.submit(definition.plot, definition.title, data)
+        except (BrokenProcessPool, RuntimeError):
+            _discard_executor(executor)
+            logger.exception('Chart worker pool unavailable for chart %s', definition.key)
+            continue
+        submitted.append((definition, future, time.monotonic()))
+    timeout = settings.CHART_RENDER_TIMEOUT
+    for definition, future, started in submitted:
+        remaining = max(0, timeout - (time.monotonic() - started))
+        try:
+            png = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning('Chart %s timed out after %s seconds', definition.key, timeout)
+            continue
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            logger.exception('Chart worker pool broke while rendering %s', definition.key)
+            continue
+        except Exception:
+            logger.exception('Failed to render chart %s', definition.key)
+            continue
+        yield definition, _chart(definition, png)
+
+
+def invalidate_chart_cache(keys=None):
+    """Drop cached charts so the next request re-renders them"""
+    keys = keys or [definition.key for definition in CHARTS]
+    chart_cache.invalidate(keys + [f'data:{key}' for key in keys])
+
+
+def chart_payload(definition, data):
+    """Describe a chart as labels and series for client-side rendering"""
+    return {
+        'title': definition.title,
+        'type': definition.kind,
+        'labels': data['labels'],
+        'series': [
+            {'name': label, 'values': data[field], 'color': color}
+            for field, label, color in definition.series
+        ]
+    }
+
+
+def generate_dashboard_chart_data(use_cache=True):
+    """Return the chart data without rendering any images"""
+    charts = {}
+    memo = chart_versions() if use_cache else {}
+    for definition in CHARTS:
+        data_key = f'data:{definition.key}'
+        hit = False
+        if use_cache:
+            fingerprint = chart_cache.fingerprint(definition.sources, memo)
+            hit, payload = chart_cache.lookup(data_key, fingerprint)
+        if not hit:
+            try:
+                data = definition.data()
+            except Exception:
+                logger.exception('Failed to query data for chart %s', definition.key)
+                continue
+            payload = chart_payload(definition, data) if data else None
+            if use_cache:
+                chart_cache.store(data_key, fingerprint, payload)
+        if payload:
+            charts[definition.key] = payload
+    return charts
+
+
+def render_dashboard_charts(use_cache=True, mode=None):
+    """Return {key: {'title', 'png'}} with the raw PNG bytes of every chart that has data"""
+    mode = mode or settings.CHART_RENDER_MODE
+    rendered = {}
+    fingerprints = {}
+    pending = []
+    memo = chart_versions() if use_cache else {}
+    for definition in CHARTS:
+        if use_cache:
+            fingerprint = chart_cache.fingerprint(definition.sources, memo)
+            hit, chart = chart_cache.lookup(definition.key, fingerprint)
+            if hit:
+                rendered[definition.key] = chart
+                continue
+            fingerprints[definition.key] = fingerprint
+        pending.append(definition)
+    render = _render_parallel if mode == RENDER_PARALLEL else _render_serial
+    for definition, chart in render(pending):
+        rendered[definition.key] = chart
+        if use_cache:
+            chart_cache.store(definition.key, fingerprints[definition.key], chart)
+    charts = {}
+    for definition in CHARTS:
+        chart = rendered.get(definition.key)
+        if chart:
+            charts[chart['key']] = {
+                'title': chart['title'],
+                'png': chart['png']
+            }
+    return charts
+
+
+def generate_dashboard_charts(use_cache=True, mode=None):
+    """Return the rendered charts with base64-encoded images for JSON responses"""
+    return {
+        key: {'title': chart['title'], 'image': base64.b64encode(chart['png']).decode('ascii')}
+        for key, chart in render_dashboard_charts(use_cache, mode).items()
+    }
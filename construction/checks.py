@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = [
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when the default cache is not shared between processes
+    The stats cache and its recompute lock, the chart cache and the table
+    versions behind the ETags all live there, so with several workers each
+    one would invalidate only its own copy.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache such as Redis before running several workers.',
+        id='construction.W001',
+    )]
@@ -0,0 +1,89 @@
+"""
+Conditional GET for the API
+Validators are worked out from the versions of the tables a response is
+built from (its rows' table and every table its serializer reads through
+relations) and the request's path and query string, a single cache lookup
+made before anything is queried or serialized. A poll whose If-None-Match
+still matches gets 304 Not Modified without paying for the page or its
+serialization.
+
+Detail responses also carry Last-Modified and honour If-Modified-Since; a
+version is the time of the table's last write, so the latest one is used.
+List responses only carry an ETag.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .query_planner import plan_for_serializer
+from .table_versions import table_versions
+
+NANOSECONDS = 10 ** 9
+
+
+def _path_models(model, path, models):
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.many_to_many:
+            through = field.remote_field.through if field.concrete else field.through
+            models.add(through)
+        model = field.related_model
+        models.add(model)
+
+
+def _plan_models(plan, models):
+    for path in plan.select:
+        _path_models(plan.model, path, models)
+    for lookup, nested in plan.prefetch.items():
+        _path_models(plan.model, lookup, models)
+        _plan_models(nested, models)
+
+
+@lru_cache(maxsize=None)
+def source_models(serializer_class):
+    """The models a serializer class reads through relations, in a stable order"""
+    models = set()
+    if hasattr(getattr(serializer_class, 'Meta', None), 'model'):
+        _plan_models(plan_for_serializer(serializer_class), models)
+    return tuple(sorted(models, key=lambda model: model._meta.label))
+
+
+def response_versions(model, serializer_class, sources=()):
+    """The versions of model's table, of every table serializer_class reads and of sources"""
+    return table_versions({model, *source_models(serializer_class), *sources})
+
+
+def make_etag(request, versions, *parts):
+    """A weak ETag for the representation of versions at request's URL and media type"""
+    values = [request.get_full_path(), getattr(request, 'accepted_media_type', ''), *parts]
+    for model, version in sorted(versions.items(), key=lambda item: item[0]._meta.label):
+        values.append(f'{model._meta.label}:{version}')
+    return 'W/"{}"'.format(hashlib.sha1('|'.join(map(str, values)).encode('utf-8')).hexdigest())
+
+
+def last_modified(versions):
+    """The latest write across versions, as a timestamp"""
+    return max(versions.values()) // NANOSECONDS if versions else None
+
+
+def conditional_get(request, etag, respond, modified=None):
+    """
+    Return 304 Not Modified when the request's validators match, else respond()
+    Successful responses get the ETag and Last-Modified headers, and are
+    marked for revalidation so browsers do not reuse them without asking.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return respond()
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    # If-Match and If-Unmodified-Since are preconditions for writes; a read ignores them
+    if response is None or response.status_code != 304:
+        response = respond()
+        if response.status_code != 200:
+            return response
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .analytics import get_dashboard_stats
+from .exports import EXCEL_CONTENT_TYPE, report_charts, write_excel_report, write_pdf_report
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# export format -> (writer, file extension, content type)
+EXPORT_WRITERS = {
+    'pdf': (write_pdf_report, 'pdf', 'application/pdf'),
+    'excel': (write_excel_report, 'xlsx', EXCEL_CONTENT_TYPE),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.EXPORT_JOB_WORKERS, thread_name_prefix='export-job')
+        return _executor
+
+
+def shutdown_export_executor():
+    """Wait for running export jobs and stop the worker threads"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def request_key(export_format, filters):
+    payload = json.dumps({'format': export_format, 'filters': filters}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _expire_stale_jobs(key):
+    """Fail active jobs that have not moved for EXPORT_JOB_STALE_AFTER seconds, e.g. after a restart"""
+    cutoff = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_STALE_AFTER)
+    ExportJob.objects.filter(
+        request_key=key, status__in=ExportJob.ACTIVE_STATUSES, updated_at__lt=cutoff
+    ).update(status='FAILED', error='Export did not finish in time', updated_at=timezone.now())
+
+
+def enqueue_export(export_format, filters=None, user=None):
+    """
+    Return (job, created) for an export of the given format and filters
+    A pending or running job for the same request is returned instead of
+    queueing a duplicate; the partial unique constraint on request_key
+    settles concurrent requests.
+    """
+    filters = filters or {}
+    key = request_key(export_format, filters)
+    _expire_stale_jobs(key)
+    existing = ExportJob.objects.filter(request_key=key, status__in=ExportJob.ACTIVE_STATUSES).first()
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = ExportJob.objects.create(
+                export_format=export_format,
+                filters=filters,
+                request_key=key,
+                requested_by=user if user is not None and user.is_authenticated else None
+            )
+    except IntegrityError:
+        return ExportJob.objects.get(request_key=key, status__in=ExportJob.ACTIVE_STATUSES), False
+    transaction.on_commit(lambda: _get_executor().submit(run_export_job, job.pk))
+    return job, True
+
+
+def run_export_job(job_id):
+    """Build the report for an export job and store it under MEDIA_ROOT"""
+    close_old_connections()
+    try:
+        claimed = ExportJob.objects.filter(pk=job_id, status='PENDING').update(status='RUNNING', updated_at=timezone.now())
+        if not claimed:
+            return
+        job = ExportJob.objects.get(pk=job_id)
+        writer, extension, _ = EXPORT_WRITERS[job.export_format]
+        options = {}
+        if job.export_format == 'excel':
+            options = {'start': job.filters.get('from'), 'end': job.filters.get('to')}
+        with tempfile.TemporaryFile() as output:
+            writer(get_dashboard_stats(), report_charts(job.export_format), output, **options)
+            output.seek(0)
+            job.file.save(f'dashboard-report-{job.pk}.{extension}', File(output), save=False)
+        job.status = 'COMPLETED'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'status', 'completed_at', 'updated_at'])
+    except Exception as exc:
+        logger.exception('Export job %s failed', job_id)
+        ExportJob.objects.filter(pk=job_id).update(status='FAILED', error=str(exc), updated_at=timezone.now())
+    finally:
+        close_old_connections()
@@ -0,0 +1,272 @@
+import io
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+try:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import ImageReader
+    from reportlab.lib import colors
+    from .pdf_charts import draw_chart
+    HAS_REPORTLAB = True
+except ImportError:
+    HAS_REPORTLAB = False
+    A4 = landscape = canvas = ImageReader = colors = draw_chart = None
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from openpyxl.drawing.image import Image as XLImage
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+    Workbook = WriteOnlyCell = Font = get_column_letter = XLImage = None
+
+from .chart_rendering import PRIMARY_COLOR
+from .charts import generate_dashboard_chart_data, render_dashboard_charts
+from .models import Invoice, Payment, Material
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Rows fetched per database round trip when writing the ledger sheets
+EXPORT_CHUNK_SIZE = 2000
+
+
+def report_charts(export_format):
+    """
+    Charts for an export: raw PNG bytes, or chart data for vector drawing
+    The PDF draws vector charts from the data when EXPORT_PDF_VECTOR_CHARTS
+    is on; Excel always embeds the rendered PNGs.
+    """
+    if export_format == 'pdf' and settings.EXPORT_PDF_VECTOR_CHARTS:
+        return generate_dashboard_chart_data()
+    return render_dashboard_charts()
+
+
+def write_pdf_report(stats, charts, output):
+    """Write the PDF report; charts carrying 'png' are embedded as images, chart data is drawn as vectors"""
+    pdf = canvas.Canvas(output, pagesize=landscape(A4))
+    page_width, page_height = landscape(A4)
+    pdf.setFont('Helvetica-Bold', 22)
+    pdf.setFillColor(colors.HexColor(PRIMARY_COLOR))
+    pdf.drawString(40, page_height - 50, 'Construction Intelligence Dashboard')
+    pdf.setFont('Helvetica', 12)
+    pdf.setFillColor(colors.black)
+    pdf.drawString(40, page_height - 80, f"Generated {timezone.now().strftime('%Y-%m-%d %H:%M')}")
+    summary_rows = [
+        ('Active Jobs', 'active_jobs'),
+        ('Scheduled Jobs', 'scheduled_jobs'),
+        ('Completed Jobs', 'completed_jobs'),
+        ('Pending Estimates', 'pending_estimates'),
+        ('Accepted Estimates', 'accepted_estimates'),
+        ('Paid Invoices', 'paid_invoices'),
+        ('Overdue Invoices', 'overdue_invoices'),
+        ('Total Revenue', 'total_revenue'),
+        ('Pending Revenue', 'pending_revenue'),
+        ('Material Spend', 'material_spend'),
+        ('Average Job Duration (days)', 'average_job_duration'),
+        ('Worker Availability (%)', 'worker_availability'),
+        ('Customer Satisfaction (%)', 'customer_satisfaction')
+    ]
+    pdf.setFont('Helvetica', 11)
+    y = page_height - 120
+    for label, key in summary_rows:
+        value = stats.get(key, 0)
+        if key in ['total_revenue', 'pending_revenue', 'material_spend']:
+            value_text = f"${value:,.2f}"
+        elif key in ['worker_availability', 'customer_satisfaction']:
+            value_text = f"{value:.1f}%"
+        else:
+            value_text = f"{value:,}"
+        pdf.drawString(40, y, f"{label}: {value_text}")
+        y -= 18
+        if y < 80:
+            pdf.showPage()
+            page_width, page_height = landscape(A4)
+            pdf.setFont('Helvetica', 11)
+            y = page_height - 60
+    chart_items = list(charts.values())
+    if chart_items:
+        pdf.showPage()
+        index = 0
+        while index < len(chart_items):
+            page_width, page_height = landscape(A4)
+            x_positions = [40, page_width / 2 + 20]
+            y = page_height - 80
+            for column in range(2):
+                if index >= len(chart_items):
+                    break
+                chart = chart_items[index]
+                pdf.setFont('Helvetica-Bold', 14)
+                pdf.setFillColor(colors.black)
+                pdf.drawString(x_positions[column], y, chart['title'])
+                if 'png' in chart:
+                    pdf.drawImage(
+                        ImageReader(io.BytesIO(chart['png'])),
+                        x_positions[column],
+                        y - 270,
+                        width=page_width / 2 - 80,
+                        height=220,
+                        preserveAspectRatio=True,
+                        mask='auto'
+                    )
+                else:
+                    draw_chart(pdf, chart, x_positions[column], y - 270, page_width / 2 - 80, 250)
+                index += 1
+            if index < len(chart_items):
+                pdf.showPage()
+    pdf.save()
+
+
+def build_pdf_report(stats, charts):
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = 'attachment; filename="dashboard-report.pdf"'
+    write_pdf_report(stats, charts, response)
+    return response
+
+
+
+def _in_range(queryset, field, start=None, end=None):
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lte': end})
+    return queryset
+
+
+def invoice_ledger_rows(start=None, end=None):
+    statuses = dict(Invoice.STATUS_CHOICES)
+    rows = _in_range(Invoice.objects.order_by('id'), 'invoice_date', start, end).values_list(
+        'invoice_number', 'customer__first_name', 'customer__last_name', 'job__job_title',
+        'invoice_date', 'due_date', 'status', 'subtotal', 'tax_amount', 'total_amount',
+        'amount_paid', 'balance_due'
+    )
+    for (number, first_name, last_name, job_title, invoice_date, due_date, invoice_status,
+         subtotal, tax_amount, total_amount, amount_paid, balance_due) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            number, f'{first_name} {last_name}', job_title, invoice_date, due_date,
+            statuses.get(invoice_status, invoice_status), subtotal, tax_amount, total_amount,
+            amount_paid, balance_due
+        ]
+
+
+def payment_ledger_rows(start=None, end=None):
+    methods = dict(Payment.PAYMENT_METHODS)
+    rows = _in_range(Payment.objects.order_by('id'), 'payment_date', start, end).values_list(
+        'invoice__invoice_number', 'payment_date', 'amount', 'payment_method', 'transaction_reference'
+    )
+    for number, payment_date, amount, method, reference in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [number, payment_date, amount, methods.get(method, method), reference]
+
+
+def material_ledger_rows(start=None, end=None):
+    rows = _in_range(Material.objects.order_by('id'), 'order_date', start, end).values_list(
+        'name', 'job__job_title', 'supplier__name', 'quantity', 'unit', 'unit_cost',
+        'order_date', 'actual_delivery_date', 'is_delivered'
+    )
+    for (name, job_title, supplier, quantity, unit, unit_cost,
+         order_date, delivered_on, is_delivered) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            name, job_title, supplier, quantity, unit, unit_cost, quantity * unit_cost,
+            order_date, delivered_on, 'Yes' if is_delivered else 'No'
+        ]
+
+
+# (sheet title, header row, row generator)
+LEDGERS = [
+    ('Invoices', ['Invoice', 'Customer', 'Job', 'Invoice Date', 'Due Date', 'Status', 'Subtotal',
+                  'Tax', 'Total', 'Paid', 'Balance'], invoice_ledger_rows),
+    ('Payments', ['Invoice', 'Payment Date', 'Amount', 'Method', 'Reference'], payment_ledger_rows),
+    ('Materials', ['Material', 'Job', 'Supplier', 'Quantity', 'Unit', 'Unit Cost', 'Total Cost',
+                   'Order Date', 'Delivered On', 'Delivered'], material_ledger_rows),
+]
+
+
+def _header(sheet, labels, width):
+    for column in range(1, len(labels) + 1):
+        sheet.column_dimensions[get_column_letter(column)].width = width
+    cells = []
+    for label in labels:
+        cell = WriteOnlyCell(sheet, value=label)
+        cell.font = Font(bold=True)
+        cells.append(cell)
+    sheet.append(cells)
+
+
+def write_excel_report(stats, charts, output, ledgers=True, start=None, end=None):
+    """
+    Write the dashboard workbook to a binary file object
+    The workbook is opened in write-only mode, so rows go to disk as they are
+    appended and the ledger sheets never hold more than one chunk in memory.
+    start and end limit the ledger rows by their invoice, payment or order date.
+    """
+    workbook = Workbook(write_only=True)
+    summary_sheet = workbook.create_sheet(title='Summary')
+    _header(summary_sheet, ['Metric', 'Value'], 32)
+    summary_data = [
+        ('Active Jobs', stats.get('active_jobs', 0)),
+        ('Scheduled Jobs', stats.get('scheduled_jobs', 0)),
+        ('Completed Jobs', stats.get('completed_jobs', 0)),
+        ('Pending Estimates', stats.get('pending_estimates', 0)),
+        ('Accepted Estimates', stats.get('accepted_estimates', 0)),
+        ('Paid Invoices', stats.get('paid_invoices', 0)),
+        ('Overdue Invoices', stats.get('overdue_invoices', 0)),
+        ('Total Revenue', f"${stats.get('total_revenue', 0):,.2f}"),
+        ('Pending Revenue', f"${stats.get('pending_revenue', 0):,.2f}"),
+        ('Material Spend', f"${stats.get('material_spend', 0):,.2f}"),
+        ('Average Job Duration (days)', stats.get('average_job_duration', 0)),
+        ('Worker Availability (%)', f"{stats.get('worker_availability', 0):.1f}%"),
+        ('Customer Satisfaction (%)', f"{stats.get('customer_satisfaction', 0):.1f}%")
+    ]
+    for label, value in summary_data:
+        summary_sheet.append([label, value])
+    activity_sheet = workbook.create_sheet(title='Recent Activity')
+    _header(activity_sheet, ['Type', 'Title', 'Status', 'Timestamp'], 30)
+    for item in stats.get('recent_activity', []):
+        activity_sheet.append([
+            item.get('type'),
+            item.get('title'),
+            item.get('status'),
+            item.get('timestamp')
+        ])
+    if ledgers:
+        for title, labels, rows in LEDGERS:
+            ledger_sheet = workbook.create_sheet(title=title)
+            _header(ledger_sheet, labels, 18)
+            for row in rows(start, end):
+                ledger_sheet.append(row)
+    for index, chart in enumerate(charts.values(), start=1):
+        chart_sheet = workbook.create_sheet(title=f'Chart {index}')
+        for column in range(1, 5):
+            chart_sheet.column_dimensions[get_column_letter(column)].width = 35
+        heading = WriteOnlyCell(chart_sheet, value=chart['title'])
+        heading.font = Font(bold=True, size=16)
+        chart_sheet.append([heading])
+        image = XLImage(io.BytesIO(chart['png']))
+        image.width = 960
+        image.height = 420
+        image.anchor = 'A3'
+        chart_sheet.add_image(image)
+    workbook.save(output)
+
+
+def build_excel_report(stats, charts):
+    """Stream the dashboard workbook from a temporary file"""
+    output = tempfile.TemporaryFile()
+    try:
+        write_excel_report(stats, charts, output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    # FileResponse streams the file in blocks and closes it when done
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename='dashboard-report.xlsx',
+        content_type=EXCEL_CONTENT_TYPE
+    )
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from construction.views import CustomerViewSet, SupplierViewSet
+
+
+def _customer(index):
+    return {
+        'first_name': 'Benchmark',
+        'last_name': str(index),
+        'email': f'benchmark-{index}@example.com',
+        'phone': '+254700000000',
+        'address': 'Street',
+        'city': 'Nairobi',
+        'postal_code': '00100'
+    }
+
+
+def _supplier(index):
+    return {
+        'name': f'Benchmark supplier {index}',
+        'contact_person': 'Benchmark',
+        'email': f'supplier-{index}@example.com',
+        'phone': '+254700000000',
+        'address': 'Street'
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compares rows per second for one-object POSTs and a single list POST (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Number of rows to create per mode')
+
+    def _post(self, view, payload):
+        request = APIRequestFactory().post('/', payload, format='json')
+        response = view(request)
+        if response.status_code != 201:
+            raise RuntimeError(f'Unexpected status {response.status_code}: {response.data}')
+
+    def _time(self, view, payloads, bulk):
+        with transaction.atomic():
+            started = time.perf_counter()
+            if bulk:
+                self._post(view, payloads)
+            else:
+                for payload in payloads:
+                    self._post(view, payload)
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed
+
+    def handle(self, *args, **options):
+        rows = max(1, options['rows'])
+        cases = [
+            ('customers', CustomerViewSet, _customer),
+            ('suppliers', SupplierViewSet, _supplier),
+        ]
+        for label, viewset, build in cases:
+            view = viewset.as_view({'post': 'create'})
+            payloads = [build(index) for index in range(rows)]
+            single = self._time(view, payloads, bulk=False)
+            bulk = self._time(view, payloads, bulk=True)
+            self.stdout.write(
+                f'{label:>10}: {rows / single:10.0f} rows/s one per request, '
+                f'{rows / bulk:10.0f} rows/s in one list request ({single / bulk:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Done'))
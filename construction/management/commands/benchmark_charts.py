@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from construction.charts import RENDER_PARALLEL, RENDER_SERIAL, generate_dashboard_charts, shutdown_chart_executor
+
+
+class Command(BaseCommand):
+    help = 'Compares serial and process-pool dashboard chart rendering wall time (cache bypassed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per mode')
+
+    def _time(self, mode, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            charts = generate_dashboard_charts(use_cache=False, mode=mode)
+            timings.append(time.perf_counter() - started)
+        return charts, timings
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        # Warm up the worker pool so process start-up is not counted
+        generate_dashboard_charts(use_cache=False, mode=RENDER_PARALLEL)
+        results = {}
+        try:
+            for mode in [RENDER_SERIAL, RENDER_PARALLEL]:
+                charts, timings = self._time(mode, repeat)
+                results[mode] = min(timings)
+                self.stdout.write(
+                    f"{mode:>8}: {len(charts)} charts, best {min(timings):.3f}s, "
+                    f"mean {sum(timings) / len(timings):.3f}s over {repeat} runs"
+                )
+        finally:
+            shutdown_chart_executor()
+        if results[RENDER_PARALLEL]:
+            speedup = results[RENDER_SERIAL] / results[RENDER_PARALLEL]
+            self.stdout.write(self.style.SUCCESS(f'Parallel speedup: {speedup:.2f}x'))
@@ -0,0 +1,82 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from construction.models import Customer, Estimate, Invoice, Job
+
+URLS = [
+    '/api/invoices/',
+    '/api/invoices/?page=2',
+    '/api/customers/{customer}/',
+    '/api/jobs/upcoming/',
+    '/api/dashboard-stats/',
+    '/api/dashboard-charts/?mode=data',
+]
+
+
+def _seed(rows):
+    today = date.today()
+    customers = Customer.objects.bulk_create([
+        Customer(first_name='Benchmark', last_name=str(index), email=f'conditional-{index}@example.com',
+                 phone='+254700000000', address='Street', city='Nairobi', postal_code='00100')
+        for index in range(rows)
+    ])
+    estimates = Estimate.objects.bulk_create([Estimate(customer=customer, work_description='Work') for customer in customers])
+    jobs = Job.objects.bulk_create([
+        Job(estimate=estimate, customer=estimate.customer, job_title=f'Job {index}', description='Job',
+            scheduled_start_date=today + timedelta(days=index % 30), scheduled_end_date=today + timedelta(days=index % 30 + 3))
+        for index, estimate in enumerate(estimates)
+    ])
+    Invoice.objects.bulk_create([
+        Invoice(job=job, customer=job.customer, labor_cost=Decimal('100'), due_date=today + timedelta(days=30))
+        for job in jobs
+    ])
+
+
+class Command(BaseCommand):
+    help = 'Compares a full 200 response with a 304 revalidation for list, detail and dashboard polls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Number of timed requests per case')
+        parser.add_argument('--seed', type=int, default=0, help='Invoices to create for the run (rolled back afterwards)')
+
+    def _time(self, client, url, repeat, **headers):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url, **headers)
+                timings.append(time.perf_counter() - started)
+        return min(timings), len(queries), response
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host.lstrip('.'))
+        with transaction.atomic():
+            if options['seed']:
+                _seed(options['seed'])
+            customer = Customer.objects.order_by('pk').values_list('pk', flat=True).first()
+            self.stdout.write(f'{Invoice.objects.count()} invoices, best of {repeat} requests')
+            for url in URLS:
+                if '{customer}' in url and customer is None:
+                    continue
+                url = url.format(customer=customer)
+                full, full_queries, response = self._time(client, url, repeat)
+                if response.status_code != 200:
+                    raise RuntimeError(f'Unexpected status {response.status_code} for {url}')
+                cached, cached_queries, not_modified = self._time(client, url, repeat, HTTP_IF_NONE_MATCH=response['ETag'])
+                if not_modified.status_code != 304:
+                    raise RuntimeError(f'Expected 304 for {url}, got {not_modified.status_code}')
+                self.stdout.write(
+                    f'{url:>34}: 200 {full * 1000:8.2f} ms, {full_queries:2} queries, {len(response.content) / 1024:8.1f} KiB; '
+                    f'304 {cached * 1000:8.2f} ms, {cached_queries:2} queries ({full / cached:.1f}x)'
+                )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Done'))
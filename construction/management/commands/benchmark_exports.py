@@ -0,0 +1,59 @@
+import base64
+import io
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from construction.analytics import get_dashboard_stats
+from construction.charts import generate_dashboard_chart_data, render_dashboard_charts
+from construction.exports import write_excel_report, write_pdf_report
+
+
+def _base64_round_trip(charts):
+    """Mimic the old pipeline: base64-encode every chart and decode it again in the exporter"""
+    return {
+        key: {'title': chart['title'], 'png': base64.b64decode(base64.b64encode(chart['png']).decode('ascii'))}
+        for key, chart in charts.items()
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measures PDF and Excel export time and peak Python memory with raster, base64 and vector charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per export')
+
+    def _measure(self, build, repeat):
+        timings = []
+        peaks = []
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = time.perf_counter()
+            output = io.BytesIO()
+            build(output)
+            timings.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return min(timings), max(peaks), len(output.getvalue())
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        stats = get_dashboard_stats()
+        # Chart rendering is measured by benchmark_charts; here only the export is timed
+        png_charts = render_dashboard_charts(use_cache=False)
+        chart_data = generate_dashboard_chart_data(use_cache=False)
+        cases = [
+            ('pdf, base64 round trip', lambda output: write_pdf_report(stats, _base64_round_trip(png_charts), output)),
+            ('pdf, png bytes', lambda output: write_pdf_report(stats, png_charts, output)),
+            ('pdf, vector', lambda output: write_pdf_report(stats, chart_data, output)),
+            ('excel, base64 round trip', lambda output: write_excel_report(stats, _base64_round_trip(png_charts), output, ledgers=False)),
+            ('excel, png bytes', lambda output: write_excel_report(stats, png_charts, output, ledgers=False)),
+        ]
+        self.stdout.write(f'{len(png_charts)} charts, best of {repeat} runs')
+        for label, build in cases:
+            best, peak, size = self._measure(build, repeat)
+            self.stdout.write(
+                f'{label:>26}: {best * 1000:8.1f} ms, peak {peak / 1024:8.1f} KiB, file {size / 1024:8.1f} KiB'
+            )
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from construction.chart_cache import chart_cache
+from construction.charts import CHARTS, invalidate_chart_cache
+
+
+class Command(BaseCommand):
+    help = 'Shows dashboard chart cache statistics and optionally invalidates cached charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Invalidate all cached charts')
+        parser.add_argument('--chart', action='append', dest='charts', default=[], help='Invalidate a single chart key (repeatable)')
+        parser.add_argument('--reset-stats', action='store_true', help='Reset the hit/miss counters')
+
+    def handle(self, *args, **options):
+        known_keys = [definition.key for definition in CHARTS]
+        unknown = [key for key in options['charts'] if key not in known_keys]
+        if unknown:
+            self.stderr.write(f"Unknown chart keys: {', '.join(unknown)}. Known keys: {', '.join(known_keys)}")
+            return
+        if options['clear'] or options['charts']:
+            invalidate_chart_cache(options['charts'] or None)
+            self.stdout.write(self.style.SUCCESS('Chart cache invalidated'))
+        if options['reset_stats']:
+            chart_cache.reset_stats()
+        stats = chart_cache.stats()
+        self.stdout.write(f"Chart cache hits: {stats['hits']}, misses: {stats['misses']}")
@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from construction.models import DashboardCountedModel, DashboardCounter
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the dashboard counters from the tables and reports any that had drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to recompute')
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_app_config('construction').get_models() if issubclass(model, DashboardCountedModel)]
+        drift = DashboardCounter.recompute(models, using=options['database'])
+        for name, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{name:>24}: stored {'missing' if stored is None else stored}, actual {actual}")
+        if drift:
+            self.stdout.write(self.style.WARNING(f'Corrected {len(drift)} counters'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All dashboard counters match the tables'))
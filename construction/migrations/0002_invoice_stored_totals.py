@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:59
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Round
+
+
+def backfill_invoice_totals(apps, schema_editor):
+    Invoice = apps.get_model('construction', 'Invoice')
+    subtotal = F('labor_cost') + F('material_cost') + F('additional_costs')
+    tax_amount = Round(subtotal * F('tax_rate') / Value(100), 2)
+    Invoice.objects.update(
+        subtotal=subtotal,
+        tax_amount=tax_amount,
+        total_amount=subtotal + tax_amount,
+        balance_due=subtotal + tax_amount - F('amount_paid')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('construction', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='balance_due',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='tax_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total_amount',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_invoice_totals, migrations.RunPython.noop),
+    ]
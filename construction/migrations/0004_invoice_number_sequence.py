@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:30
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_invoice_sequence(apps, schema_editor):
+    # Continue after the highest existing INV-<n> number, ignoring numbers edited into other shapes
+    Invoice = apps.get_model('construction', 'Invoice')
+    Sequence = apps.get_model('construction', 'Sequence')
+    highest = 0
+    for number in Invoice.objects.values_list('invoice_number', flat=True).iterator():
+        match = re.fullmatch(r'INV-(\d+)', number)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    Sequence.objects.create(name='invoice', next_value=highest + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('construction', '0003_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+            },
+        ),
+        migrations.RunPython(seed_invoice_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:11
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+# search_document_fields as of this migration
+SEARCH_DOCUMENT_FIELDS = {
+    'Customer': ['first_name', 'last_name', 'email', 'phone', 'city'],
+    'Estimate': ['customer__first_name', 'customer__last_name', 'work_description'],
+    'Invoice': ['invoice_number', 'customer__first_name', 'customer__last_name'],
+    'Material': ['name', 'description'],
+    'Supplier': ['name', 'contact_person', 'email'],
+}
+
+
+def search_document_expression(model, paths):
+    # construction.models.search_document_expression as of this migration
+    parts = []
+    for path in paths:
+        name, _, rest = path.partition('__')
+        if rest:
+            field = model._meta.get_field(name)
+            value = Subquery(field.related_model._default_manager.filter(pk=OuterRef(field.attname)).values(rest)[:1])
+        else:
+            value = F(name)
+        parts.extend([Coalesce(value, Value(''), output_field=TextField()), Value(' ')])
+    return Concat(*parts[:-1], output_field=TextField())
+
+
+def remove_search_indexes(connection, models):
+    # construction.search.remove_search_indexes as of this migration
+    with connection.cursor() as cursor:
+        for model in models:
+            table, fts = model._meta.db_table, f'{model._meta.db_table}_fts'
+            if connection.vendor == 'sqlite':
+                for trigger in (f'{fts}_insert', f'{fts}_delete', f'{fts}_update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {table}_search_trgm')
+
+
+def build_search_documents(apps, schema_editor):
+    # The indexes over the documents are created by install_search_indexes after migrating
+    for name, paths in SEARCH_DOCUMENT_FIELDS.items():
+        model = apps.get_model('construction', name)
+        model._default_manager.update(search_document=search_document_expression(model, paths))
+
+
+def drop_search_indexes(apps, schema_editor):
+    # The SQLite triggers read search_document, so they go before the columns
+    models = [apps.get_model('construction', name) for name in SEARCH_DOCUMENT_FIELDS]
+    remove_search_indexes(schema_editor.connection, models)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('construction', '0005_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='estimate',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(build_search_documents, drop_search_indexes),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:27
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# dashboard_counter_fields and dashboard_counters as of this migration
+DASHBOARD_COUNTERS = {
+    'Job': (['status', 'scheduled_start_date', 'scheduled_end_date'], lambda row: {
+        f"jobs:{row['status']}": 1,
+        'jobs:duration_days': (row['scheduled_end_date'] - row['scheduled_start_date']).days,
+    }),
+    'Estimate': (['status'], lambda row: {f"estimates:{row['status']}": 1}),
+    'Invoice': (['status', 'total_amount', 'balance_due'], lambda row: (
+        {'invoices:PAID': 1, 'invoices:revenue': row['total_amount']} if row['status'] == 'PAID'
+        else {f"invoices:{row['status']}": 1, 'invoices:outstanding': row['balance_due']}
+    )),
+    'Worker': (['is_available'], lambda row: {'workers:total': 1, 'workers:available': 1 if row['is_available'] else 0}),
+    'Material': (['quantity', 'unit_cost'], lambda row: {'materials:spend': row['quantity'] * row['unit_cost']}),
+}
+
+# Created up front, so the first write to each counter is a plain UPDATE
+COUNTER_NAMES = [
+    *[f'jobs:{status}' for status in ['SCHEDULED', 'CONFIRMED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED']],
+    'jobs:duration_days',
+    *[f'estimates:{status}' for status in ['PENDING', 'VISITED', 'SENT', 'ACCEPTED', 'REJECTED']],
+    *[f'invoices:{status}' for status in ['DRAFT', 'SENT', 'PAID', 'OVERDUE', 'CANCELLED']],
+    'invoices:revenue', 'invoices:outstanding',
+    'workers:total', 'workers:available',
+    'materials:spend',
+]
+
+
+def seed_dashboard_counters(apps, schema_editor):
+    DashboardCounter = apps.get_model('construction', 'DashboardCounter')
+    totals = dict.fromkeys(COUNTER_NAMES, Decimal('0'))
+    for name, (fields, counters) in DASHBOARD_COUNTERS.items():
+        rows = apps.get_model('construction', name).objects.values(*fields)
+        for row in rows.iterator(chunk_size=1000):
+            for counter, value in counters(row).items():
+                totals[counter] = totals.get(counter, Decimal('0')) + Decimal(value)
+    DashboardCounter.objects.bulk_create([DashboardCounter(name=name, value=value) for name, value in totals.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('construction', '0006_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+            ],
+            options={
+                'verbose_name': 'Dashboard counter',
+                'verbose_name_plural': 'Dashboard counters',
+            },
+        ),
+        migrations.RunPython(seed_dashboard_counters, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,290 @@
-from django.db import models
+import uuid
+
+from django.db import models, router, transaction
+from django.db.models import F, Q, Value, Case, When
+from django.db.models.functions import Coalesce, Concat, Round
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from .table_versions import bump_table_versions
+
+MONEY_PLACES = Decimal('0.01')
+
+# Invoices updated per statement when posting payments
+PAYMENT_UPDATE_BATCH_SIZE = 500
+
+INVOICE_SEQUENCE = 'invoice'
+# Invoice fields that payments move in the database (see InvoiceQuerySet.apply_payments)
+INVOICE_PAYMENT_FIELDS = ['amount_paid', 'status']
+INVOICE_NUMBER_FORMAT = 'INV-{:05d}'
+
+# Rows re-read per query when a bulk update is applied to the dashboard counters
+COUNTER_READ_BATCH_SIZE = 1000
+
+
+def search_document_expression(model, paths):
+    """
+    SQL expression rebuilding a search document from the given field paths
+    Related fields such as customer__first_name are read with a subquery so
+    the expression can be used in a single UPDATE.
+    """
+    parts = []
+    for path in paths:
+        name, _, rest = path.partition('__')
+        if rest:
+            field = model._meta.get_field(name)
+            value = models.Subquery(
+                field.related_model._default_manager.filter(pk=models.OuterRef(field.attname)).values(rest)[:1]
+            )
+        else:
+            value = F(name)
+        parts.extend([Coalesce(value, Value(''), output_field=models.TextField()), Value(' ')])
+    return Concat(*parts[:-1], output_field=models.TextField())
+
+
+class VersionedQuerySet(models.QuerySet):
+    """QuerySet whose bulk writes, which send no signals, bump the table version"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_table_versions([self.model], self.db)
+        return objs
+    
+    def update(self, **kwargs):
+        """Update the rows and bump the table version (bulk_update goes through here too)"""
+        updated = super().update(**kwargs)
+        if updated:
+            bump_table_versions([self.model], self.db)
+        return updated
+
+
+class SearchDocumentQuerySet(VersionedQuerySet):
+    """QuerySet for searchable models that keeps search_document current on bulk writes"""
+    
+    def refresh_search_documents(self):
+        """Rebuild search_document for every row in a single UPDATE"""
+        return self.update(search_document=search_document_expression(self.model, self.model.search_document_fields))
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.search_document = obj.build_search_document()
+        return super().bulk_create(objs, *args, **kwargs)
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if {path.split('__')[0] for path in self.model.search_document_fields} & set(fields):
+            for obj in objs:
+                obj.search_document = obj.build_search_document()
+            fields = [*fields, 'search_document']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+class SearchDocumentModel(models.Model):
+    """
+    Abstract model with a stored search document for the full-text search backend
+    search_document holds the values of search_document_fields, the paths the
+    API's ?search= matches, and is maintained by save() and
+    SearchDocumentQuerySet; construction.search indexes it.
+    """
+    search_document_fields = []
+    
+    search_document = models.TextField(blank=True, default='', editable=False)
+    
+    objects = SearchDocumentQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    def build_search_document(self):
+        values = []
+        for path in self.search_document_fields:
+            value = self
+            for attr in path.split('__'):
+                value = getattr(value, attr) if value is not None else None
+            values.append('' if value is None else str(value))
+        return ' '.join(values)
+    
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'search_document'}
+        super().save(*args, **kwargs)
+
+
+class DashboardCounter(models.Model):
+    """
+    Model holding one running total of the dashboard read model, e.g. jobs:COMPLETED
+    Every write to a DashboardCountedModel adds its change to the counters in
+    the same transaction, so the dashboard reads totals instead of scanning
+    the tables. There is one row per counter rather than one wide row, so
+    writers to unrelated counters do not queue on the same row lock.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    
+    class Meta:
+        verbose_name = 'Dashboard counter'
+        verbose_name_plural = 'Dashboard counters'
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+    
+    @staticmethod
+    def _increments(deltas):
+        return Case(
+            *[When(name=name, then=Value(delta)) for name, delta in deltas.items()],
+            output_field=models.DecimalField(max_digits=20, decimal_places=4)
+        )
+    
+    @classmethod
+    def apply(cls, deltas, using='default'):
+        """Add deltas, keyed by counter name, to the counters with a single UPDATE"""
+        deltas = {name: Decimal(delta) for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        with transaction.atomic(using=using, savepoint=False):
+            counters = cls.objects.using(using).filter(name__in=deltas)
+            if counters.update(value=F('value') + cls._increments(deltas)) < len(deltas):
+                # First use of a counter, e.g. a status added since the last recompute
+                missing = set(deltas) - set(counters.values_list('name', flat=True))
+                cls.objects.using(using).bulk_create([cls(name=name) for name in missing], ignore_conflicts=True)
+                cls.objects.using(using).filter(name__in=missing).update(
+                    value=F('value') + cls._increments({name: deltas[name] for name in missing})
+                )
+    
+    @classmethod
+    def apply_rows(cls, model, before, after, using='default'):
+        """Replace the counters of rows in their before state (dicts of dashboard_counter_fields) with their after state"""
+        deltas = {}
+        for rows, sign in ((before, -1), (after, 1)):
+            for row in rows:
+                for name, value in model.dashboard_counters(row).items():
+                    deltas[name] = deltas.get(name, 0) + sign * Decimal(value)
+        cls.apply(deltas, using)
+    
+    @classmethod
+    def totals(cls, using='default'):
+        return dict(cls.objects.using(using).values_list('name', 'value'))
+    
+    @classmethod
+    def recompute(cls, models, using='default'):
+        """
+        Rebuild the counters from the tables and return {name: (stored, actual)} for those that were wrong
+        The counter rows are locked first, so writes made meanwhile wait and
+        then apply their deltas on top of the recomputed totals.
+        """
+        with transaction.atomic(using=using):
+            stored = dict(cls.objects.using(using).select_for_update().order_by('name').values_list('name', 'value'))
+            actual = dict.fromkeys(stored, Decimal('0'))
+            for model in models:
+                rows = model._base_manager.using(using).values(*model.dashboard_counter_fields)
+                for row in rows.iterator(chunk_size=COUNTER_READ_BATCH_SIZE):
+                    for name, value in model.dashboard_counters(row).items():
+                        actual[name] = actual.get(name, Decimal('0')) + Decimal(value)
+            drift = {
+                name: (stored.get(name), value) for name, value in actual.items()
+                if stored.get(name) is None or stored[name] != value
+            }
+            cls.apply({name: value - (stored_value or 0) for name, (stored_value, value) in drift.items()}, using)
+        return drift
+
+
+class DashboardCountedQuerySet(VersionedQuerySet):
+    """QuerySet for DashboardCountedModel that keeps the dashboard counters current on bulk writes"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            DashboardCounter.apply_rows(self.model, [], [obj.dashboard_counter_row() for obj in objs], self.db)
+        return objs
+    
+    def update(self, **kwargs):
+        """Update the rows and move their counters from the old values to the new (bulk_update goes through here too)"""
+        fields = self.model.dashboard_counter_fields
+        if not set(kwargs) & set(fields):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Locked in id order, so concurrent bulk updates queue rather than deadlock
+            before = list(self.select_for_update().order_by('pk').values('pk', *fields))
+            updated = super().update(**kwargs)
+            pks = [row.pop('pk') for row in before]
+            after = []
+            for start in range(0, len(pks), COUNTER_READ_BATCH_SIZE):
+                batch = pks[start:start + COUNTER_READ_BATCH_SIZE]
+                after.extend(self.model._base_manager.using(self.db).filter(pk__in=batch).values(*fields))
+            DashboardCounter.apply_rows(self.model, before, after, self.db)
+        return updated
+
+
+class DashboardCountedModel(models.Model):
+    """
+    Abstract model whose rows feed the DashboardCounter read model
+    dashboard_counters(row) returns the counter increments for one row, given
+    its dashboard_counter_fields. save() and DashboardCountedQuerySet apply
+    the change of every write in its transaction; deletions, cascades
+    included, are applied by the post_delete receiver connected in apps.py.
+    """
+    dashboard_counter_fields = []
+    
+    objects = DashboardCountedQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    @staticmethod
+    def dashboard_counters(row):
+        return {}
+    
+    def dashboard_counter_row(self):
+        # to_python, as a field assigned a string keeps it until the instance is reloaded
+        return {
+            name: self._meta.get_field(name).to_python(getattr(self, name))
+            for name in self.dashboard_counter_fields
+        }
+    
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            previous = None
+            if not self._state.adding and self.pk is not None:
+                previous = type(self)._base_manager.using(using).select_for_update().filter(pk=self.pk).values(
+                    *self.dashboard_counter_fields
+                ).first()
+            super().save(*args, **kwargs)
+            current = self.dashboard_counter_row()
+            update_fields = kwargs.get('update_fields')
+            if previous is not None and update_fields is not None:
+                # Fields left out of update_fields kept their stored values
+                current = {name: current[name] if name in update_fields else value for name, value in previous.items()}
+            DashboardCounter.apply_rows(type(self), [previous] if previous else [], [current], using)
+    
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            # The receiver subtracts this instance's values, which must be the stored ones
+            self.refresh_from_db(using=using, fields=self.dashboard_counter_fields)
+            return super().delete(*args, **kwargs)
 
 
-class Customer(models.Model):
+def remove_dashboard_counters(sender, instance, using, **kwargs):
+    """post_delete receiver for DashboardCountedModel subclasses"""
+    DashboardCounter.apply_rows(sender, [instance.dashboard_counter_row()], [], using)
+
+
+class SearchDocumentCountedQuerySet(DashboardCountedQuerySet, SearchDocumentQuerySet):
+    """QuerySet for searchable models that also feed the dashboard counters"""
+
+
+class Customer(SearchDocumentModel):
     """Model representing a customer"""
+    search_document_fields = ['first_name', 'last_name', 'email', 'phone', 'city']
+    
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
@@ -25,13 +303,23 @@ class Customer(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
     
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Estimates and invoices carry the customer's name in their search documents
+            self.estimates.all().refresh_search_documents()
+            self.invoices.all().refresh_search_documents()
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
 
-class Worker(models.Model):
+class Worker(DashboardCountedModel):
     """Model representing a skilled worker"""
+    dashboard_counter_fields = ['is_available']
+    
     WORKER_TYPES = [
         ('BRICKLAYER', 'Bricklayer'),
         ('CARPENTER', 'Carpenter'),
@@ -57,10 +345,17 @@ class Worker(models.Model):
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.get_worker_type_display()}"
+    
+    @staticmethod
+    def dashboard_counters(row):
+        return {'workers:total': 1, 'workers:available': 1 if row['is_available'] else 0}
 
 
-class Estimate(models.Model):
+class Estimate(DashboardCountedModel, SearchDocumentModel):
     """Model representing a cost estimate for a job"""
+    search_document_fields = ['customer__first_name', 'customer__last_name', 'work_description']
+    dashboard_counter_fields = ['status']
+    
     STATUS_CHOICES = [
         ('PENDING', 'Pending Visit'),
         ('VISITED', 'Property Visited'),
@@ -94,14 +389,24 @@ class Estimate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SearchDocumentCountedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Estimate'
         verbose_name_plural = 'Estimates'
+        indexes = [
+            # Status filters (pending_visits, accepted) in list order
+            models.Index(fields=['status', '-created_at'], name='estimate_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"Estimate #{self.id} - {self.customer.full_name} - {self.get_status_display()}"
     
+    @staticmethod
+    def dashboard_counters(row):
+        return {f"estimates:{row['status']}": 1}
+    
     @property
     def is_within_3_days_of_visit(self):
         """Check if estimate should be sent within 3 days of visit"""
@@ -111,8 +416,10 @@ class Estimate(models.Model):
         return False
 
 
-class Job(models.Model):
+class Job(DashboardCountedModel):
     """Model representing a scheduled building job"""
+    dashboard_counter_fields = ['status', 'scheduled_start_date', 'scheduled_end_date']
+    
     STATUS_CHOICES = [
         ('SCHEDULED', 'Scheduled'),
         ('CONFIRMED', 'Confirmed'),
@@ -145,16 +452,26 @@ class Job(models.Model):
     # Notes
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         ordering = ['scheduled_start_date']
         verbose_name = 'Job'
         verbose_name_plural = 'Jobs'
+        indexes = [
+            # Status with a start date range (upcoming, needs_confirmation, in_progress)
+            models.Index(fields=['status', 'scheduled_start_date'], name='job_status_start_idx'),
+        ]
     
     def __str__(self):
         return f"Job #{self.id} - {self.job_title} - {self.customer.full_name}"
     
+    @staticmethod
+    def dashboard_counters(row):
+        # Summed over all jobs, for the average scheduled duration
+        duration = (row['scheduled_end_date'] - row['scheduled_start_date']).days
+        return {f"jobs:{row['status']}": 1, 'jobs:duration_days': duration}
+    
     @property
     def needs_confirmation(self):
         """Check if job needs customer confirmation (few days before start)"""
@@ -169,8 +486,10 @@ class Job(models.Model):
         return sum(material.total_cost for material in self.materials.all())
 
 
-class Supplier(models.Model):
+class Supplier(SearchDocumentModel):
     """Model representing a building materials supplier"""
+    search_document_fields = ['name', 'contact_person', 'email']
+    
     name = models.CharField(max_length=200)
     contact_person = models.CharField(max_length=100)
     email = models.EmailField()
@@ -190,8 +509,11 @@ class Supplier(models.Model):
         return self.name
 
 
-class Material(models.Model):
+class Material(DashboardCountedModel, SearchDocumentModel):
     """Model representing building materials for a job"""
+    search_document_fields = ['name', 'description']
+    dashboard_counter_fields = ['quantity', 'unit_cost']
+    
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='materials')
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, related_name='materials_supplied')
     
@@ -211,22 +533,126 @@ class Material(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SearchDocumentCountedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['job', 'name']
         verbose_name = 'Material'
         verbose_name_plural = 'Materials'
+        indexes = [
+            # Undelivered orders (pending_delivery); the filter tests NOT is_delivered,
+            # which a partial index matches but a (is_delivered, ...) index does not
+            models.Index(fields=['order_date'], condition=models.Q(is_delivered=False), name='material_undelivered_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.quantity} {self.unit}"
     
+    @staticmethod
+    def dashboard_counters(row):
+        return {'materials:spend': row['quantity'] * row['unit_cost']}
+    
     @property
     def total_cost(self):
         """Calculate total cost for this material"""
         return self.quantity * self.unit_cost
 
 
-class Invoice(models.Model):
+class Sequence(models.Model):
+    """Model holding the next value of a named counter, e.g. invoice numbers"""
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    class Meta:
+        verbose_name = 'Sequence'
+        verbose_name_plural = 'Sequences'
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+    
+    @classmethod
+    def reserve(cls, name, count=1):
+        """
+        Reserve `count` consecutive values of the named sequence and return them as a range
+        The counter row is incremented before it is read, so the row lock is
+        held until the surrounding transaction ends: concurrent callers queue
+        behind it, and a rollback hands the values back, keeping numbering
+        gap-free. Call it inside the transaction that uses the values.
+        """
+        if count < 1:
+            raise ValueError('count must be at least 1')
+        with transaction.atomic(savepoint=False):
+            counter = cls.objects.filter(name=name)
+            if not counter.update(next_value=F('next_value') + count):
+                cls.objects.get_or_create(name=name)
+                counter.update(next_value=F('next_value') + count)
+            end = counter.values_list('next_value', flat=True).get()
+        return range(end - count, end)
+
+
+class InvoiceQuerySet(SearchDocumentCountedQuerySet):
+    """QuerySet for Invoice with bulk maintenance of the stored money columns"""
+    
+    def recalculate_totals(self):
+        """Recompute subtotal, tax, total and balance for every invoice in a single UPDATE"""
+        subtotal = F('labor_cost') + F('material_cost') + F('additional_costs')
+        tax_amount = Round(subtotal * F('tax_rate') / Value(100), 2)
+        return self.update(
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            total_amount=subtotal + tax_amount,
+            balance_due=subtotal + tax_amount - F('amount_paid'),
+            updated_at=timezone.now()
+        )
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """Number and total the invoices, reserving one block of numbers for the whole batch"""
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            unnumbered = [invoice for invoice in objs if not invoice.invoice_number]
+            if unnumbered:
+                numbers = Sequence.reserve(INVOICE_SEQUENCE, len(unnumbered))
+                for invoice, number in zip(unnumbered, numbers):
+                    invoice.invoice_number = INVOICE_NUMBER_FORMAT.format(number)
+            for invoice in objs:
+                invoice.prepare()
+            return super().bulk_create(objs, *args, **kwargs)
+    
+    def apply_payments(self, amounts):
+        """
+        Add payment amounts, keyed by invoice id, to amount_paid in the database
+        Each batch of invoices gets one UPDATE that increments the paid amount
+        and moves fully paid invoices to PAID; update() locks the rows in id
+        order first, so concurrent postings serialise without deadlocking.
+        """
+        amounts = {invoice_id: Decimal(amount) for invoice_id, amount in amounts.items() if amount}
+        ids = sorted(amounts)
+        with transaction.atomic(savepoint=False):
+            for start in range(0, len(ids), PAYMENT_UPDATE_BATCH_SIZE):
+                batch = ids[start:start + PAYMENT_UPDATE_BATCH_SIZE]
+                if len(batch) == 1:
+                    delta = Value(amounts[batch[0]])
+                else:
+                    delta = Case(
+                        *[When(pk=invoice_id, then=Value(amounts[invoice_id])) for invoice_id in batch],
+                        output_field=models.DecimalField(max_digits=14, decimal_places=2)
+                    )
+                self.filter(pk__in=batch).update(
+                    amount_paid=F('amount_paid') + delta,
+                    balance_due=F('balance_due') - delta,
+                    status=Case(
+                        When(Q(total_amount__lte=F('amount_paid') + delta), then=Value('PAID')),
+                        default=F('status')
+                    ),
+                    updated_at=timezone.now()
+                )
+
+
+class Invoice(DashboardCountedModel, SearchDocumentModel):
     """Model representing an invoice for a completed job"""
+    search_document_fields = ['invoice_number', 'customer__first_name', 'customer__last_name']
+    dashboard_counter_fields = ['status', 'total_amount', 'balance_due']
+    
     STATUS_CHOICES = [
         ('DRAFT', 'Draft'),
         ('SENT', 'Sent'),
@@ -252,57 +678,92 @@ class Invoice(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
     amount_paid = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)], default=0)
     
+    # Stored totals, maintained by save() and InvoiceQuerySet.recalculate_totals()
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    tax_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False, db_index=True)
+    balance_due = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False, db_index=True)
+    
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    objects = InvoiceQuerySet.as_manager()
     
     class Meta:
         ordering = ['-invoice_date']
         verbose_name = 'Invoice'
         verbose_name_plural = 'Invoices'
+        indexes = [
+            # Status with a due date range (overdue, unpaid)
+            models.Index(fields=['status', 'due_date'], name='invoice_status_due_idx'),
+        ]
     
     def __str__(self):
         return f"Invoice #{self.invoice_number} - {self.customer.full_name}"
     
+    @staticmethod
+    def dashboard_counters(row):
+        if row['status'] == 'PAID':
+            return {'invoices:PAID': 1, 'invoices:revenue': row['total_amount']}
+        return {f"invoices:{row['status']}": 1, 'invoices:outstanding': row['balance_due']}
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        invoice = super().from_db(db, field_names, values)
+        invoice._remember_payment_state()
+        return invoice
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_payment_state()
+    
+    def _remember_payment_state(self):
+        # The payment fields as last read or written, so save() can tell an edit from a stale value
+        self._payment_state = {name: self.__dict__[name] for name in INVOICE_PAYMENT_FIELDS if name in self.__dict__}
+    
     def save(self, *args, **kwargs):
-        # Auto-generate invoice number if not set
-        if not self.invoice_number:
-            last_invoice = Invoice.objects.order_by('-id').first()
-            if last_invoice:
-                last_number = int(last_invoice.invoice_number.split('-')[-1])
-                self.invoice_number = f"INV-{last_number + 1:05d}"
-            else:
-                self.invoice_number = "INV-00001"
-        
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            # Auto-generate invoice number if not set; allocated in this
+            # transaction so a failed insert releases the number
+            if not self.invoice_number:
+                self.invoice_number = INVOICE_NUMBER_FORMAT.format(Sequence.reserve(INVOICE_SEQUENCE)[0])
+            if not self._state.adding and self.pk is not None:
+                self._merge_posted_payments(using)
+            self.prepare()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'subtotal', 'tax_amount', 'total_amount', 'balance_due'}
+            super().save(*args, **kwargs)
+        self._remember_payment_state()
+    
+    def _merge_posted_payments(self, using):
+        """Take amount_paid and status from the locked row unless this instance changed them"""
+        stored = type(self)._base_manager.using(using).select_for_update().filter(pk=self.pk).values(
+            *INVOICE_PAYMENT_FIELDS
+        ).first()
+        loaded = getattr(self, '_payment_state', {})
+        for name, value in (stored or {}).items():
+            # Unchanged since it was read, so a payment posted meanwhile must not be undone
+            if name in loaded and self.__dict__.get(name) == loaded[name]:
+                setattr(self, name, value)
+    
+    def prepare(self):
+        """Fill in the default due date and the stored totals before writing"""
         # Set due date if not set (30 days from invoice date)
         if not self.due_date:
             self.due_date = timezone.now().date() + timedelta(days=30)
-        
-        super().save(*args, **kwargs)
+        self.calculate_totals()
     
-    @property
-    def subtotal(self):
-        """Calculate subtotal before tax"""
-        return self.labor_cost + self.material_cost + self.additional_costs
-    
-    @property
-    def tax_amount(self):
-        """Calculate tax amount"""
-        return (self.subtotal * self.tax_rate) / 100
-    
-    @property
-    def total_amount(self):
-        """Calculate total amount including tax"""
-        from decimal import Decimal
-        result = self.subtotal + self.tax_amount
-        return Decimal(str(result))
-    
-    @property
-    def balance_due(self):
-        """Calculate remaining balance"""
-        from decimal import Decimal
-        result = self.total_amount - self.amount_paid
-        return Decimal(str(result))
+    def calculate_totals(self):
+        """Refresh the stored subtotal, tax, total and balance from the cost fields"""
+        subtotal = Decimal(self.labor_cost) + Decimal(self.material_cost) + Decimal(self.additional_costs)
+        tax_amount = (subtotal * Decimal(self.tax_rate) / 100).quantize(MONEY_PLACES, rounding=ROUND_HALF_UP)
+        self.subtotal = subtotal
+        self.tax_amount = tax_amount
+        self.total_amount = subtotal + tax_amount
+        self.balance_due = self.total_amount - Decimal(self.amount_paid)
     
     @property
     def is_overdue(self):
@@ -312,6 +773,22 @@ class Invoice(models.Model):
         return False
 
 
+class PaymentQuerySet(VersionedQuerySet):
+    """QuerySet for Payment that posts bulk-created payments onto their invoices"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert the payments and add them to their invoices with one grouped update per batch"""
+        objs = list(objs)
+        amounts = {}
+        for payment in objs:
+            amounts[payment.invoice_id] = amounts.get(payment.invoice_id, Decimal('0')) + Decimal(payment.amount)
+        with transaction.atomic(using=self.db, savepoint=False):
+            # bulk_create skips Payment.save, so the invoices are updated here
+            objs = super().bulk_create(objs, *args, **kwargs)
+            Invoice.objects.apply_payments(amounts)
+        return objs
+
+
 class Payment(models.Model):
     """Model representing a payment made against an invoice"""
     PAYMENT_METHODS = [
@@ -333,6 +810,8 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PaymentQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-payment_date']
         verbose_name = 'Payment'
@@ -342,11 +821,72 @@ class Payment(models.Model):
         return f"Payment of ${self.amount} for Invoice #{self.invoice.invoice_number}"
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update invoice amount paid
-        self.invoice.amount_paid = sum(
-            payment.amount for payment in self.invoice.payments.all()
-        )
-        if self.invoice.amount_paid >= self.invoice.total_amount:
-            self.invoice.status = 'PAID'
-        self.invoice.save()
+        # Post the payment (or the change to it) onto the invoice in the database
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Payment.objects.filter(pk=self.pk).values_list('invoice_id', 'amount').first()
+            super().save(*args, **kwargs)
+            amounts = {self.invoice_id: Decimal(self.amount)}
+            if previous:
+                amounts[previous[0]] = amounts.get(previous[0], Decimal('0')) - previous[1]
+            Invoice.objects.apply_payments(amounts)
+        self._refresh_invoice()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Reverse the stored amount, not one edited on this instance but never saved
+            stored = Payment.objects.select_for_update().filter(pk=self.pk).values_list('invoice_id', 'amount').first()
+            result = super().delete(*args, **kwargs)
+            if stored:
+                Invoice.objects.apply_payments({stored[0]: -stored[1]})
+        self._refresh_invoice()
+        return result
+    
+    def _refresh_invoice(self):
+        # A loaded invoice is now stale; saving it would overwrite the posted amount
+        if Payment.invoice.is_cached(self):
+            self.invoice.refresh_from_db(fields=['amount_paid', 'balance_due', 'status'])
+
+
+class ExportJob(models.Model):
+    """Model representing a dashboard report built in the background"""
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('excel', 'Excel'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ['PENDING', 'RUNNING']
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    filters = models.JSONField(default=dict, blank=True)
+    # Hash of format and filters used to hand identical pending requests the same job
+    request_key = models.CharField(max_length=40, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['request_key'],
+                condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                name='unique_active_export_request'
+            )
+        ]
+    
+    def __str__(self):
+        return f"Export {self.id} - {self.get_export_format_display()} - {self.status}"
@@ -0,0 +1,284 @@
+"""
+Pagination for the API
+Pages are numbered by default. Any list endpoint switches to keyset (cursor)
+pages with ?pagination=cursor: each page is fetched with a WHERE clause on
+the last row's ordering values plus id instead of an OFFSET, so page 1000
+costs the same as page 1. ?count=approximate replaces the exact COUNT(*)
+with the planner's row estimate (PostgreSQL) or a briefly cached count.
+"""
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+COUNT_CACHE_PREFIX = 'pagination-count'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder drops microseconds past milliseconds, which would
+    # make a cursor skip rows created within the same millisecond
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def approximate_count(queryset):
+    """
+    Estimate the number of rows in queryset without scanning them
+    PostgreSQL answers from planner statistics via EXPLAIN; other databases
+    count once and reuse the result for PAGINATION_COUNT_CACHE_TIMEOUT seconds.
+    """
+    queryset = queryset.order_by()
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    key = hashlib.sha1(f'{queryset.db}:{sql}:{params!r}'.encode('utf-8')).hexdigest()
+    return cache.get_or_set(f'{COUNT_CACHE_PREFIX}:{key}', queryset.count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """Django paginator whose count comes from approximate_count"""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+def _nullable(model, path):
+    """Whether an ordering path can be NULL (annotations are assumed to be)"""
+    for name in path.split('__'):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return True
+        if field.null:
+            return True
+        if not field.is_relation:
+            return False
+        model = field.related_model
+    return False
+
+
+def _ordering_field(queryset, path):
+    """The field an ordering path ends on, or an annotation's output field"""
+    if path in queryset.query.annotations:
+        return queryset.query.annotations[path].output_field
+    model = queryset.model
+    for name in path.split('__'):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Left unconverted, like the other unknown terms _nullable allows for
+            return None
+        model = field.related_model
+    # Ordering on a relation orders on its key
+    return field.target_field if field.is_relation else field
+
+
+class OrderingKey:
+    """One term of a keyset ordering; NULLs sort after every value"""
+
+    def __init__(self, name, descending, nullable, field=None):
+        self.name = name
+        self.descending = descending
+        self.nullable = nullable
+        self.field = field
+
+    def to_python(self, value):
+        """Convert a value read back from a cursor; raises Django's ValidationError if it does not fit the field"""
+        if value is None or self.field is None:
+            return value
+        return self.field.to_python(value)
+
+    def order_by(self, reverse=False):
+        if reverse:
+            return F(self.name).asc(nulls_first=True) if self.descending else F(self.name).desc(nulls_first=True)
+        return F(self.name).desc(nulls_last=True) if self.descending else F(self.name).asc(nulls_last=True)
+
+    def value(self, obj):
+        for attr in self.name.split('__'):
+            if obj is None:
+                return None
+            obj = getattr(obj, attr)
+        return obj
+
+    def beyond(self, value, reverse=False):
+        """Rows strictly past value in this term's order (or the reversed order)"""
+        if value is None:
+            # NULLs are last, so only a reversed walk has rows past them
+            return Q(**{f'{self.name}__isnull': False}) if reverse else Q(pk__in=[])
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        condition = Q(**{f'{self.name}__{lookup}': value})
+        if self.nullable and not reverse:
+            condition |= Q(**{f'{self.name}__isnull': True})
+        return condition
+
+    def equal(self, value):
+        if value is None:
+            return Q(**{f'{self.name}__isnull': True})
+        return Q(**{self.name: value})
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the queryset's ordering plus id
+    The cursor holds the ordering and the boundary row's values for it; the
+    next page is the rows past those values, found through the ordering's
+    index rather than by skipping an OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def get_keys(self, queryset, view):
+        ordering = [
+            term for term in (queryset.query.order_by or getattr(view, 'ordering', None) or queryset.model._meta.ordering)
+            if isinstance(term, str) and term != '?'
+        ]
+        names = [term.lstrip('-') for term in ordering]
+        keys = [
+            OrderingKey(name, term.startswith('-'), _nullable(queryset.model, name), _ordering_field(queryset, name))
+            for term, name in zip(ordering, names) if name not in ('pk', 'id')
+        ]
+        # id breaks ties so every row has a distinct position
+        descending = bool(keys) and keys[-1].descending
+        keys.append(OrderingKey('id', descending, False, queryset.model._meta.pk))
+        return keys
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'o': self.ordering, 'v': values, 'r': reverse}, cls=CursorEncoder, separators=(',', ':'))
+        return urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode('ascii')))
+            values, reverse = payload['v'], bool(payload['r'])
+            valid = payload['o'] == self.ordering and isinstance(values, list) and len(values) == len(self.keys)
+            if valid:
+                values = [key.to_python(value) for key, value in zip(self.keys, values)]
+        except (BinasciiError, DjangoValidationError, KeyError, TypeError, UnicodeError, ValueError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def beyond(self, values, reverse):
+        """Rows past the boundary row: later on the first key, or tied on it and past on the rest"""
+        condition = None
+        for key, value in reversed(list(zip(self.keys, values))):
+            past = key.beyond(value, reverse)
+            condition = past if condition is None else past | (key.equal(value) & condition)
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keys = self.get_keys(queryset, view)
+        self.ordering = [f"{'-' if key.descending else ''}{key.name}" for key in self.keys]
+        values, reverse = self.decode_cursor(request)
+        self.count = self.get_count(queryset, request)
+        queryset = queryset.order_by(*[key.order_by(reverse) for key in self.keys])
+        if values is not None:
+            queryset = queryset.filter(self.beyond(values, reverse))
+        rows = list(queryset[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        # Walking backwards, the rows past the page are the ones before it
+        self.has_next = values is not None if reverse else more
+        self.has_previous = more if reverse else values is not None
+        self.page = rows
+        return rows
+
+    def get_count(self, queryset, request):
+        # Keyset pages carry no total unless one is asked for
+        if request.query_params.get(DefaultPagination.count_query_param) == 'approximate':
+            return approximate_count(queryset)
+        return None
+
+    def get_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        values = [key.value(row) for key in self.keys]
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(self.page[-1], False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.get_link(self.page[0], True)
+
+    def get_paginated_response(self, data):
+        body = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            body = {'count': self.count, **body}
+        return Response(body)
+
+
+class DefaultPagination(PageNumberPagination):
+    """
+    Page number pagination with opt-in keyset pages and approximate counts
+    ?pagination=cursor (or a ?cursor= link) pages with KeysetPagination;
+    ?count=approximate estimates the total instead of running COUNT(*).
+    """
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor' or KeysetPagination.cursor_query_param in request.query_params:
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self.keyset = KeysetPagination(page_size)
+            self.display_page_controls = False
+            return self.keyset.paginate_queryset(queryset, request, view)
+        if request.query_params.get(self.count_query_param) == 'approximate':
+            self.django_paginator_class = ApproximateCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CustomerCollectionPagination(DefaultPagination):
+    """
+    Pages for a customer's estimates, jobs and invoices
+    The first page holds the same items the customer detail view embeds, so
+    its *_next links point at page 2.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        self.page_size = settings.CUSTOMER_DETAIL_NESTED_LIMIT
+        return super().get_page_size(request)
@@ -0,0 +1,140 @@
+"""
+Vector dashboard charts for the PDF export
+Charts are built as reportlab drawings from the same labels and series the
+dashboard draws in data mode, so the PDF carries scalable vector graphics
+instead of PNGs rasterised by matplotlib.
+"""
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+
+from .chart_rendering import CHART_COLORS
+
+LABEL_LENGTH = 18
+
+
+def _color(value, index):
+    return colors.HexColor(value or CHART_COLORS[index % len(CHART_COLORS)])
+
+
+def _labels(labels):
+    return [label if len(label) <= LABEL_LENGTH else f'{label[:LABEL_LENGTH - 1]}…' for label in labels]
+
+
+def _value_axis(axis, values):
+    axis.valueMin = 0
+    # reportlab cannot scale an axis whose range is empty
+    if max([0] + [value for value in values if value is not None]) <= 0:
+        axis.valueMax = 1
+    axis.labels.fontSize = 7
+
+
+def _legend(drawing, series, width, height):
+    legend = Legend()
+    legend.alignment = 'right'
+    legend.x = width - 10 - 90 * len(series)
+    legend.y = height - 4
+    legend.columnMaximum = 1
+    legend.fontSize = 7
+    legend.dxTextSpace = 4
+    legend.deltax = 90
+    legend.colorNamePairs = [(_color(item['color'], index), item['name']) for index, item in enumerate(series)]
+    drawing.add(legend)
+
+
+def _bar_chart(drawing, chart, series, width, height, horizontal=False):
+    if horizontal:
+        bars = HorizontalBarChart()
+        bars.x, bars.y = 110, 20
+        bars.width, bars.height = width - 130, height - 40
+        # Horizontal bars read bottom-up, so reverse to show the first label on top
+        bars.categoryAxis.reverseDirection = 1
+    else:
+        bars = VerticalBarChart()
+        bars.x, bars.y = 45, 60
+        bars.width, bars.height = width - 60, height - 80
+        bars.categoryAxis.labels.angle = 30
+        bars.categoryAxis.labels.boxAnchor = 'ne'
+    bars.data = [[float(value) for value in item['values']] for item in series]
+    bars.categoryAxis.categoryNames = _labels(chart['labels'])
+    bars.categoryAxis.labels.fontSize = 7
+    _value_axis(bars.valueAxis, [value for row in bars.data for value in row])
+    bars.bars.strokeColor = None
+    if len(series) == 1 and not series[0]['color']:
+        # A single series without a colour takes one palette colour per bar
+        for index in range(len(chart['labels'])):
+            bars.bars[(0, index)].fillColor = _color(None, index)
+    else:
+        for index, item in enumerate(series):
+            bars.bars[index].fillColor = _color(item['color'], index)
+    drawing.add(bars)
+    return bars
+
+
+def _line_chart(drawing, chart, series, width, height, color_offset=0):
+    lines = HorizontalLineChart()
+    lines.x, lines.y = 45, 60
+    lines.width, lines.height = width - 60, height - 80
+    lines.data = [[float(value) for value in item['values']] for item in series]
+    lines.categoryAxis.categoryNames = _labels(chart['labels'])
+    lines.categoryAxis.labels.angle = 30
+    lines.categoryAxis.labels.boxAnchor = 'ne'
+    lines.categoryAxis.labels.fontSize = 7
+    _value_axis(lines.valueAxis, [value for row in lines.data for value in row])
+    for index, item in enumerate(series):
+        lines.lines[index].strokeColor = _color(item['color'], index + color_offset)
+        lines.lines[index].strokeWidth = 2
+        lines.lines[index].symbol = makeMarker('FilledCircle', size=4)
+    drawing.add(lines)
+    return lines
+
+
+def _pie_chart(drawing, chart, series, width, height):
+    values = [float(value) for value in series[0]['values']]
+    total = sum(values) or 1
+    size = min(width, height) - 60
+    pie = Pie()
+    pie.x, pie.y = (width - size) / 2, 25
+    pie.width = pie.height = size
+    pie.data = values
+    pie.labels = [f'{label} ({value / total:.1%})' for label, value in zip(_labels(chart['labels']), values)]
+    pie.slices.strokeColor = colors.white
+    pie.slices.fontSize = 7
+    for index in range(len(values)):
+        pie.slices[index].fillColor = _color(None, index)
+    drawing.add(pie)
+
+
+def chart_drawing(chart, width, height):
+    """Build a reportlab Drawing for a chart payload from generate_dashboard_chart_data()"""
+    drawing = Drawing(width, height)
+    series = chart['series']
+    kind = chart['type']
+    if kind == 'pie':
+        _pie_chart(drawing, chart, series, width, height)
+    elif kind in ('bar', 'barh'):
+        _bar_chart(drawing, chart, series, width, height, horizontal=kind == 'barh')
+    elif kind == 'line':
+        _line_chart(drawing, chart, series, width, height)
+    elif kind == 'combo':
+        # Grouped bars for every series but the last, which is a line on its own scale
+        _bar_chart(drawing, chart, series[:-1], width, height)
+        line = _line_chart(drawing, chart, series[-1:], width, height, color_offset=len(series) - 1)
+        line.categoryAxis.visible = 0
+        line.valueAxis.joinAxisMode = 'right'
+        line.valueAxis.joinAxis = line.categoryAxis
+    else:
+        raise ValueError(f'Unsupported chart type: {kind}')
+    if len(series) > 1:
+        _legend(drawing, series, width, height)
+    return drawing
+
+
+def draw_chart(canvas, chart, x, y, width, height):
+    """Draw a chart payload onto a reportlab canvas with its bottom-left corner at (x, y)"""
+    renderPDF.draw(chart_drawing(chart, width, height), canvas, x, y)
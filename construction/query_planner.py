@@ -0,0 +1,174 @@
+"""
+select_related/prefetch_related planning from serializer trees
+The planner walks a serializer's readable fields and follows their sources
+through the model: to-one relations that are read become select_related
+joins, to-many relations become Prefetch objects whose querysets are
+planned from the nested serializer in turn.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .models import Estimate, Job, Invoice, Payment, Worker
+
+# Relations each model's __str__ reads, for StringRelatedField
+STR_RELATIONS = {
+    Worker: ['user'],
+    Estimate: ['customer'],
+    Job: ['customer'],
+    Invoice: ['customer'],
+    Payment: ['invoice'],
+}
+
+
+class QueryPlan:
+    """The select_related paths and nested prefetch plans for one model"""
+
+    def __init__(self, model):
+        self.model = model
+        self.select = set()
+        self.prefetch = {}
+        # The LatestListSerializer a prefetch plan loads a slice for
+        self.sliced_by = None
+
+    def prefetch_plan(self, lookup, model):
+        if lookup not in self.prefetch:
+            self.prefetch[lookup] = QueryPlan(model)
+        return self.prefetch[lookup]
+
+    def add_lookup(self, lookup, prefix='', model=None):
+        """Add a relation path such as 'job__workers__user' starting at model (the plan's model by default)"""
+        model = model or self.model
+        parts = lookup.split('__')
+        for index, name in enumerate(parts):
+            field = _relation(model, name)
+            if field is None:
+                return
+            path = f'{prefix}{name}'
+            if field.many_to_many or field.one_to_many:
+                rest = '__'.join(parts[index + 1:])
+                nested = self.prefetch_plan(path, field.related_model)
+                if rest:
+                    nested.add_lookup(rest)
+                return
+            self.select.add(path)
+            prefix = f'{path}__'
+            model = field.related_model
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*[
+                plan.prefetch_object(lookup)
+                for lookup, plan in sorted(self.prefetch.items())
+            ])
+        return queryset
+
+    def prefetch_object(self, lookup):
+        queryset = self.apply(self.model._default_manager.all())
+        if self.sliced_by is None:
+            return Prefetch(lookup, queryset=queryset)
+        # Sliced prefetches are cut per parent object with a window function;
+        # Django only supports them when stored with to_attr
+        field = self.sliced_by
+        queryset = queryset.order_by(*field.ordering)[:field.limit]
+        return Prefetch(lookup, queryset=queryset, to_attr=field.prefetch_attr)
+
+
+def _relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation and field.related_model is not None else None
+
+
+def _nested(field):
+    """Return the serializer or related field that reads the objects at the end of a field's source"""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.ManyRelatedField):
+        return field.child_relation
+    return field
+
+
+def _reads_object(field):
+    # Primary key fields read the foreign key column; everything else loads the object
+    if isinstance(field, serializers.RelatedField):
+        return not field.use_pk_only_optimization()
+    return True
+
+
+def _walk(serializer, plan, prefix, model):
+    meta = getattr(serializer, 'Meta', None)
+    # Relations read by model properties, keyed by the field that exposes them
+    hints = getattr(meta, 'related_hints', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        for lookup in hints.get(name, ()):
+            plan.add_lookup(lookup, prefix, model)
+        _walk_field(field, plan, prefix, model)
+
+
+def _walk_field(field, plan, prefix, model):
+    target = _nested(field)
+    if field.source == '*':
+        if isinstance(field, serializers.BaseSerializer):
+            _walk(field, plan, prefix, model)
+        return
+    attrs = field.source_attrs
+    for index, name in enumerate(attrs):
+        relation = _relation(model, name)
+        if relation is None:
+            return
+        path = f'{prefix}{name}'
+        if relation.many_to_many or relation.one_to_many:
+            child = plan.prefetch_plan(path, relation.related_model)
+            if hasattr(field, 'prefetch_attr'):
+                child.sliced_by = field
+            rest = attrs[index + 1:]
+            if rest:
+                child.add_lookup('__'.join(rest))
+            else:
+                _walk_target(target, child, '', relation.related_model)
+            return
+        if index == len(attrs) - 1 and not _reads_object(target):
+            return
+        plan.select.add(path)
+        prefix = f'{path}__'
+        model = relation.related_model
+    _walk_target(target, plan, prefix, model)
+
+
+def _walk_target(field, plan, prefix, model):
+    if isinstance(field, serializers.BaseSerializer):
+        _walk(field, plan, prefix, model)
+    elif isinstance(field, serializers.StringRelatedField):
+        for lookup in STR_RELATIONS.get(model, ()):
+            plan.add_lookup(lookup, prefix, model)
+
+
+@lru_cache(maxsize=None)
+def plan_for_serializer(serializer_class):
+    """Return the QueryPlan for a ModelSerializer class (cached per class)"""
+    plan = QueryPlan(serializer_class.Meta.model)
+    _walk(serializer_class(), plan, '', plan.model)
+    return plan
+
+
+def plan_queryset(queryset, serializer):
+    """Add the joins and prefetches a serializer class or instance needs to queryset"""
+    serializer_class = serializer if isinstance(serializer, type) else type(serializer)
+    if not hasattr(getattr(serializer_class, 'Meta', None), 'model'):
+        return queryset
+    selection = getattr(serializer, 'get_field_selection', None)
+    if isinstance(serializer, type) or selection is None or selection() is None:
+        return plan_for_serializer(serializer_class).apply(queryset)
+    # ?fields= / ?expand= pruned this instance's fields, so plan from them
+    plan = QueryPlan(serializer_class.Meta.model)
+    _walk(serializer, plan, '', plan.model)
+    return plan.apply(queryset)
@@ -0,0 +1,181 @@
+"""
+Indexed full-text search over the stored search documents
+Each searchable model keeps its search_document_fields in one search_document
+column (see SearchDocumentModel). ?search= matches every term against that
+column and orders the results by relevance:
+
+- PostgreSQL: a pg_trgm GIN index answers the substring matches and
+  ts_rank over a prefix tsquery ranks them.
+- SQLite: an FTS5 shadow table with the trigram tokenizer, kept in step by
+  triggers, answers the matches and bm25() ranks them.
+
+Anything else (or a database without the extension/FTS5) falls back to
+icontains on the document with no ranking.
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import Customer, Estimate, Invoice, Material, Supplier
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODELS = [Customer, Estimate, Invoice, Material, Supplier]
+# FTS5's trigram tokenizer can only match terms of three or more characters
+TRIGRAM_LENGTH = 3
+
+# (alias, database name, table) -> whether the FTS5 shadow table exists
+_fts_tables = {}
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _sqlite_index_statements(model):
+    table, fts, pk = model._meta.db_table, fts_table(model), model._meta.pk.column
+    delete = f"INSERT INTO {fts}({fts}, rowid, search_document) VALUES ('delete', old.{pk}, old.search_document);"
+    insert = f'INSERT INTO {fts}(rowid, search_document) VALUES (new.{pk}, new.search_document);'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"search_document, content='{table}', content_rowid='{pk}', tokenize='trigram')",
+        f'CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER {fts}_update AFTER UPDATE OF search_document ON {table} BEGIN {delete} {insert} END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _install_sqlite(connection, model):
+    fts = fts_table(model)
+    triggers = [f'{fts}_insert', f'{fts}_delete', f'{fts}_update']
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)", [fts, *triggers])
+        if len(cursor.fetchall()) == 4:
+            return
+        # Rebuilding a table during a migration drops its triggers, so they
+        # are recreated and the shadow table refilled from the documents
+        for trigger in triggers:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        for statement in _sqlite_index_statements(model):
+            cursor.execute(statement)
+
+
+def _install_postgresql(connection, model):
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # Matches Django's icontains, UPPER(column::text) LIKE UPPER(%s)
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_trgm ON {table} '
+            f'USING gin (UPPER(search_document) gin_trgm_ops)'
+        )
+
+
+def _has_search_document(connection, model):
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(cursor, model._meta.db_table)
+    return any(column.name == 'search_document' for column in columns)
+
+
+def install_search_indexes(using='default', **kwargs):
+    """Create the search indexes that migrations cannot express (safe to run repeatedly)"""
+    connection = connections[using]
+    install = {'postgresql': _install_postgresql, 'sqlite': _install_sqlite}.get(connection.vendor)
+    if install is None:
+        return
+    for model in SEARCH_MODELS:
+        # Migrated back before the search documents were added
+        if not _has_search_document(connection, model):
+            continue
+        try:
+            with transaction.atomic(using=using):
+                install(connection, model)
+        except DatabaseError:
+            logger.warning('Could not create the search index for %s; searches fall back to icontains', model.__name__, exc_info=True)
+        _fts_tables.pop((using, connection.settings_dict['NAME'], model._meta.db_table), None)
+
+
+def remove_search_indexes(connection, models=SEARCH_MODELS):
+    """Drop what install_search_indexes created, e.g. before removing the search_document columns"""
+    with connection.cursor() as cursor:
+        for model in models:
+            table, fts = model._meta.db_table, fts_table(model)
+            if connection.vendor == 'sqlite':
+                for trigger in (f'{fts}_insert', f'{fts}_delete', f'{fts}_update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {table}_search_trgm')
+            _fts_tables.pop((connection.alias, connection.settings_dict['NAME'], table), None)
+
+
+def has_fts_table(connection, model):
+    key = (connection.alias, connection.settings_dict['NAME'], model._meta.db_table)
+    if key not in _fts_tables:
+        _fts_tables[key] = fts_table(model) in connection.introspection.table_names()
+    return _fts_tables[key]
+
+
+def _contains_all(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset
+
+
+def _search_postgresql(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+    queryset = _contains_all(queryset, terms)
+    tokens = [token for term in terms for token in re.findall(r'\w+', term)]
+    if not tokens:
+        return queryset, Value(0.0, output_field=FloatField())
+    query = SearchQuery(' | '.join(f'{token}:*' for token in tokens), config='simple', search_type='raw')
+    return queryset, SearchRank(SearchVector('search_document', config='simple'), query)
+
+
+def _search_sqlite(queryset, terms):
+    model = queryset.model
+    fts, table, pk = fts_table(model), model._meta.db_table, model._meta.pk.column
+    short = [term for term in terms if len(term) < TRIGRAM_LENGTH]
+    indexed = [term for term in terms if len(term) >= TRIGRAM_LENGTH]
+    queryset = _contains_all(queryset, short)
+    if not indexed:
+        return queryset, Value(0.0, output_field=FloatField())
+    # Each quoted term is a substring match; several terms must all match
+    match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in indexed)
+    queryset = queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match]))
+    rank = RawSQL(
+        f'SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = "{table}"."{pk}"',
+        [match], output_field=FloatField()
+    )
+    return queryset, rank
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ?search= backed by the search document indexes, most relevant first
+    Models without a search document use SearchFilter's icontains over the
+    view's search_fields. Results are ordered by search_rank unless the
+    request gives ?ordering=, so list this backend after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or queryset.model not in SEARCH_MODELS:
+            return super().filter_queryset(request, queryset, view)
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            queryset, rank = _search_postgresql(queryset, terms)
+        elif connection.vendor == 'sqlite' and has_fts_table(connection, queryset.model):
+            queryset, rank = _search_sqlite(queryset, terms)
+        else:
+            queryset, rank = _contains_all(queryset, terms), Value(0.0, output_field=FloatField())
+        queryset = queryset.annotate(search_rank=rank)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by)
@@ -1,13 +1,336 @@
-from rest_framework import serializers
+from rest_framework import permissions, serializers
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Lower
 from django.utils import timezone
 from .models import (
     Customer, Worker, Estimate, Job, Supplier, 
-    Material, Invoice, Payment
+    Material, Invoice, Payment, ExportJob
 )
+from .table_versions import bump_table_versions
 
+# Rows per INSERT or UPDATE statement when a list is created or updated at once
+BULK_BATCH_SIZE = 500
 
-class UserSerializer(serializers.ModelSerializer):
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that can look up a whole batch of ids at once
+    BulkListSerializer preloads every id posted in the list with one
+    query, so validating N items does not cost N lookups per relation.
+    """
+    
+    def __init__(self, **kwargs):
+        self.preloaded = None
+        super().__init__(**kwargs)
+    
+    def preload(self, values):
+        pks = {int(value) for value in values if _is_pk(value)}
+        self.preloaded = self.get_queryset().in_bulk(pks) if pks else {}
+    
+    def to_internal_value(self, data):
+        if self.preloaded is None or not _is_pk(data):
+            return super().to_internal_value(data)
+        obj = self.preloaded.get(int(data))
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+def _is_pk(value):
+    return (isinstance(value, int) and not isinstance(value, bool)) or (isinstance(value, str) and value.isdigit())
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    List serializer that writes the validated items with batched bulk_create
+    or bulk_update
+    Model.save() is not called, so models with save() side effects do the
+    same work in their queryset's bulk_create (see InvoiceQuerySet and
+    PaymentQuerySet). Many-to-many values are written with one bulk insert
+    into the through table per relation, after clearing the updated objects'
+    rows on updates. For updates, pass the list of instances in the same
+    order as the data. Unique fields are checked for the whole list at once
+    by validate_unique.
+    """
+    batch_size = BULK_BATCH_SIZE
+    # Unique fields a subclass checks itself
+    skip_unique_fields = ()
+    
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.preload_related(data)
+        if self.instance is None:
+            return self.validate_unique(super().to_internal_value(data))
+        # Each item is validated against the instance it updates
+        validated = []
+        errors = []
+        try:
+            for instance, item in zip(self.instance, data):
+                self.child.instance = instance
+                try:
+                    validated.append(self.child.run_validation(item))
+                    errors.append({})
+                except serializers.ValidationError as exc:
+                    errors.append(exc.detail)
+        finally:
+            self.child.instance = None
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return self.validate_unique(validated)
+    
+    def validate_unique(self, validated):
+        """
+        Check the unique and one-to-one values of the list against each other and the stored rows
+        One query per field given in the list; errors come back per item. This
+        runs here rather than in validate(), whose errors ListSerializer folds
+        into non_field_errors.
+        """
+        model = self.child.Meta.model
+        sources = {field.source: name for name, field in self.child.fields.items() if not field.read_only}
+        own = [instance.pk for instance in self.instance] if self.instance is not None else [None] * len(validated)
+        errors = [{} for _ in validated]
+        for field in model._meta.concrete_fields:
+            if not field.unique or field.primary_key or field.name not in sources or field.name in self.skip_unique_fields:
+                continue
+            positions = {}
+            for index, attrs in enumerate(validated):
+                value = getattr(attrs.get(field.name), 'pk', attrs.get(field.name))
+                if value is not None:
+                    positions.setdefault(value, []).append(index)
+            if not positions:
+                continue
+            taken = dict(
+                model._default_manager.filter(**{f'{field.attname}__in': list(positions)}).values_list(field.attname, 'pk')
+            )
+            for value, indexes in positions.items():
+                for count, index in enumerate(indexes):
+                    if value in taken and taken[value] != own[index]:
+                        message = f'{model._meta.verbose_name} with this {field.verbose_name} already exists.'
+                    elif count:
+                        message = f'This {field.verbose_name} appears more than once in the list.'
+                    else:
+                        continue
+                    errors[index][sources[field.name]] = [message]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+    
+    def preload_related(self, data):
+        """Resolve every primary key posted for each related field with one query"""
+        items = [item for item in data if isinstance(item, dict)]
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            many = isinstance(field, serializers.ManyRelatedField)
+            relation = field.child_relation if many else field
+            if not isinstance(relation, PreloadedPrimaryKeyRelatedField):
+                continue
+            values = []
+            for item in items:
+                value = item.get(name)
+                if many and isinstance(value, list):
+                    values.extend(value)
+                elif not many:
+                    values.append(value)
+            relation.preload(values)
+    
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        related = model._meta.many_to_many
+        objs = []
+        many_to_many = []
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            many_to_many.append({field.name: attrs.pop(field.name) for field in related if field.name in attrs})
+            objs.append(model(**attrs))
+        with transaction.atomic():
+            objs = model.objects.bulk_create(objs, batch_size=self.batch_size)
+            for field in related:
+                self.write_many_to_many(field, objs, many_to_many)
+        return objs
+    
+    def write_many_to_many(self, field, objs, many_to_many, replace=False):
+        """
+        Write the related ids given for a many-to-many field with one bulk insert into its through table
+        With replace, the existing rows of the objects that were given the field are cleared first.
+        """
+        given = [(obj, values[field.name]) for obj, values in zip(objs, many_to_many) if field.name in values]
+        if not given:
+            return
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        if replace:
+            through.objects.filter(**{f'{source}__in': [obj.pk for obj, _ in given]}).delete()
+        through.objects.bulk_create([
+            through(**{source: obj.pk, target: value.pk})
+            for obj, related in given for value in related
+        ], batch_size=self.batch_size)
+        # Writes to the through table send no m2m_changed
+        bump_table_versions([through])
+    
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        related = model._meta.many_to_many
+        fields = {name for attrs in validated_data for name in attrs} - {field.name for field in related}
+        many_to_many = []
+        for instance, attrs in zip(instances, validated_data):
+            attrs = dict(attrs)
+            many_to_many.append({field.name: attrs.pop(field.name) for field in related if field.name in attrs})
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+        # bulk_update skips pre_save(), so auto_now fields are stamped here
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for instance in instances:
+                    setattr(instance, field.attname, now)
+                fields.add(field.name)
+        with transaction.atomic(savepoint=False):
+            if fields:
+                model.objects.bulk_update(instances, sorted(fields), batch_size=self.batch_size)
+            for field in related:
+                self.write_many_to_many(field, instances, many_to_many, replace=True)
+        return instances
+
+
+class CustomerListSerializer(BulkListSerializer):
+    """Bulk customer creation with the email check done once for the whole list"""
+    # Emails are compared case-insensitively below
+    skip_unique_fields = ('email',)
+    
+    def to_internal_value(self, data):
+        try:
+            validated = super().to_internal_value(data)
+            errors = [{} for _ in validated]
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            validated = None
+            errors = exc.detail
+        emails = [
+            item['email'].strip().lower() if isinstance(item, dict) and isinstance(item.get('email'), str) else None
+            for item in data
+        ]
+        taken = set(
+            Customer.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in={email for email in emails if email}).values_list('email_lower', flat=True)
+        )
+        seen = set()
+        for index, email in enumerate(emails):
+            if not email or 'email' in errors[index]:
+                continue
+            if email in taken:
+                errors[index] = dict(errors[index], email=['A customer with this email already exists.'])
+            elif email in seen:
+                errors[index] = dict(errors[index], email=['This email appears more than once in the list.'])
+            seen.add(email)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+
+# Order of the nested collections in a customer's detail view
+LATEST_FIRST = ['-created_at', '-id']
+
+
+class LatestListSerializer(serializers.ListSerializer):
+    """
+    Read-only nested list of the latest related objects
+    Only the first `limit` objects in `ordering` are serialized. The query
+    planner prefetches exactly that slice into `prefetch_attr`; without it
+    the slice is queried per object.
+    """
+    
+    def __init__(self, *args, limit=None, ordering=LATEST_FIRST, **kwargs):
+        self._limit = limit
+        self.ordering = list(ordering)
+        super().__init__(*args, **kwargs)
+    
+    @property
+    def limit(self):
+        # Read per request so the setting can change after the field is declared
+        return self._limit if self._limit is not None else settings.CUSTOMER_DETAIL_NESTED_LIMIT
+    
+    @property
+    def prefetch_attr(self):
+        return f'latest_{self.source}'
+    
+    def get_attribute(self, instance):
+        if hasattr(instance, self.prefetch_attr):
+            return getattr(instance, self.prefetch_attr)
+        return super().get_attribute(instance).order_by(*self.ordering)[:self.limit]
+
+
+def parse_field_paths(value):
+    """Parse 'a,b.c,b.d' into {'a': {}, 'b': {'c': {}, 'd': {}}}; None when the parameter is absent"""
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and on-demand expansion for GET requests
+    ?fields=a,b.c keeps only the listed fields (dotted names select fields of
+    a nested object). Once ?fields= or ?expand= is given, nested objects are
+    serialized only when listed in ?expand= or asked for by a dotted field:
+    others collapse to their primary key, and nested lists are dropped.
+    Without either parameter every field is serialized as before.
+    """
+    
+    def get_field_selection(self):
+        """Return (fields, expand) trees for this serializer, or None to serialize every field"""
+        if hasattr(self, '_field_selection'):
+            return self._field_selection
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        request = self.context.get('request')
+        if parent is not None or request is None or request.method not in permissions.SAFE_METHODS:
+            return None
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        return parse_field_paths(params.get('fields')), parse_field_paths(params.get('expand'))
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.get_field_selection()
+        if selection is None:
+            return fields
+        only, expand = selection
+        selected = {}
+        for name, field in fields.items():
+            if field.write_only:
+                selected[name] = field
+                continue
+            if only is not None and name not in only:
+                continue
+            subfields = only.get(name) if only is not None else None
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                selected[name] = field
+            elif expand is None or name in expand or subfields:
+                if isinstance(nested, DynamicFieldsMixin):
+                    nested._field_selection = (subfields or None, None if expand is None else expand.get(name, {}))
+                selected[name] = field
+            elif nested is field and field.source != '*':
+                selected[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+        return selected
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     full_name = serializers.SerializerMethodField()
     
@@ -40,17 +363,23 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Customer model"""
     full_name = serializers.ReadOnlyField()
     
     class Meta:
         model = Customer
-        fields = '__all__'
+        exclude = ['search_document']
+        list_serializer_class = CustomerListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # Uniqueness is checked case-insensitively by validate_email
+        extra_kwargs = {'email': {'validators': []}}
     
     def validate_email(self, value):
         """Ensure email is unique (case-insensitive)"""
+        if isinstance(self.parent, CustomerListSerializer):
+            # Checked for the whole list in one query
+            return value
         if Customer.objects.filter(email__iexact=value).exists():
             if self.instance and self.instance.email.lower() == value.lower():
                 return value
@@ -58,7 +387,7 @@ class CustomerSerializer(serializers.ModelSerializer):
         return value
 
 
-class WorkerSerializer(serializers.ModelSerializer):
+class WorkerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Worker model"""
     user = UserSerializer(read_only=True)
     first_name = serializers.CharField(write_only=True, required=False, allow_blank=True)
@@ -114,10 +443,10 @@ class WorkerSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class EstimateSerializer(serializers.ModelSerializer):
+class EstimateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Estimate model"""
     customer = CustomerSerializer(read_only=True)
-    customer_id = serializers.PrimaryKeyRelatedField(
+    customer_id = PreloadedPrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source='customer',
         write_only=True
@@ -128,7 +457,8 @@ class EstimateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Estimate
-        fields = '__all__'
+        exclude = ['search_document']
+        list_serializer_class = BulkListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at', 'initial_contact_date']
     
     def validate(self, attrs):
@@ -142,10 +472,11 @@ class EstimateSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class MaterialSerializer(serializers.ModelSerializer):
+class MaterialSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Material model"""
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
     supplier = serializers.StringRelatedField(read_only=True)
-    supplier_id = serializers.PrimaryKeyRelatedField(
+    supplier_id = PreloadedPrimaryKeyRelatedField(
         queryset=Supplier.objects.all(),
         source='supplier',
         write_only=True,
@@ -156,27 +487,28 @@ class MaterialSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Material
-        fields = '__all__'
+        exclude = ['search_document']
+        list_serializer_class = BulkListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Job model"""
     customer = CustomerSerializer(read_only=True)
-    customer_id = serializers.PrimaryKeyRelatedField(
+    customer_id = PreloadedPrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source='customer',
         write_only=True
     )
     estimate = EstimateSerializer(read_only=True)
-    estimate_id = serializers.PrimaryKeyRelatedField(
+    estimate_id = PreloadedPrimaryKeyRelatedField(
         queryset=Estimate.objects.all(),
         source='estimate',
         write_only=True
     )
     managed_by = UserSerializer(read_only=True)
     workers = WorkerSerializer(many=True, read_only=True)
-    worker_ids = serializers.PrimaryKeyRelatedField(
+    worker_ids = PreloadedPrimaryKeyRelatedField(
         many=True,
         queryset=Worker.objects.all(),
         source='workers',
@@ -191,7 +523,10 @@ class JobSerializer(serializers.ModelSerializer):
     class Meta:
         model = Job
         fields = '__all__'
+        list_serializer_class = BulkListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # Relations read by properties, for the query planner
+        related_hints = {'total_material_cost': ['materials']}
     
     def validate(self, attrs):
         """Validate job dates"""
@@ -214,19 +549,20 @@ class JobSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Supplier model"""
     
     class Meta:
         model = Supplier
-        fields = '__all__'
+        exclude = ['search_document']
+        list_serializer_class = BulkListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Payment model"""
     invoice = serializers.StringRelatedField(read_only=True)
-    invoice_id = serializers.PrimaryKeyRelatedField(
+    invoice_id = PreloadedPrimaryKeyRelatedField(
         queryset=Invoice.objects.all(),
         source='invoice',
         write_only=True
@@ -237,6 +573,7 @@ class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = '__all__'
+        list_serializer_class = BulkListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def validate_amount(self, value):
@@ -246,16 +583,32 @@ class PaymentSerializer(serializers.ModelSerializer):
         return value
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class PaymentBulkSerializer(serializers.ModelSerializer):
+    """Serializer for one row of a bulk payment posting"""
+    # Invoice ids are checked for the whole batch in one query by the view
+    invoice_id = serializers.IntegerField(min_value=1)
+    
+    class Meta:
+        model = Payment
+        fields = ['invoice_id', 'amount', 'payment_method', 'payment_date', 'transaction_reference', 'notes']
+    
+    def validate_amount(self, value):
+        """Ensure payment amount is valid"""
+        if value <= 0:
+            raise serializers.ValidationError("Payment amount must be greater than zero.")
+        return value
+
+
+class InvoiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Invoice model"""
     customer = CustomerSerializer(read_only=True)
-    customer_id = serializers.PrimaryKeyRelatedField(
+    customer_id = PreloadedPrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source='customer',
         write_only=True
     )
     job = JobSerializer(read_only=True)
-    job_id = serializers.PrimaryKeyRelatedField(
+    job_id = PreloadedPrimaryKeyRelatedField(
         queryset=Job.objects.all(),
         source='job',
         write_only=True
@@ -272,8 +625,11 @@ class InvoiceSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Invoice
-        fields = '__all__'
+        exclude = ['search_document']
+        list_serializer_class = BulkListSerializer
         read_only_fields = ['id', 'created_at', 'updated_at', 'invoice_date', 'amount_paid']
+        # Filled in by Invoice.save() and InvoiceQuerySet.bulk_create() when omitted
+        extra_kwargs = {'invoice_number': {'required': False}, 'due_date': {'required': False}}
     
     def validate(self, attrs):
         """Validate invoice data"""
@@ -296,10 +652,94 @@ class InvoiceDetailSerializer(InvoiceSerializer):
 
 
 class CustomerDetailSerializer(CustomerSerializer):
-    """Detailed serializer for Customer with related estimates and jobs"""
-    estimates = EstimateSerializer(many=True, read_only=True)
-    jobs = JobSerializer(many=True, read_only=True)
-    invoices = InvoiceSerializer(many=True, read_only=True)
+    """Detailed serializer for Customer with the latest estimates, jobs and invoices"""
+    estimates = LatestListSerializer(child=EstimateSerializer(), read_only=True)
+    estimates_count = serializers.SerializerMethodField()
+    estimates_next = serializers.SerializerMethodField()
+    jobs = LatestListSerializer(child=JobSerializer(), read_only=True)
+    jobs_count = serializers.SerializerMethodField()
+    jobs_next = serializers.SerializerMethodField()
+    invoices = LatestListSerializer(child=InvoiceSerializer(), read_only=True)
+    invoices_count = serializers.SerializerMethodField()
+    invoices_next = serializers.SerializerMethodField()
+    
+    def collection_count(self, obj, name):
+        """Count a related collection in the database; the prefetched one is only its first slice"""
+        counts = obj.__dict__.setdefault('_collection_counts', {})
+        if name not in counts:
+            counts[name] = getattr(Customer, name).field.model.objects.filter(customer=obj).count()
+        return counts[name]
+    
+    def collection_next(self, obj, name):
+        """Link to the page of the customer's collection after the embedded items"""
+        if self.collection_count(obj, name) <= settings.CUSTOMER_DETAIL_NESTED_LIMIT:
+            return None
+        url = reverse(f'customer-{name}', args=[obj.pk], request=self.context.get('request'))
+        return replace_query_param(url, 'page', 2)
+    
+    def get_estimates_count(self, obj):
+        return self.collection_count(obj, 'estimates')
+    
+    def get_estimates_next(self, obj):
+        return self.collection_next(obj, 'estimates')
+    
+    def get_jobs_count(self, obj):
+        return self.collection_count(obj, 'jobs')
+    
+    def get_jobs_next(self, obj):
+        return self.collection_next(obj, 'jobs')
+    
+    def get_invoices_count(self, obj):
+        return self.collection_count(obj, 'invoices')
+    
+    def get_invoices_next(self, obj):
+        return self.collection_next(obj, 'invoices')
+
+
+class ExportFiltersSerializer(serializers.Serializer):
+    """Filters accepted by an export job"""
+    to = serializers.DateField(required=False)
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        # 'from' is a keyword, so the field cannot be declared as an attribute
+        fields['from'] = serializers.DateField(required=False)
+        return fields
+    
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            unknown = set(data) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError(f"Unsupported filters: {', '.join(sorted(unknown))}.")
+        return super().to_internal_value(data)
+    
+    def validate(self, attrs):
+        if attrs.get('from') and attrs.get('to') and attrs['from'] > attrs['to']:
+            raise serializers.ValidationError("'from' must be on or before 'to'.")
+        return {name: value.isoformat() for name, value in attrs.items()}
+
+
+class ExportJobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer for ExportJob model"""
+    format = serializers.ChoiceField(source='export_format', choices=ExportJob.FORMAT_CHOICES)
+    filters = ExportFiltersSerializer(required=False)
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExportJob
+        fields = ['id', 'format', 'filters', 'status', 'error', 'created_at', 'completed_at', 'download_url']
+        read_only_fields = ['id', 'status', 'error', 'created_at', 'completed_at']
+    
+    def validate(self, attrs):
+        # Only the Excel ledger sheets are dated; the PDF report has nothing to limit
+        if attrs['export_format'] != 'excel' and attrs.get('filters'):
+            raise serializers.ValidationError({'filters': 'Date filters are only supported for Excel exports.'})
+        return attrs
+    
+    def get_download_url(self, obj):
+        if obj.status != 'COMPLETED':
+            return None
+        return reverse('export-job-download', args=[obj.pk], request=self.context.get('request'))
 
 
 class MaterialCostSerializer(serializers.Serializer):
@@ -308,3 +748,16 @@ class MaterialCostSerializer(serializers.Serializer):
     supplier = serializers.CharField(allow_null=True)
     total_cost = serializers.DecimalField(max_digits=18, decimal_places=2)
 
+
+
+class WorkerProductivitySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.SerializerMethodField()
+    worker_type = serializers.CharField()
+    hourly_rate = serializers.DecimalField(max_digits=10, decimal_places=2)
+    completed_jobs = serializers.IntegerField()
+    scheduled_jobs = serializers.IntegerField()
+    earnings = serializers.DecimalField(max_digits=18, decimal_places=2)
+
+    def get_name(self, obj):
+        return obj.user.get_full_name() or obj.user.username
@@ -5,7 +5,7 @@ const endpoints = {
   materials: "/api/materials/top-by-cost/",
 };
 const refreshInterval = 300000;
-const CACHE_KEY = "bidii_dashboard_cache_v1";
+const CACHE_KEY = "bidii_dashboard_cache_v2";
 let refreshTimer;
 let toastTimer;
 let isRefreshing = false;
@@ -14,6 +14,10 @@ const CHARTS_TIMEOUT = 10000;
 const MATERIALS_TIMEOUT = 6000;
 const MATERIALS_LIMIT = 6;
 const REFRESH_DEBOUNCE = 800;
+const CHART_COLORS = ["#e53935", "#43a047", "#8e24aa", "#1e88e5", "#fb8c00"];
+const CHART_TEXT_COLOR = "#c8e6c9";
+const CHART_GRID_COLOR = "rgba(200, 230, 201, 0.15)";
+const CHART_HEIGHT = 300;
 
 function nowIso() {
   return new Date().toISOString();
@@ -134,6 +138,221 @@ function updateActivity(items) {
   });
 }
 
+function paletteColor(index) {
+  return CHART_COLORS[index % CHART_COLORS.length];
+}
+
+function shortLabel(label, max = 14) {
+  const text = String(label ?? "");
+  return text.length > max ? `${text.slice(0, max - 1)}…` : text;
+}
+
+function niceMax(value) {
+  if (!value || value <= 0) return 1;
+  const magnitude = Math.pow(10, Math.floor(Math.log10(value)));
+  const steps = [1, 2, 2.5, 5, 10];
+  for (const step of steps) {
+    if (value <= step * magnitude) return step * magnitude;
+  }
+  return 10 * magnitude;
+}
+
+function prepareCanvas(card) {
+  let canvas = card.querySelector("canvas.chart-canvas");
+  if (!canvas) {
+    canvas = document.createElement("canvas");
+    canvas.className = "chart-canvas";
+    const anchor = card.querySelector("img") || card.querySelector(".chart-title");
+    card.insertBefore(canvas, anchor ? anchor.nextSibling : null);
+  }
+  const ratio = window.devicePixelRatio || 1;
+  const width = Math.max(canvas.clientWidth || card.clientWidth - 40, 240);
+  canvas.width = Math.round(width * ratio);
+  canvas.height = Math.round(CHART_HEIGHT * ratio);
+  canvas.style.height = `${CHART_HEIGHT}px`;
+  const ctx = canvas.getContext("2d");
+  ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+  ctx.clearRect(0, 0, width, CHART_HEIGHT);
+  ctx.font = "12px sans-serif";
+  return { canvas, ctx, width, height: CHART_HEIGHT };
+}
+
+function drawValueAxis(ctx, area, maxValue, horizontal) {
+  ctx.strokeStyle = CHART_GRID_COLOR;
+  ctx.fillStyle = CHART_TEXT_COLOR;
+  ctx.lineWidth = 1;
+  for (let tick = 0; tick <= 4; tick += 1) {
+    const value = (maxValue / 4) * tick;
+    const text = formatNumber(value);
+    ctx.beginPath();
+    if (horizontal) {
+      const x = area.left + (area.width / 4) * tick;
+      ctx.moveTo(x, area.top);
+      ctx.lineTo(x, area.top + area.height);
+      ctx.textAlign = "center";
+      ctx.fillText(text, x, area.top + area.height + 14);
+    } else {
+      const y = area.top + area.height - (area.height / 4) * tick;
+      ctx.moveTo(area.left, y);
+      ctx.lineTo(area.left + area.width, y);
+      ctx.textAlign = "right";
+      ctx.fillText(text, area.left - 6, y + 4);
+    }
+    ctx.stroke();
+  }
+}
+
+function drawCategoryLabels(ctx, area, labels) {
+  const slot = area.width / Math.max(labels.length, 1);
+  ctx.fillStyle = CHART_TEXT_COLOR;
+  ctx.textAlign = "right";
+  labels.forEach((label, index) => {
+    const x = area.left + slot * index + slot / 2;
+    ctx.save();
+    ctx.translate(x, area.top + area.height + 10);
+    ctx.rotate(-Math.PI / 5);
+    ctx.fillText(shortLabel(label), 0, 0);
+    ctx.restore();
+  });
+}
+
+function drawLegend(ctx, width, series) {
+  let x = width - 12;
+  ctx.textAlign = "right";
+  series
+    .slice()
+    .reverse()
+    .forEach((item, index) => {
+      const color = item.color || paletteColor(series.length - 1 - index);
+      ctx.fillStyle = CHART_TEXT_COLOR;
+      ctx.fillText(item.name, x, 14);
+      x -= ctx.measureText(item.name).width + 6;
+      ctx.fillStyle = color;
+      ctx.fillRect(x - 10, 5, 10, 10);
+      x -= 22;
+    });
+}
+
+function drawPie(ctx, width, height, chart) {
+  const values = chart.series[0].values.map(Number);
+  const total = values.reduce((sum, value) => sum + value, 0) || 1;
+  const radius = Math.min(width * 0.3, height / 2 - 20);
+  const cx = radius + 20;
+  const cy = height / 2;
+  let angle = -Math.PI / 2;
+  values.forEach((value, index) => {
+    const slice = (value / total) * Math.PI * 2;
+    ctx.beginPath();
+    ctx.moveTo(cx, cy);
+    ctx.arc(cx, cy, radius, angle, angle + slice);
+    ctx.closePath();
+    ctx.fillStyle = paletteColor(index);
+    ctx.fill();
+    angle += slice;
+  });
+  ctx.textAlign = "left";
+  chart.labels.forEach((label, index) => {
+    const y = 30 + index * 20;
+    ctx.fillStyle = paletteColor(index);
+    ctx.fillRect(cx + radius + 24, y - 10, 12, 12);
+    ctx.fillStyle = CHART_TEXT_COLOR;
+    const pct = ((values[index] / total) * 100).toFixed(1);
+    ctx.fillText(`${shortLabel(label, 20)} (${pct}%)`, cx + radius + 42, y);
+  });
+}
+
+function drawBars(ctx, width, height, chart, horizontal) {
+  const values = chart.series[0].values.map(Number);
+  const color = chart.series[0].color;
+  const maxValue = niceMax(Math.max(...values, 0));
+  if (horizontal) {
+    const area = { left: 120, top: 16, width: width - 140, height: height - 44 };
+    drawValueAxis(ctx, area, maxValue, true);
+    const slot = area.height / Math.max(values.length, 1);
+    values.forEach((value, index) => {
+      const y = area.top + slot * index;
+      ctx.fillStyle = color || paletteColor(index);
+      ctx.fillRect(area.left, y + slot * 0.15, (value / maxValue) * area.width, slot * 0.7);
+      ctx.fillStyle = CHART_TEXT_COLOR;
+      ctx.textAlign = "right";
+      ctx.fillText(shortLabel(chart.labels[index], 16), area.left - 6, y + slot / 2 + 4);
+    });
+    return;
+  }
+  const area = { left: 56, top: 16, width: width - 72, height: height - 90 };
+  drawValueAxis(ctx, area, maxValue, false);
+  const slot = area.width / Math.max(values.length, 1);
+  values.forEach((value, index) => {
+    const barHeight = (value / maxValue) * area.height;
+    ctx.fillStyle = color || paletteColor(index);
+    ctx.fillRect(area.left + slot * index + slot * 0.2, area.top + area.height - barHeight, slot * 0.6, barHeight);
+  });
+  drawCategoryLabels(ctx, area, chart.labels);
+}
+
+function drawLine(ctx, area, values, maxValue, color) {
+  const slot = area.width / Math.max(values.length, 1);
+  ctx.strokeStyle = color;
+  ctx.fillStyle = color;
+  ctx.lineWidth = 3;
+  ctx.beginPath();
+  values.forEach((value, index) => {
+    const x = area.left + slot * index + slot / 2;
+    const y = area.top + area.height - (Number(value) / maxValue) * area.height;
+    if (index === 0) ctx.moveTo(x, y);
+    else ctx.lineTo(x, y);
+  });
+  ctx.stroke();
+  values.forEach((value, index) => {
+    const x = area.left + slot * index + slot / 2;
+    const y = area.top + area.height - (Number(value) / maxValue) * area.height;
+    ctx.beginPath();
+    ctx.arc(x, y, 4, 0, Math.PI * 2);
+    ctx.fill();
+  });
+}
+
+function drawLineChart(ctx, width, height, chart) {
+  const values = chart.series[0].values.map(Number);
+  const maxValue = niceMax(Math.max(...values, 0));
+  const area = { left: 56, top: 16, width: width - 72, height: height - 90 };
+  drawValueAxis(ctx, area, maxValue, false);
+  drawLine(ctx, area, values, maxValue, chart.series[0].color || paletteColor(3));
+  drawCategoryLabels(ctx, area, chart.labels);
+}
+
+function drawCombo(ctx, width, height, chart) {
+  // Grouped bars for every series but the last, which is a line on its own scale
+  const bars = chart.series.slice(0, -1);
+  const line = chart.series[chart.series.length - 1];
+  const barMax = niceMax(Math.max(...bars.flatMap((item) => item.values.map(Number)), 0));
+  const lineMax = niceMax(Math.max(...line.values.map(Number), 0));
+  const area = { left: 56, top: 28, width: width - 72, height: height - 102 };
+  drawValueAxis(ctx, area, barMax, false);
+  const slot = area.width / Math.max(chart.labels.length, 1);
+  const barWidth = (slot * 0.6) / Math.max(bars.length, 1);
+  bars.forEach((item, seriesIndex) => {
+    ctx.fillStyle = item.color || paletteColor(seriesIndex);
+    item.values.forEach((value, index) => {
+      const barHeight = (Number(value) / barMax) * area.height;
+      const x = area.left + slot * index + slot * 0.2 + barWidth * seriesIndex;
+      ctx.fillRect(x, area.top + area.height - barHeight, barWidth, barHeight);
+    });
+  });
+  drawLine(ctx, area, line.values, lineMax, line.color || paletteColor(bars.length));
+  drawCategoryLabels(ctx, area, chart.labels);
+  drawLegend(ctx, width, chart.series);
+}
+
+function drawChart(card, chart) {
+  const { ctx, width, height } = prepareCanvas(card);
+  if (chart.type === "pie") drawPie(ctx, width, height, chart);
+  else if (chart.type === "bar") drawBars(ctx, width, height, chart, false);
+  else if (chart.type === "barh") drawBars(ctx, width, height, chart, true);
+  else if (chart.type === "line") drawLineChart(ctx, width, height, chart);
+  else if (chart.type === "combo") drawCombo(ctx, width, height, chart);
+}
+
 function renderCharts(charts) {
   if (!charts) return;
   batchUpdate(() => {
@@ -155,6 +374,7 @@ function renderCharts(charts) {
       if (title && chart.title) title.textContent = chart.title;
 
       const img = card.querySelector("img");
+      const canvas = card.querySelector("canvas.chart-canvas");
       let fallback = card.querySelector(".chart-fallback");
       if (!fallback) {
         fallback = document.createElement("div");
@@ -162,8 +382,15 @@ function renderCharts(charts) {
         card.appendChild(fallback);
       }
 
-      if (chart.image) {
+      card.chartData = chart;
+      if (chart.series && chart.labels && chart.labels.length) {
         fallback.style.display = "none";
+        if (img) img.style.display = "none";
+        drawChart(card, chart);
+        card.querySelector("canvas.chart-canvas").style.display = "";
+      } else if (chart.image) {
+        fallback.style.display = "none";
+        if (canvas) canvas.style.display = "none";
         if (img) {
           img.style.display = "";
           img.src = `data:image/png;base64,${chart.image}`;
@@ -174,6 +401,7 @@ function renderCharts(charts) {
           img.removeAttribute("src");
           img.style.display = "none";
         }
+        if (canvas) canvas.style.display = "none";
         fallback.style.display = "flex";
         fallback.textContent = chart.empty_text || "No chart data available";
       }
@@ -181,6 +409,15 @@ function renderCharts(charts) {
   });
 }
 
+function redrawVisibleCharts() {
+  document.querySelectorAll(".tab-panel.active [data-chart]").forEach((card) => {
+    const chart = card.chartData;
+    if (chart && chart.series && chart.labels && chart.labels.length) {
+      drawChart(card, chart);
+    }
+  });
+}
+
 function extractMaterials(payload) {
   if (!payload) return [];
   if (Array.isArray(payload)) return payload;
@@ -330,7 +567,7 @@ async function loadChartsDeferred() {
     renderCharts(cached.charts);
   }
   const run = () =>
-    fetchWithTimeout(endpoints.charts, {}, CHARTS_TIMEOUT)
+    fetchWithTimeout(`${endpoints.charts}?mode=data`, {}, CHARTS_TIMEOUT)
       .then((resp) => {
         if (!resp.ok) throw new Error("Failed to load charts");
         return resp.json();
@@ -395,6 +632,8 @@ function bindTabs() {
         .forEach((panel) =>
           panel.classList.toggle("active", panel.dataset.panel === target)
         );
+      // Canvases in hidden panels were sized while collapsed
+      batchUpdate(redrawVisibleCharts);
     });
   });
 }
@@ -403,7 +642,7 @@ function bindExports() {
   document.querySelectorAll("[data-format]").forEach((button) => {
     button.addEventListener("click", () => {
       const format = button.dataset.format;
-      const url = `${endpoints.export}?format=${format}`;
+      const url = `${endpoints.export}?type=${format}`;
       window.open(url, "_blank");
     });
   });
@@ -427,6 +666,11 @@ function scheduleAutoRefresh() {
 
 bindTabs();
 bindExports();
+let resizeTimer;
+window.addEventListener("resize", () => {
+  clearTimeout(resizeTimer);
+  resizeTimer = setTimeout(redrawVisibleCharts, 200);
+});
 const initialCache = loadCache();
 if (initialCache && initialCache.stats) {
   try {
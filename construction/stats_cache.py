@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .analytics import DASHBOARD_SOURCES, get_dashboard_stats
+from .table_versions import table_versions
+
+CACHE_PREFIX = 'dashboard-stats'
+# Seconds a recompute holds the lock before another request may take over
+LOCK_TIMEOUT = 30
+# Seconds a request waits for another request's recompute, and its polling interval
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+
+def stats_versions():
+    """The table versions the stats are cached and validated on"""
+    return table_versions(DASHBOARD_SOURCES)
+
+
+class StatsCache:
+    """
+    Shared cache for the dashboard stats payload
+    Entries are keyed on the table versions of DASHBOARD_SOURCES, which every
+    save, delete and bulk write bumps (again on commit, so a recompute that
+    read the rows before a commit is not served after it). Concurrent misses
+    take a lock in the cache and only the holder recomputes while the others
+    wait for its result.
+    """
+
+    def __init__(self, alias='default', compute=get_dashboard_stats):
+        self.alias = alias
+        self.compute = compute
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _entry_key(self, versions):
+        digest = hashlib.sha1('|'.join(str(versions[model]) for model in DASHBOARD_SOURCES).encode('utf-8')).hexdigest()
+        # Several stats are relative to today
+        return f'{CACHE_PREFIX}:{digest}:{timezone.now().date().isoformat()}'
+
+    def get(self, versions=None):
+        """Return the cached stats, recomputing them (once across concurrent misses) if needed"""
+        key = self._entry_key(stats_versions() if versions is None else versions)
+        stats = self.cache.get(key)
+        if stats is not None:
+            return stats
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while not self.cache.add(lock_key, True, LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return self.compute()
+            time.sleep(WAIT_INTERVAL)
+            stats = self.cache.get(key)
+            if stats is not None:
+                return stats
+        try:
+            stats = self.compute()
+            self.cache.set(key, stats, settings.DASHBOARD_STATS_CACHE_TIMEOUT)
+        finally:
+            self.cache.delete(lock_key)
+        return stats
+
+
+stats_cache = StatsCache()
@@ -0,0 +1,102 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+STREAM_FORMATS = ['ndjson', 'csv']
+
+
+class _Echo:
+    """File-like object whose write() hands the row back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([row.get(column) for column in columns])
+
+
+def stream_rows(rows, stream_format, columns, filename):
+    """
+    Stream an iterable of dicts as NDJSON or CSV without materialising it
+    Rows are encoded one at a time, so memory stays flat however many
+    rows the iterable yields.
+    """
+    if stream_format == 'csv':
+        response = StreamingHttpResponse(csv_lines(rows, columns), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    else:
+        response = StreamingHttpResponse(ndjson_lines(rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    return response
+
+
+RANGE_BLOCK_SIZE = 64 * 1024
+
+
+def _parse_range(header, size):
+    """Return (start, end) for a single 'bytes=' range, None to ignore it, or False if unsatisfiable"""
+    units, _, spec = header.partition('=')
+    if units.strip() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _read_range(handle, start, length):
+    try:
+        handle.seek(start)
+        while length > 0:
+            block = handle.read(min(RANGE_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        handle.close()
+
+
+def ranged_file_response(request, field_file, content_type, filename):
+    """
+    Serve a stored file honouring a single HTTP Range request
+    Multi-range requests and malformed headers get the whole file.
+    """
+    size = field_file.size
+    byte_range = _parse_range(request.META.get('HTTP_RANGE', ''), size) if request.META.get('HTTP_RANGE') else None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    handle = field_file.open('rb')
+    if byte_range is None:
+        response = FileResponse(handle, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(handle, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,49 @@
+"""
+Per-table versions for cheap validators
+A table's version is the time of its last write in nanoseconds, kept in the
+default cache. post_save, post_delete and m2m_changed bump it (see apps.py),
+as do the bulk writes of VersionedQuerySet, which send no signals. Reading
+the versions of a response's tables is one cache lookup whatever their size,
+and as a timestamp the latest version doubles as Last-Modified.
+"""
+import time
+
+from django.core.cache import caches
+from django.db import connections, transaction
+
+CACHE_PREFIX = 'table-version'
+
+
+def _key(model):
+    return f'{CACHE_PREFIX}:{model._meta.label_lower}'
+
+
+def table_versions(models, alias='default'):
+    """Return {model: version} for the given models"""
+    cache = caches[alias]
+    keys = {_key(model): model for model in models}
+    versions = cache.get_many(list(keys))
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # An evicted version restarts at now, so validators issued before the eviction never match
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return {model: versions[key] for key, model in keys.items()}
+
+
+def _bump(models, alias):
+    caches[alias].set_many({_key(model): time.time_ns() for model in models}, timeout=None)
+
+
+def bump_table_versions(models, using='default', alias='default'):
+    """Record a write to the given models' tables"""
+    _bump(models, alias)
+    if connections[using].in_atomic_block:
+        # A response built before the commit would otherwise carry the new version with the old rows
+        transaction.on_commit(lambda: _bump(models, alias), using=using)
+
+
+def bump_table_version(sender, using='default', **kwargs):
+    """post_save/post_delete/m2m_changed receiver"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        bump_table_versions([sender], using)
@@ -0,0 +1,280 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Customer, Estimate, Job, Material, Invoice, Payment, Supplier, Worker
+from construction.serializers import JobSerializer
+from construction.tests.test_invoice_numbers import create_jobs
+from construction.tests.test_payments import create_invoices
+
+
+def customer_payload(index):
+    return {
+        'first_name': 'Bulk',
+        'last_name': str(index),
+        'email': f'bulk{index}@example.com',
+        'phone': '+254700000000',
+        'address': 'Street',
+        'city': 'Nairobi',
+        'postal_code': '00100'
+    }
+
+
+def material_payload(job, supplier, index):
+    return {
+        'job': job.pk,
+        'supplier_id': supplier.pk,
+        'name': f'Material {index}',
+        'quantity': '2.00',
+        'unit': 'bags',
+        'unit_cost': '150.00'
+    }
+
+
+class BulkCreateAPITest(APITestCase):
+    """Test cases for posting lists to the create endpoints"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulkuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_customers(self):
+        """Test a list of customers is created in one request"""
+        payload = [customer_payload(index) for index in range(5)]
+        response = self.client.post('/api/customers/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(
+            list(Customer.objects.filter(pk__in=response.data['ids']).order_by('pk').values_list('email', flat=True)),
+            [item['email'] for item in payload]
+        )
+
+    def test_errors_are_reported_per_item(self):
+        """Test invalid items get their own errors and nothing is written"""
+        Customer.objects.create(**customer_payload(0))
+        payload = [customer_payload(index) for index in range(1, 4)]
+        payload.append(dict(customer_payload(1), email='BULK1@example.com'))
+        payload.append(dict(customer_payload(9), email='BULK0@example.com'))
+        payload[1]['email'] = 'not-an-email'
+        response = self.client.post('/api/customers/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual([bool(item) for item in response.data], [False, True, False, True, True])
+        self.assertIn('email', response.data[1])
+        self.assertEqual(response.data[3]['email'], ['This email appears more than once in the list.'])
+        self.assertEqual(response.data[4]['email'], ['A customer with this email already exists.'])
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_empty_list_is_rejected(self):
+        """Test an empty list is rejected"""
+        response = self.client.post('/api/suppliers/', [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_the_list(self):
+        """Test validation and insertion cost the same number of queries for 3 or 60 items"""
+        job = create_jobs(1)[0]
+        supplier = Supplier.objects.create(name='Supplies Ltd', contact_person='Ann', email='s@example.com', phone='1', address='x')
+        counts = []
+        for size in (3, 60):
+            payload = [material_payload(job, supplier, index) for index in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/materials/', payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Material.objects.filter(supplier=supplier).count(), 63)
+        response = self.client.post('/api/materials/', [dict(material_payload(job, supplier, 0), job=9999)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('job', response.data[0])
+
+    def test_bulk_create_jobs_with_workers(self):
+        """Test many-to-many workers are written for bulk-created jobs"""
+        customer = Customer.objects.create(**customer_payload(0))
+        estimates = [Estimate.objects.create(customer=customer, work_description='Work') for _ in range(3)]
+        worker_user = User.objects.create_user(username='mason', password='testpass123')
+        worker = Worker.objects.create(user=worker_user, worker_type='BRICKLAYER', phone='1', hourly_rate=10, experience_years=2)
+        payload = [{
+            'customer_id': customer.pk,
+            'estimate_id': estimate.pk,
+            'job_title': f'Job {estimate.pk}',
+            'description': 'Job',
+            'scheduled_start_date': date.today().isoformat(),
+            'scheduled_end_date': (date.today() + timedelta(days=2)).isoformat(),
+            'worker_ids': [worker.pk] if index % 2 == 0 else []
+        } for index, estimate in enumerate(estimates)]
+        response = self.client.post('/api/jobs/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Job.objects.filter(managed_by=self.user).count(), 3)
+        self.assertEqual(worker.jobs.count(), 2)
+        response = self.client.post('/api/jobs/', payload[:1], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_invoices_and_payments(self):
+        """Test bulk invoices are numbered and bulk payments are posted onto them"""
+        jobs = create_jobs(2)
+        payload = [
+            {'customer_id': job.customer_id, 'job_id': job.pk, 'labor_cost': '1000.00', 'tax_rate': '16.00'}
+            for job in jobs
+        ]
+        response = self.client.post('/api/invoices/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        invoices = list(Invoice.objects.filter(pk__in=response.data['ids']).order_by('pk'))
+        self.assertEqual([invoice.invoice_number for invoice in invoices], ['INV-00001', 'INV-00002'])
+        self.assertEqual(invoices[0].total_amount, Decimal('1160.00'))
+        payments = [
+            {'invoice_id': invoice.pk, 'amount': '580.00', 'payment_method': 'CASH'}
+            for invoice in invoices for _ in range(2)
+        ]
+        response = self.client.post('/api/payments/', payments[:3], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Payment.objects.filter(received_by=self.user).count(), 3)
+        invoices[0].refresh_from_db()
+        invoices[1].refresh_from_db()
+        self.assertEqual(invoices[0].status, 'PAID')
+        self.assertEqual(invoices[1].balance_due, Decimal('580.00'))
+
+    def test_duplicate_unique_values_are_reported_per_item(self):
+        """Test duplicate one-to-one values within the list and against stored rows get item errors"""
+        customer = Customer.objects.create(**customer_payload(0))
+        estimates = [Estimate.objects.create(customer=customer, work_description='Work') for _ in range(2)]
+        payload = [{
+            'customer_id': customer.pk,
+            'estimate_id': estimate.pk,
+            'job_title': 'Job',
+            'description': 'Job',
+            'scheduled_start_date': date.today().isoformat(),
+            'scheduled_end_date': date.today().isoformat()
+        } for estimate in [estimates[0], estimates[1], estimates[1]]]
+        response = self.client.post('/api/jobs/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [{}, {}, {'estimate_id': ['This estimate appears more than once in the list.']}])
+        self.assertEqual(Job.objects.count(), 0)
+        jobs = create_jobs(2)
+        Invoice.objects.create(customer=jobs[0].customer, job=jobs[0], labor_cost=100)
+        payload = [
+            {'customer_id': job.customer_id, 'job_id': job.pk, 'labor_cost': '100.00'}
+            for job in [jobs[0], jobs[1], jobs[1]]
+        ]
+        response = self.client.post('/api/invoices/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {'job_id': ['Invoice with this job already exists.']})
+        self.assertEqual(response.data[1], {})
+        self.assertEqual(response.data[2], {'job_id': ['This job appears more than once in the list.']})
+        self.assertEqual(Invoice.objects.count(), 1)
+
+    def test_single_object_create_is_unchanged(self):
+        """Test posting one object still returns the serialized object"""
+        invoice = create_invoices(1)[0]
+        response = self.client.post(
+            '/api/payments/', {'invoice_id': invoice.pk, 'amount': '100.00', 'payment_method': 'CASH', 'payment_date': date.today().isoformat()}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['amount'], '100.00')
+
+
+class BulkListSerializerUpdateTest(TestCase):
+    """Test cases for bulk updates through BulkListSerializer"""
+
+    def test_many_to_many_fields_are_replaced(self):
+        """Test each updated object's many-to-many rows are replaced and others are left alone"""
+        jobs = create_jobs(3)
+        workers = [
+            Worker.objects.create(user=User.objects.create_user(username=f'worker{index}', password='testpass123'),
+                                  worker_type='BRICKLAYER', phone='1', hourly_rate=10, experience_years=2)
+            for index in range(2)
+        ]
+        for job in jobs:
+            job.workers.set([workers[0]])
+        serializer = JobSerializer(jobs[:2], data=[
+            {'worker_ids': [workers[1].pk]},
+            {'job_title': 'Renamed'},
+        ], many=True, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(list(jobs[0].workers.all()), [workers[1]])
+        self.assertEqual(list(jobs[1].workers.all()), [workers[0]])
+        self.assertEqual(list(jobs[2].workers.all()), [workers[0]])
+        self.assertEqual(Job.objects.get(pk=jobs[1].pk).job_title, 'Renamed')
+
+
+class MaterialBulkUpdateAPITest(APITestCase):
+    """Test cases for bulk edits through the top materials endpoint"""
+
+    url = '/api/materials/top-by-cost/'
+
+    def setUp(self):
+        job = create_jobs(1)[0]
+        self.supplier = Supplier.objects.create(name='Supplies Ltd', contact_person='Ann', email='s@example.com', phone='1', address='x')
+        self.materials = [
+            Material.objects.create(
+                job=job, supplier=self.supplier, name=f'Material {index}', quantity=2, unit='bags', unit_cost=150
+            )
+            for index in range(3)
+        ]
+
+    def test_patch_updates_every_record(self):
+        """Test a list of partial edits is validated together and written in bulk"""
+        payload = [{'id': material.pk, 'unit_cost': f'{100 + index}.00'} for index, material in enumerate(self.materials)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['results'][2]['unit_cost'], '102.00')
+        self.assertEqual(
+            [material.unit_cost for material in Material.objects.order_by('pk')],
+            [Decimal('100.00'), Decimal('101.00'), Decimal('102.00')]
+        )
+        # Savepoint, locked fetch, one UPDATE, the dashboard counters' re-read and
+        # UPDATE (after update()'s locked read) and release; nothing per record
+        self.assertEqual(len(queries), 7)
+
+    def test_invalid_record_rolls_back_the_batch(self):
+        """Test one invalid record leaves every material unchanged"""
+        payload = [
+            {'id': self.materials[0].pk, 'unit_cost': '1.00'},
+            {'id': self.materials[1].pk, 'unit_cost': '-5.00'},
+        ]
+        response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('unit_cost', response.data[1])
+        self.assertEqual(Material.objects.get(pk=self.materials[0].pk).unit_cost, Decimal('150.00'))
+        response = self.client.patch(self.url, [{'id': self.materials[0].pk}, {'id': 9999}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.put(self.url, {'id': self.materials[0].pk, 'name': 'Cement'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data[0])
+
+    def test_if_unmodified_since(self):
+        """Test records carrying a stale If-Unmodified-Since time are refused with 412"""
+        first, second = self.materials[:2]
+        Material.objects.filter(pk=second.pk).update(updated_at=second.updated_at + timedelta(minutes=5))
+        payload = [
+            {'id': first.pk, 'notes': 'ok', 'if_unmodified_since': first.updated_at.isoformat()},
+            {'id': second.pk, 'notes': 'stale', 'if_unmodified_since': second.updated_at.isoformat()},
+        ]
+        response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('if_unmodified_since', response.data[1])
+        self.assertFalse(Material.objects.filter(notes='ok').exists())
+        response = self.client.patch(
+            self.url, {'id': first.pk, 'notes': 'ok'}, format='json',
+            HTTP_IF_UNMODIFIED_SINCE=http_date(first.updated_at.timestamp() + 1)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updated = Material.objects.get(pk=first.pk)
+        self.assertEqual(updated.notes, 'ok')
+        self.assertGreater(updated.updated_at, first.updated_at)
+        response = self.client.patch(
+            self.url, {'id': first.pk, 'notes': 'again'}, format='json',
+            HTTP_IF_UNMODIFIED_SINCE=http_date(first.updated_at.timestamp() - 60)
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
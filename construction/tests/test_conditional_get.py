@@ -0,0 +1,118 @@
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date, parse_http_date
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Customer, Invoice, Job, Payment
+from construction.tests.test_query_planner import create_invoice_graph
+
+
+class ConditionalGetTest(APITestCase):
+    """Test cases for ETag and Last-Modified validators on the API"""
+
+    def setUp(self):
+        self.invoices = create_invoice_graph(3, 0)
+
+    def revalidate(self, url, response, expected):
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, expected)
+        return again, queries
+
+    def test_unchanged_list_is_not_modified(self):
+        """Test a list poll with a matching If-None-Match gets an empty 304 without querying the database"""
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+        again, queries = self.revalidate('/api/invoices/', response, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(again['ETag'], response['ETag'])
+        self.assertEqual(len(queries), 0)
+
+    def test_query_string_is_part_of_the_etag(self):
+        """Test another page, filter or field selection is validated separately"""
+        response = self.client.get('/api/invoices/')
+        for url in ['/api/invoices/?page_size=1', '/api/invoices/?status=DRAFT', '/api/invoices/?fields=id']:
+            with self.subTest(url=url):
+                self.revalidate(url, response, status.HTTP_200_OK)
+
+    def test_changes_invalidate_the_list(self):
+        """Test row edits, related edits, new rows, deletions and bulk writes change the ETag"""
+        url = '/api/invoices/'
+        changes = [
+            lambda: Invoice.objects.get(pk=self.invoices[0].pk).save(),
+            lambda: Customer.objects.get(pk=self.invoices[1].customer_id).save(),
+            lambda: Payment.objects.create(invoice=self.invoices[2], amount=1, payment_method='CASH'),
+            lambda: Job.objects.get(pk=self.invoices[0].job_id).workers.clear(),
+            lambda: Invoice.objects.filter(pk=self.invoices[1].pk).update(notes='Updated in bulk'),
+            lambda: Customer.objects.bulk_update([self.invoices[0].customer], ['phone']),
+            lambda: Invoice.objects.filter(pk=self.invoices[2].pk).delete(),
+        ]
+        response = self.client.get(url)
+        for change in changes:
+            change()
+            response, _ = self.revalidate(url, response, status.HTTP_200_OK)
+
+    def test_overdue_action(self):
+        """Test marking invoices overdue changes the ETag of the invoice list, and repeat polls revalidate"""
+        Invoice.objects.filter(pk=self.invoices[0].pk).update(status='SENT', due_date=date(2000, 1, 1))
+        response = self.client.get('/api/invoices/')
+        overdue = self.client.get('/api/invoices/overdue/')
+        self.revalidate('/api/invoices/', response, status.HTTP_200_OK)
+        # Nothing new to flag, so the poll writes nothing and revalidates
+        self.revalidate('/api/invoices/overdue/', overdue, status.HTTP_304_NOT_MODIFIED)
+        stats = self.client.get('/api/dashboard-stats/')
+        self.client.get('/api/invoices/overdue/')
+        self.revalidate('/api/dashboard-stats/', stats, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_last_modified(self):
+        """Test detail responses carry Last-Modified and honour If-Modified-Since"""
+        url = f'/api/invoices/{self.invoices[0].pk}/'
+        response = self.client.get(url)
+        modified = parse_http_date(response['Last-Modified'])
+        again = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        again = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(modified - 60))
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+        Payment.objects.create(invoice=self.invoices[0], amount=1, payment_method='CASH')
+        self.revalidate(url, response, status.HTTP_200_OK)
+
+    def test_missing_and_malformed_details(self):
+        """Test unknown and malformed ids still get a 404"""
+        for url in ['/api/invoices/999999/', '/api/invoices/abc/']:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                self.assertFalse(response.has_header('ETag'))
+
+    def test_customer_collections(self):
+        """Test a customer's collection actions are validated on their own rows"""
+        url = f'/api/customers/{self.invoices[0].customer_id}/invoices/'
+        response = self.client.get(url)
+        self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+        create_invoice_graph(1, 10, customer=self.invoices[0].customer)
+        self.revalidate(url, response, status.HTTP_200_OK)
+
+    def test_worker_productivity(self):
+        """Test the productivity report is validated on the worker, user and job tables"""
+        url = '/api/workers/productivity/'
+        response = self.client.get(url)
+        self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+        Job.objects.filter(pk=self.invoices[0].job_id).update(status='COMPLETED')
+        self.revalidate(url, response, status.HTTP_200_OK)
+
+    def test_dashboard_endpoints(self):
+        """Test the dashboard stats and chart data are not recomputed while their tables are unchanged"""
+        for url in ['/api/dashboard-stats/', '/api/dashboard-charts/?mode=data']:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+                Job.objects.filter(pk=self.invoices[0].job_id).first().save()
+                self.revalidate(url, response, status.HTTP_200_OK)
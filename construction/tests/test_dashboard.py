@@ -0,0 +1,490 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from unittest import mock
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework import status
+from datetime import date, timedelta
+from decimal import Decimal
+import io
+import threading
+import time
+
+from construction.analytics import get_dashboard_stats, worker_productivity
+from construction.chart_cache import chart_cache
+from construction.charts import (
+    CHARTS, RENDER_PARALLEL, RENDER_SERIAL,
+    generate_dashboard_charts, invalidate_chart_cache, shutdown_chart_executor,
+    worker_productivity_data
+)
+from construction.models import (
+    Customer, Worker, Estimate, Job, Supplier,
+    Material, Invoice, Payment, DashboardCounter
+)
+from construction.checks import check_shared_cache
+from construction.stats_cache import StatsCache, stats_cache
+
+DASHBOARD_QUERY_COUNT = 4
+
+
+def create_dashboard_data(count, offset=0):
+    """Create `count` customers each with an estimate, job, material and invoice"""
+    supplier = Supplier.objects.create(
+        name=f'Supplier {offset}',
+        contact_person='Contact',
+        email=f'supplier{offset}@example.com',
+        phone='+254700000000',
+        address='Industrial Area'
+    )
+    job_statuses = ['SCHEDULED', 'CONFIRMED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED']
+    invoice_statuses = ['DRAFT', 'SENT', 'PAID', 'OVERDUE']
+    for index in range(offset, offset + count):
+        user = User.objects.create_user(
+            username=f'worker{index}',
+            password='testpass123',
+            first_name='Worker',
+            last_name=str(index)
+        )
+        Worker.objects.create(
+            user=user,
+            worker_type='GENERAL',
+            phone='+254711111111',
+            hourly_rate=Decimal('100.00') + index,
+            experience_years=index % 10,
+            is_available=index % 2 == 0
+        )
+        customer = Customer.objects.create(
+            first_name='Customer',
+            last_name=str(index),
+            email=f'customer{index}@example.com',
+            phone='+254722222222',
+            address='Street',
+            city='Nairobi',
+            postal_code='00100'
+        )
+        estimate = Estimate.objects.create(
+            customer=customer,
+            work_description='Work',
+            status=['PENDING', 'ACCEPTED', 'SENT'][index % 3]
+        )
+        job = Job.objects.create(
+            estimate=estimate,
+            customer=customer,
+            job_title=f'Job {index}',
+            description='Job',
+            scheduled_start_date=date.today() - timedelta(days=index % 7),
+            scheduled_end_date=date.today() + timedelta(days=index % 5),
+            status=job_statuses[index % len(job_statuses)]
+        )
+        Material.objects.create(
+            job=job,
+            supplier=supplier,
+            name=f'Material {index}',
+            quantity=Decimal('3.50'),
+            unit='bags',
+            unit_cost=Decimal('12.25') + index
+        )
+        Invoice.objects.create(
+            job=job,
+            customer=customer,
+            due_date=date.today() - timedelta(days=(index % 3) - 1),
+            labor_cost=Decimal('1000.00') + index,
+            material_cost=Decimal('250.50'),
+            additional_costs=Decimal('10.00'),
+            tax_rate=Decimal('16.00'),
+            amount_paid=Decimal('100.00') * (index % 4),
+            status=invoice_statuses[index % len(invoice_statuses)]
+        )
+
+
+def slow_plot(title, data):
+    time.sleep(3)
+    return 'too-late'
+
+
+def failing_plot(title, data):
+    raise RuntimeError('broken chart')
+
+
+def reference_stats():
+    """Compute the headline KPIs from model instances in Python"""
+    today = date.today()
+    invoices = list(Invoice.objects.all())
+    return {
+        'paid_invoices': sum(1 for invoice in invoices if invoice.status == 'PAID'),
+        'overdue_invoices': sum(
+            1 for invoice in invoices
+            if invoice.status in ['SENT', 'OVERDUE'] and invoice.due_date < today
+        ),
+        'total_revenue': float(sum(
+            (invoice.total_amount for invoice in invoices if invoice.status == 'PAID'), Decimal('0')
+        )),
+        'pending_revenue': float(sum(
+            (invoice.balance_due for invoice in invoices if invoice.status != 'PAID'), Decimal('0')
+        )),
+        'material_spend': float(sum(
+            (material.total_cost for material in Material.objects.all()), Decimal('0')
+        )),
+        'active_jobs': Job.objects.filter(status='IN_PROGRESS').count(),
+        'scheduled_jobs': Job.objects.filter(status__in=['SCHEDULED', 'CONFIRMED']).count(),
+        'completed_jobs': Job.objects.filter(status='COMPLETED').count(),
+        'pending_estimates': Estimate.objects.filter(status='PENDING').count(),
+        'accepted_estimates': Estimate.objects.filter(status='ACCEPTED').count(),
+    }
+
+
+class DashboardStatsTest(TestCase):
+    """Test cases for the dashboard KPI aggregation"""
+
+    def test_empty_database(self):
+        """Test stats on an empty database"""
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['active_jobs'], 0)
+        self.assertEqual(stats['total_revenue'], 0.0)
+        self.assertEqual(stats['pending_revenue'], 0.0)
+        self.assertEqual(stats['worker_availability'], 0)
+        self.assertEqual(stats['average_job_duration'], 0)
+        self.assertEqual(stats['recent_activity'], [])
+
+    def test_matches_python_reference(self):
+        """Test aggregated values match per-instance calculations"""
+        create_dashboard_data(12)
+        stats = get_dashboard_stats()
+        for key, expected in reference_stats().items():
+            if isinstance(expected, float):
+                self.assertAlmostEqual(stats[key], expected, places=2, msg=key)
+            else:
+                self.assertEqual(stats[key], expected, msg=key)
+        self.assertEqual(stats['worker_counts'], {'total': 12, 'available': 6})
+        self.assertEqual(stats['worker_availability'], 50.0)
+        self.assertEqual(len(stats['recent_activity']), 6)
+
+    def test_query_count_is_constant(self):
+        """Test the number of queries does not grow with row count"""
+        create_dashboard_data(3)
+        with self.assertNumQueries(DASHBOARD_QUERY_COUNT):
+            get_dashboard_stats()
+        create_dashboard_data(20, offset=3)
+        with self.assertNumQueries(DASHBOARD_QUERY_COUNT):
+            get_dashboard_stats()
+
+
+COUNTED_MODELS = [Job, Estimate, Invoice, Worker, Material]
+
+
+class DashboardCounterTest(TestCase):
+    """Test cases for the incrementally maintained dashboard counters"""
+
+    def setUp(self):
+        create_dashboard_data(5)
+
+    def assertCountersMatchTables(self):
+        self.assertEqual(DashboardCounter.recompute(COUNTED_MODELS), {})
+
+    def test_saves_and_queryset_writes(self):
+        """Test saves, queryset updates, bulk updates and bulk creates keep the counters exact"""
+        job = Job.objects.filter(status='SCHEDULED').first()
+        job.status = 'IN_PROGRESS'
+        job.scheduled_end_date = '2030-01-01'
+        job.save()
+        Estimate.objects.filter(status='PENDING').update(status='ACCEPTED')
+        materials = list(Material.objects.all())
+        for material in materials:
+            material.unit_cost = Decimal('12.50')
+        Material.objects.bulk_update(materials, ['unit_cost'])
+        Worker.objects.update(is_available=False)
+        Invoice.objects.bulk_create([
+            Invoice(job=job, customer=job.customer, labor_cost=Decimal('10'), status='SENT')
+            for job in Job.objects.filter(invoice__isnull=True)
+        ])
+        self.assertCountersMatchTables()
+
+    def test_payments_and_stale_instances(self):
+        """Test payments posted by queryset update and saves of stale instances keep the counters exact"""
+        invoice = Invoice.objects.exclude(status='PAID').first()
+        stale = Invoice.objects.get(pk=invoice.pk)
+        Payment.objects.create(invoice=invoice, amount=invoice.balance_due, payment_method='CASH')
+        Payment.objects.bulk_create([
+            Payment(invoice=other, amount=1, payment_method='CASH') for other in Invoice.objects.exclude(pk=invoice.pk)
+        ])
+        stale.notes = 'Called the customer'
+        stale.save(update_fields=['notes'])
+        self.assertCountersMatchTables()
+        stats = get_dashboard_stats()
+        self.assertAlmostEqual(stats['pending_revenue'], reference_stats()['pending_revenue'], places=2)
+
+    def test_deletes_and_cascades(self):
+        """Test deleting rows, directly or through a cascade, subtracts them"""
+        Customer.objects.first().delete()
+        User.objects.filter(worker_profile__isnull=False).first().delete()
+        Material.objects.filter(pk=Material.objects.first().pk).delete()
+        invoice = Invoice.objects.first()
+        Invoice.objects.filter(pk=invoice.pk).update(status='PAID')
+        invoice.delete()
+        self.assertCountersMatchTables()
+
+    def test_stats_read_the_counters(self):
+        """Test the stats come from the counters rather than scanning the tables"""
+        DashboardCounter.objects.filter(name='jobs:COMPLETED').update(value=100)
+        self.assertEqual(get_dashboard_stats()['completed_jobs'], 100)
+
+    def test_recompute_command(self):
+        """Test the command reports drifted counters and corrects them"""
+        expected = get_dashboard_stats()
+        DashboardCounter.objects.filter(name='invoices:revenue').update(value=1)
+        DashboardCounter.objects.filter(name='workers:total').delete()
+        output = io.StringIO()
+        call_command('recompute_dashboard_counters', stdout=output)
+        self.assertIn('invoices:revenue', output.getvalue())
+        self.assertIn('workers:total: stored missing', output.getvalue())
+        self.assertEqual(get_dashboard_stats()['total_revenue'], expected['total_revenue'])
+        self.assertEqual(get_dashboard_stats()['worker_counts'], expected['worker_counts'])
+        output = io.StringIO()
+        call_command('recompute_dashboard_counters', stdout=output)
+        self.assertIn('All dashboard counters match', output.getvalue())
+
+
+class DashboardStatsAPITest(APITestCase):
+    """Test cases for the dashboard stats endpoint"""
+
+    def test_dashboard_stats_endpoint(self):
+        """Test the stats endpoint returns the KPI payload"""
+        create_dashboard_data(5)
+        response = self.client.get('/api/dashboard-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for key in ['active_jobs', 'total_revenue', 'pending_revenue', 'worker_counts', 'recent_activity']:
+            self.assertIn(key, response.data)
+
+
+class DashboardStatsCacheTest(APITestCase):
+    """Test cases for the version-keyed dashboard stats cache"""
+
+    def setUp(self):
+        cache.clear()
+        create_dashboard_data(3)
+
+    def test_repeat_polls_are_served_from_cache(self):
+        """Test a second call runs no queries and returns the same payload"""
+        first = stats_cache.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(stats_cache.get(), first)
+        response = self.client.get('/api/dashboard-stats/')
+        self.assertEqual(response.data['last_updated'], first['last_updated'])
+
+    def test_saves_and_deletes_invalidate(self):
+        """Test saving or deleting a source row recomputes the stats"""
+        before = stats_cache.get()
+        job = Job.objects.filter(status='SCHEDULED').first()
+        job.status = 'COMPLETED'
+        job.save()
+        after = stats_cache.get()
+        self.assertEqual(after['completed_jobs'], before['completed_jobs'] + 1)
+        invoice = Invoice.objects.exclude(status='PAID').first()
+        Payment.objects.create(invoice=invoice, amount=invoice.balance_due, payment_method='CASH')
+        self.assertEqual(stats_cache.get()['paid_invoices'], after['paid_invoices'] + 1)
+        Material.objects.all().delete()
+        self.assertEqual(stats_cache.get()['material_spend'], 0)
+
+    def test_invalidation_on_commit(self):
+        """Test a change invalidates again when its transaction commits"""
+        stats_cache.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Worker.objects.first().save()
+            # Recomputed before the commit, from rows other connections cannot see yet
+            stats_cache.get()
+        with self.assertNumQueries(DASHBOARD_QUERY_COUNT):
+            stats_cache.get()
+
+    def test_bulk_writes_invalidate(self):
+        """Test queryset updates, which send no signals, recompute the stats"""
+        stats_cache.get()
+        Job.objects.update(status='COMPLETED')
+        self.assertEqual(stats_cache.get()['completed_jobs'], 3)
+
+    def test_unchanged_poll_runs_no_queries(self):
+        """Test revalidating the stats endpoint touches neither the tables nor the counters"""
+        response = self.client.get('/api/dashboard-stats/')
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/dashboard-stats/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        Job.objects.update(status='COMPLETED')
+        again = self.client.get('/api/dashboard-stats/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.data['completed_jobs'], 3)
+
+    def test_deploy_check_warns_about_local_cache(self):
+        """Test check --deploy flags a cache that is not shared between processes"""
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['construction.W001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_concurrent_misses_compute_once(self):
+        """Test requests missing together wait for one recompute"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'calls': len(calls)}
+
+        shared = StatsCache(compute=compute)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(shared.get())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'calls': 1}] * 4)
+
+
+class ChartCacheTest(TestCase):
+    """Test cases for the fingerprint-keyed chart cache"""
+
+    def setUp(self):
+        cache.clear()
+        create_dashboard_data(4)
+
+    def test_second_render_is_served_from_cache(self):
+        """Test unchanged data is not re-rendered"""
+        first = generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats(), {'hits': 0, 'misses': len(CHARTS)})
+        second = generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats(), {'hits': len(CHARTS), 'misses': len(CHARTS)})
+        self.assertEqual(first, second)
+
+    def test_changed_source_table_rerenders_dependent_charts(self):
+        """Test only charts reading a modified table are re-rendered"""
+        generate_dashboard_charts()
+        chart_cache.reset_stats()
+        Material.objects.update(unit_cost=Decimal('99.00'))
+        Material.objects.first().save()
+        generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats(), {'hits': len(CHARTS) - 1, 'misses': 1})
+
+    def test_bulk_update_rerenders_dependent_charts(self):
+        """Test a queryset update that leaves updated_at alone still re-renders the charts reading the table"""
+        generate_dashboard_charts()
+        chart_cache.reset_stats()
+        Material.objects.update(unit_cost=Decimal('99.00'))
+        generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats(), {'hits': len(CHARTS) - 1, 'misses': 1})
+
+    @override_settings(CHART_CACHE_TIMEOUT=0)
+    def test_entries_expire(self):
+        """Test cached charts are not kept past CHART_CACHE_TIMEOUT"""
+        generate_dashboard_charts()
+        chart_cache.reset_stats()
+        generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats()['hits'], 0)
+
+    def test_manual_invalidation(self):
+        """Test invalidating by hand forces a re-render"""
+        generate_dashboard_charts()
+        chart_cache.reset_stats()
+        invalidate_chart_cache(['job_status'])
+        generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats(), {'hits': len(CHARTS) - 1, 'misses': 1})
+        invalidate_chart_cache()
+        generate_dashboard_charts()
+        self.assertEqual(chart_cache.stats()['misses'], len(CHARTS) + 1)
+
+
+@override_settings(CHART_RENDER_WORKERS=2, CHART_RENDER_TIMEOUT=1)
+class ParallelChartRenderingTest(TestCase):
+    """Test cases for process-pool chart rendering"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_chart_executor()
+        super().tearDownClass()
+
+    def setUp(self):
+        create_dashboard_data(4)
+
+    def test_parallel_matches_serial(self):
+        """Test both modes produce the same set of charts"""
+        serial = generate_dashboard_charts(use_cache=False, mode=RENDER_SERIAL)
+        parallel = generate_dashboard_charts(use_cache=False, mode=RENDER_PARALLEL)
+        self.assertEqual(list(serial.keys()), list(parallel.keys()))
+        self.assertGreater(len(parallel), 0)
+
+    def test_failing_and_slow_charts_are_skipped(self):
+        """Test a chart that raises or exceeds the timeout is left out"""
+        charts = [
+            CHARTS[0]._replace(plot=failing_plot),
+            CHARTS[1]._replace(plot=slow_plot),
+            CHARTS[2],
+        ]
+        with mock.patch('construction.charts.CHARTS', charts), \
+                self.assertLogs('construction.charts', level='WARNING') as logs:
+            result = generate_dashboard_charts(use_cache=False, mode=RENDER_PARALLEL)
+        self.assertEqual(list(result.keys()), [CHARTS[2].key])
+        self.assertEqual(len(logs.records), 2)
+
+
+class ChartDataModeTest(APITestCase):
+    """Test cases for the data-only chart endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        create_dashboard_data(4)
+
+    def test_data_mode_returns_labels_and_series(self):
+        """Test ?mode=data returns chart data without images"""
+        response = self.client.get('/api/dashboard-charts/?mode=data')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        job_status = response.data['job_status']
+        self.assertEqual(job_status['type'], 'pie')
+        self.assertEqual(sum(job_status['series'][0]['values']), 4)
+        self.assertEqual(len(job_status['labels']), len(job_status['series'][0]['values']))
+        for chart in response.data.values():
+            self.assertNotIn('image', chart)
+
+    def test_data_mode_does_not_render(self):
+        """Test data mode never calls matplotlib"""
+        with mock.patch('construction.chart_rendering._encode_figure') as encode:
+            self.client.get('/api/dashboard-charts/?mode=data')
+        encode.assert_not_called()
+
+    def test_unsupported_mode(self):
+        """Test an unknown mode is rejected"""
+        response = self.client.get('/api/dashboard-charts/?mode=svg')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class WorkerProductivityTest(APITestCase):
+    """Test cases for the worker productivity aggregation"""
+
+    def setUp(self):
+        create_dashboard_data(6)
+        workers = list(Worker.objects.order_by('id'))
+        for index, job in enumerate(Job.objects.order_by('id')):
+            job.workers.add(workers[0], workers[index % len(workers)])
+
+    def test_single_query_for_all_workers(self):
+        """Test productivity for every worker comes from one query"""
+        with self.assertNumQueries(1):
+            workers = list(worker_productivity())
+        self.assertEqual(len(workers), 6)
+        first = next(worker for worker in workers if worker.pk == Worker.objects.order_by('id').first().pk)
+        completed = first.jobs.filter(status='COMPLETED').count()
+        self.assertEqual(first.completed_jobs, completed)
+        self.assertEqual(first.scheduled_jobs, first.jobs.filter(status__in=['SCHEDULED', 'CONFIRMED']).count())
+        self.assertEqual(first.earnings, first.hourly_rate * completed * 8)
+
+    def test_productivity_endpoint_pages_and_orders(self):
+        """Test the productivity endpoint is paginated and orderable"""
+        response = self.client.get('/api/workers/productivity/?ordering=-earnings')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 6)
+        earnings = [Decimal(row['earnings']) for row in response.data['results']]
+        self.assertEqual(earnings, sorted(earnings, reverse=True))
+        self.assertIn('name', response.data['results'][0])
+
+    def test_chart_query_count_is_constant(self):
+        """Test the productivity chart data no longer issues per-worker queries"""
+        with self.assertNumQueries(1):
+            data = worker_productivity_data()
+        self.assertEqual(len(data['labels']), len(data['earnings']))
@@ -0,0 +1,134 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from construction.export_jobs import shutdown_export_executor
+from construction.models import ExportJob
+from construction.tests.test_dashboard import create_dashboard_data
+
+
+class ExportJobTestCase(TransactionTestCase):
+    """Base class running export jobs against a temporary MEDIA_ROOT"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        create_dashboard_data(3)
+
+    def tearDown(self):
+        shutdown_export_executor()
+
+    def run_export(self, payload):
+        response = self.client.post('/api/export-jobs/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        shutdown_export_executor()
+        return self.client.get(response['Location']).data
+
+
+class ExportJobTest(ExportJobTestCase):
+    """Test cases for background dashboard exports"""
+
+    def test_pdf_export_job(self):
+        """Test a queued PDF export completes and can be downloaded"""
+        job = self.run_export({'format': 'pdf'})
+        self.assertEqual(job['status'], 'COMPLETED')
+        response = self.client.get(job['download_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_excel_export_job_filters(self):
+        """Test the date filters limit the ledger sheets"""
+        tomorrow = (timezone.now().date() + timedelta(days=1)).isoformat()
+        job = self.run_export({'format': 'excel', 'filters': {'from': tomorrow}})
+        self.assertEqual(job['filters'], {'from': tomorrow})
+        response = self.client.get(job['download_url'])
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(len(list(workbook['Invoices'].values)), 1)
+
+    def test_range_requests(self):
+        """Test partial downloads with HTTP Range"""
+        job = self.run_export({'format': 'pdf'})
+        full = b''.join(self.client.get(job['download_url']).streaming_content)
+        response = self.client.get(job['download_url'], HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 0-9/{len(full)}')
+        self.assertEqual(b''.join(response.streaming_content), full[:10])
+        response = self.client.get(job['download_url'], HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), full[-5:])
+        response = self.client.get(job['download_url'], HTTP_RANGE=f'bytes={len(full)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_failed_job_records_error(self):
+        """Test a failing export is marked as failed"""
+        with mock.patch('construction.export_jobs.get_dashboard_stats', side_effect=RuntimeError('no stats')), \
+                self.assertLogs('construction.export_jobs', level='ERROR'):
+            job = self.run_export({'format': 'pdf'})
+        self.assertEqual(job['status'], 'FAILED')
+        self.assertEqual(job['error'], 'no stats')
+        self.assertIsNone(job['download_url'])
+
+
+@mock.patch('construction.export_jobs.run_export_job')
+class ExportJobQueueTest(ExportJobTestCase):
+    """Test cases for queueing export jobs"""
+
+    def test_identical_requests_share_a_job(self, run_export_job):
+        """Test identical pending requests are deduplicated"""
+        payload = {'format': 'excel', 'filters': {'from': '2024-01-01'}}
+        first = self.client.post('/api/export-jobs/', payload, format='json')
+        second = self.client.post('/api/export-jobs/', payload, format='json')
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['id'], second.data['id'])
+        other = self.client.post('/api/export-jobs/', {'format': 'excel'}, format='json')
+        self.assertEqual(other.status_code, status.HTTP_202_ACCEPTED)
+        self.assertNotEqual(other.data['id'], first.data['id'])
+        shutdown_export_executor()
+        self.assertEqual(run_export_job.call_count, 2)
+
+    def test_stale_job_is_replaced(self, run_export_job):
+        """Test a job stuck past EXPORT_JOB_STALE_AFTER is not reused"""
+        first = self.client.post('/api/export-jobs/', {'format': 'pdf'}, format='json')
+        ExportJob.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        second = self.client.post('/api/export-jobs/', {'format': 'pdf'}, format='json')
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(ExportJob.objects.get(pk=first.data['id']).status, 'FAILED')
+
+    def test_download_before_completion(self, run_export_job):
+        """Test downloading a pending export is refused"""
+        job = self.client.post('/api/export-jobs/', {'format': 'pdf'}, format='json').data
+        response = self.client.get(f"/api/export-jobs/{job['id']}/download/")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_invalid_requests(self, run_export_job):
+        """Test unknown formats and filters are rejected"""
+        response = self.client.post('/api/export-jobs/', {'format': 'docx'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/export-jobs/', {'format': 'pdf', 'filters': {'city': 'Nairobi'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            '/api/export-jobs/', {'format': 'excel', 'filters': {'from': '2024-02-01', 'to': '2024-01-01'}}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pdf_rejects_date_filters(self, run_export_job):
+        """Test date filters are refused for PDF exports, which have no dated rows"""
+        response = self.client.post('/api/export-jobs/', {'format': 'pdf', 'filters': {'from': '2024-01-01'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('filters', response.data)
+        self.assertFalse(ExportJob.objects.exists())
+        response = self.client.post('/api/export-jobs/', {'format': 'pdf', 'filters': {}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
@@ -0,0 +1,139 @@
+import base64
+import io
+import tempfile
+import tracemalloc
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.analytics import get_dashboard_stats
+from construction.charts import generate_dashboard_chart_data, generate_dashboard_charts, render_dashboard_charts
+from construction.exports import LEDGERS, write_excel_report, write_pdf_report
+from construction.models import Invoice, Payment
+from construction.tests.test_dashboard import create_dashboard_data
+
+
+def add_payments(invoice, count):
+    Payment.objects.bulk_create(
+        Payment(invoice=invoice, amount=Decimal('1.00'), payment_method='CASH', transaction_reference=f'REF-{index}')
+        for index in range(count)
+    )
+
+
+def peak_export_memory():
+    with tempfile.TemporaryFile() as output:
+        tracemalloc.start()
+        try:
+            write_excel_report({}, {}, output)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+class ExcelExportTest(TestCase):
+    """Test cases for the streamed Excel workbook"""
+
+    def setUp(self):
+        create_dashboard_data(6)
+        add_payments(Invoice.objects.first(), 25)
+
+    def test_ledger_sheets(self):
+        """Test the workbook holds every invoice, payment and material row"""
+        output = io.BytesIO()
+        write_excel_report(get_dashboard_stats(), {}, output)
+        output.seek(0)
+        workbook = load_workbook(output, read_only=True)
+        self.assertEqual(workbook.sheetnames[:2], ['Summary', 'Recent Activity'])
+        for title, labels, rows in LEDGERS:
+            sheet_rows = list(workbook[title].values)
+            self.assertEqual(list(sheet_rows[0]), labels)
+            self.assertEqual(len(sheet_rows) - 1, len(list(rows())))
+        invoice = Invoice.objects.order_by('id').first()
+        first_row = list(workbook['Invoices'].values)[1]
+        self.assertEqual(first_row[0], invoice.invoice_number)
+        self.assertEqual(Decimal(str(first_row[8])), invoice.total_amount)
+
+    def test_memory_does_not_grow_with_ledgers(self):
+        """Test peak memory stays flat as the payment ledger grows"""
+        invoice = Invoice.objects.first()
+        add_payments(invoice, 5000)
+        small = peak_export_memory()
+        add_payments(invoice, 20000)
+        large = peak_export_memory()
+        # Five times the rows should cost roughly the same, not five times the memory
+        self.assertLess(large, small * 1.25)
+
+
+class ChartExportTest(TestCase):
+    """Test cases for charts in the exports"""
+
+    def setUp(self):
+        create_dashboard_data(6)
+
+    def test_charts_carry_png_bytes(self):
+        """Test charts stay raw bytes until the JSON boundary"""
+        charts = render_dashboard_charts(use_cache=False)
+        self.assertTrue(charts)
+        for chart in charts.values():
+            self.assertTrue(chart['png'].startswith(b'\x89PNG'))
+        encoded = generate_dashboard_charts()
+        for key, chart in charts.items():
+            self.assertEqual(base64.b64decode(encoded[key]['image']), chart['png'])
+
+    def test_vector_pdf_has_no_images(self):
+        """Test chart data is drawn as vectors while PNG charts are embedded"""
+        vector = io.BytesIO()
+        write_pdf_report(get_dashboard_stats(), generate_dashboard_chart_data(use_cache=False), vector)
+        raster = io.BytesIO()
+        write_pdf_report(get_dashboard_stats(), render_dashboard_charts(use_cache=False), raster)
+        self.assertNotIn(b'/Subtype /Image', vector.getvalue())
+        self.assertIn(b'/Subtype /Image', raster.getvalue())
+        self.assertLess(len(vector.getvalue()), len(raster.getvalue()))
+
+    def test_excel_embeds_chart_images(self):
+        """Test every rendered chart gets a sheet with its image"""
+        charts = render_dashboard_charts(use_cache=False)
+        output = io.BytesIO()
+        write_excel_report({}, charts, output, ledgers=False)
+        output.seek(0)
+        workbook = load_workbook(output)
+        chart_sheets = [name for name in workbook.sheetnames if name.startswith('Chart')]
+        self.assertEqual(len(chart_sheets), len(charts))
+        self.assertEqual(len(workbook[chart_sheets[0]]._images), 1)
+
+
+class ExportDashboardAPITest(APITestCase):
+    """Test cases for the dashboard export endpoint"""
+
+    def setUp(self):
+        create_dashboard_data(3)
+
+    def test_excel_export_streams(self):
+        """Test the Excel export is streamed as an attachment"""
+        response = self.client.get('/api/export-dashboard/?type=excel')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('dashboard-report.xlsx', response['Content-Disposition'])
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertIn('Payments', workbook.sheetnames)
+
+    def test_pdf_export(self):
+        """Test the PDF export"""
+        response = self.client.get('/api/export-dashboard/?type=pdf')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    @override_settings(EXPORT_PDF_VECTOR_CHARTS=False)
+    def test_raster_pdf_export(self):
+        """Test the PDF export with PNG charts"""
+        response = self.client.get('/api/export-dashboard/?type=pdf')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'/Subtype /Image', response.content)
+
+    def test_unsupported_type(self):
+        """Test an unknown export type is rejected"""
+        response = self.client.get('/api/export-dashboard/?type=docx')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.serializers import parse_field_paths
+from construction.tests.test_query_planner import create_invoice_graph
+
+
+class FieldSelectionTest(APITestCase):
+    """Test cases for ?fields= and ?expand="""
+
+    def setUp(self):
+        self.invoices = create_invoice_graph(2, 0)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, [query['sql'] for query in queries]
+
+    def test_parse_field_paths(self):
+        """Test dotted paths are parsed into a tree"""
+        self.assertIsNone(parse_field_paths(None))
+        self.assertEqual(parse_field_paths('a, b.c,b.d,'), {'a': {}, 'b': {'c': {}, 'd': {}}})
+
+    def test_sparse_fields_drop_joins_and_prefetches(self):
+        """Test only the requested fields are serialized and no relation is loaded"""
+        data, queries = self.get('/api/invoices/?fields=invoice_number,balance_due')
+        self.assertEqual(set(data['results'][0]), {'invoice_number', 'balance_due'})
+        # The page count and the page itself, without joins
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN', queries[1])
+
+    def test_expand_collapses_other_relations(self):
+        """Test relations outside ?expand= are returned as primary keys and nested lists are dropped"""
+        customer_id = self.invoices[1].customer_id
+        data, queries = self.get(f'/api/invoices/?customer={customer_id}&expand=customer')
+        invoice = data['results'][0]
+        self.assertEqual(invoice['customer']['email'], self.invoices[1].customer.email)
+        self.assertEqual(invoice['job'], self.invoices[1].job_id)
+        self.assertNotIn('payments', invoice)
+        # The customer filter's lookup, the count and the page joined to customers only
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(queries[2].count('JOIN'), 1)
+
+    def test_nested_fields_and_expansion(self):
+        """Test dotted fields select inside nested objects and nested lists"""
+        data, queries = self.get('/api/invoices/?fields=id,job.job_title,job.workers.user.username')
+        job = data['results'][0]['job']
+        self.assertEqual(set(job), {'job_title', 'workers'})
+        self.assertEqual(job['workers'][0], {'user': {'username': job['workers'][0]['user']['username']}})
+        # Count, invoices joined to their jobs, then the workers with their users
+        self.assertEqual(len(queries), 3)
+        data, _ = self.get(f'/api/invoices/?customer={self.invoices[1].customer_id}&fields=id,job&expand=job.estimate')
+        job = data['results'][0]['job']
+        self.assertIsInstance(job['estimate'], dict)
+        self.assertEqual(job['customer'], self.invoices[1].customer_id)
+        self.assertNotIn('workers', job)
+
+    def test_detail_and_writes(self):
+        """Test the parameters apply to detail views and are ignored on writes"""
+        invoice = self.invoices[0]
+        data, _ = self.get(f'/api/customers/{invoice.customer_id}/?fields=email,jobs.job_title')
+        self.assertEqual(data, {'email': invoice.customer.email, 'jobs': [{'job_title': invoice.job.job_title}]})
+        response = self.client.patch(f'/api/invoices/{invoice.pk}/?fields=notes', {'notes': 'Paid by cheque'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('invoice_number', response.data)
@@ -0,0 +1,127 @@
+import threading
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from construction.models import Customer, Estimate, Job, Invoice, Sequence
+
+
+def create_jobs(count, offset=0):
+    jobs = []
+    for index in range(offset, offset + count):
+        customer = Customer.objects.create(
+            first_name='Client',
+            last_name=str(index),
+            email=f'client{index}@example.com',
+            phone='+254700000000',
+            address='Street',
+            city='Nairobi',
+            postal_code='00100'
+        )
+        estimate = Estimate.objects.create(customer=customer, work_description='Work')
+        jobs.append(Job.objects.create(
+            estimate=estimate,
+            customer=customer,
+            job_title=f'Job {index}',
+            description='Job',
+            scheduled_start_date=date.today(),
+            scheduled_end_date=date.today() + timedelta(days=3)
+        ))
+    return jobs
+
+
+def new_invoice(job):
+    return Invoice(job=job, customer=job.customer, labor_cost=1000, tax_rate=16)
+
+
+class InvoiceNumberTest(TestCase):
+    """Test cases for the invoice number sequence"""
+
+    def setUp(self):
+        self.jobs = create_jobs(6)
+
+    def test_numbers_are_sequential(self):
+        """Test invoices are numbered one after another"""
+        numbers = [Invoice.objects.create(job=job, customer=job.customer).invoice_number for job in self.jobs[:3]]
+        self.assertEqual(numbers, ['INV-00001', 'INV-00002', 'INV-00003'])
+
+    def test_rollback_releases_number(self):
+        """Test a failed insert does not leave a gap"""
+        Invoice.objects.create(job=self.jobs[0], customer=self.jobs[0].customer)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Invoice.objects.create(job=self.jobs[1], customer=self.jobs[1].customer)
+                raise RuntimeError('abort')
+        invoice = Invoice.objects.create(job=self.jobs[2], customer=self.jobs[2].customer)
+        self.assertEqual(invoice.invoice_number, 'INV-00002')
+
+    def test_hand_edited_numbers(self):
+        """Test numbering carries on after a number is edited by hand"""
+        invoice = Invoice.objects.create(job=self.jobs[0], customer=self.jobs[0].customer)
+        Invoice.objects.filter(pk=invoice.pk).update(invoice_number='CUSTOM-7')
+        invoice = Invoice.objects.create(job=self.jobs[1], customer=self.jobs[1].customer)
+        self.assertEqual(invoice.invoice_number, 'INV-00002')
+
+    def test_bulk_create_reserves_a_block(self):
+        """Test bulk creation takes one block of numbers and fills in totals"""
+        Invoice.objects.create(job=self.jobs[0], customer=self.jobs[0].customer)
+        # Counter update and read, one insert, then one dashboard counter update
+        with self.assertNumQueries(4):
+            invoices = Invoice.objects.bulk_create([new_invoice(job) for job in self.jobs[1:]])
+        self.assertEqual(
+            [invoice.invoice_number for invoice in invoices],
+            ['INV-00002', 'INV-00003', 'INV-00004', 'INV-00005', 'INV-00006']
+        )
+        stored = Invoice.objects.get(invoice_number='INV-00004')
+        self.assertEqual(stored.total_amount, 1160)
+        self.assertEqual(stored.due_date, date.today() + timedelta(days=30))
+        self.assertEqual(Sequence.objects.get(name='invoice').next_value, 7)
+
+    def test_reserve_block(self):
+        """Test reserving values from a new sequence"""
+        self.assertEqual(list(Sequence.reserve('test', 3)), [1, 2, 3])
+        self.assertEqual(list(Sequence.reserve('test')), [4])
+        with self.assertRaises(ValueError):
+            Sequence.reserve('test', 0)
+
+
+class ConcurrentInvoiceNumberTest(TransactionTestCase):
+    """Test cases for invoice numbers allocated from several threads at once"""
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('shared-cache in-memory SQLite raises "table is locked" instead of waiting for writers')
+
+    def test_concurrent_inserts_are_gap_free(self):
+        """Test concurrent single and bulk inserts get unique, gap-free numbers"""
+        threads = 6
+        per_thread = 5
+        jobs = create_jobs(threads * per_thread)
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def insert(chunk, bulk):
+            try:
+                barrier.wait()
+                if bulk:
+                    Invoice.objects.bulk_create([new_invoice(job) for job in chunk])
+                else:
+                    for job in chunk:
+                        new_invoice(job).save()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=insert, args=(jobs[index::threads], index % 2 == 0))
+            for index in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        numbers = sorted(Invoice.objects.values_list('invoice_number', flat=True))
+        self.assertEqual(numbers, [f'INV-{number:05d}' for number in range(1, threads * per_thread + 1)])
@@ -298,6 +298,39 @@ class InvoiceModelTest(TestCase):
         invoice.save()
         self.assertEqual(invoice.balance_due, Decimal('10000'))
 
+    def test_totals_are_stored(self):
+        """Test that money totals are persisted and filterable in SQL"""
+        invoice = Invoice.objects.create(
+            job=self.job,
+            customer=self.customer,
+            labor_cost=Decimal('100.05'),
+            tax_rate=Decimal('16.5')
+        )
+        invoice.amount_paid = Decimal('50')
+        invoice.save(update_fields=['amount_paid'])
+        stored = Invoice.objects.values('subtotal', 'tax_amount', 'total_amount', 'balance_due').get(pk=invoice.pk)
+        self.assertEqual(stored['subtotal'], Decimal('100.05'))
+        self.assertEqual(stored['tax_amount'], Decimal('16.51'))
+        self.assertEqual(stored['total_amount'], Decimal('116.56'))
+        self.assertEqual(stored['balance_due'], Decimal('66.56'))
+        self.assertTrue(Invoice.objects.filter(balance_due__gt=60).exists())
+
+    def test_recalculate_totals(self):
+        """Test bulk recalculation after a queryset update"""
+        invoice = Invoice.objects.create(
+            job=self.job,
+            customer=self.customer,
+            labor_cost=1000,
+            tax_rate=10
+        )
+        Invoice.objects.filter(pk=invoice.pk).update(labor_cost=2000, amount_paid=500)
+        self.assertEqual(Invoice.objects.all().recalculate_totals(), 1)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.subtotal, Decimal('2000'))
+        self.assertEqual(invoice.tax_amount, Decimal('200'))
+        self.assertEqual(invoice.total_amount, Decimal('2200'))
+        self.assertEqual(invoice.balance_due, Decimal('1700'))
+
 
 class PaymentModelTest(TestCase):
     """Test cases for Payment model"""
@@ -380,6 +413,70 @@ class PaymentModelTest(TestCase):
         
         self.invoice.refresh_from_db()
         self.assertEqual(self.invoice.status, 'PAID')
+    
+    def test_payment_changes_are_posted(self):
+        """Test editing and deleting a payment adjusts the invoice by the difference"""
+        payment = Payment.objects.create(
+            invoice=self.invoice,
+            amount=5000,
+            payment_method='CASH',
+            received_by=self.user
+        )
+        payment.amount = Decimal('7000')
+        payment.save()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount_paid, Decimal('7000'))
+        self.assertEqual(self.invoice.balance_due, self.invoice.total_amount - Decimal('7000'))
+        payment.delete()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount_paid, Decimal('0'))
+    
+    def test_stale_invoice_save_keeps_posted_payments(self):
+        """Test saving an invoice loaded before a payment does not undo the payment"""
+        stale = Invoice.objects.get(pk=self.invoice.pk)
+        Payment.objects.create(
+            invoice=self.invoice,
+            amount=self.invoice.total_amount,
+            payment_method='CASH',
+            received_by=self.user
+        )
+        stale.notes = 'Called the customer'
+        stale.save()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount_paid, self.invoice.total_amount)
+        self.assertEqual(self.invoice.balance_due, Decimal('0'))
+        self.assertEqual(self.invoice.status, 'PAID')
+        self.assertEqual(self.invoice.notes, 'Called the customer')
+        # An explicit change is still written
+        stale.status = 'CANCELLED'
+        stale.save(update_fields=['status'])
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'CANCELLED')
+        self.assertEqual(self.invoice.amount_paid, self.invoice.total_amount)
+    
+    def test_delete_reverses_the_stored_amount(self):
+        """Test deleting a payment edited in memory reverses the amount that was posted"""
+        payment = Payment.objects.create(
+            invoice=self.invoice,
+            amount=5000,
+            payment_method='CASH',
+            received_by=self.user
+        )
+        payment.amount = Decimal('9000')
+        payment.delete()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount_paid, Decimal('0'))
+        self.assertEqual(self.invoice.balance_due, self.invoice.total_amount)
+    
+    def test_payment_posting_query_count_is_constant(self):
+        """Test posting does not re-read the invoice's earlier payments"""
+        Payment.objects.bulk_create(
+            Payment(invoice=self.invoice, amount=1, payment_method='CASH') for _ in range(50)
+        )
+        # Savepoint, insert, locked read, update, re-read, dashboard counter update,
+        # release and refreshing the loaded invoice
+        with self.assertNumQueries(8):
+            Payment.objects.create(invoice=self.invoice, amount=100, payment_method='CASH')
 
 
 class MaterialModelTest(TestCase):
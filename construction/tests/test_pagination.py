@@ -0,0 +1,140 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Invoice, Material, Payment, Supplier
+from construction.tests.test_payments import create_invoices
+from construction.tests.test_query_planner import create_invoice_graph
+
+
+class KeysetPaginationTest(APITestCase):
+    """Test cases for ?pagination=cursor pages"""
+
+    def setUp(self):
+        invoice = create_invoices(1)[0]
+        # Three payment dates, so most rows tie on the viewset's ordering
+        Payment.objects.bulk_create([
+            Payment(invoice=invoice, amount=1, payment_method='CASH', payment_date=date.today() - timedelta(days=index % 3))
+            for index in range(25)
+        ])
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            pages.append(response.data)
+            url = response.data['next']
+        return ids, pages
+
+    def test_walks_every_row_in_order(self):
+        """Test following next links returns every row once, in the viewset's ordering plus id"""
+        ids, pages = self.walk('/api/payments/?pagination=cursor')
+        expected = list(Payment.objects.order_by('-payment_date', '-id').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        self.assertIsNone(pages[0]['previous'])
+        self.assertNotIn('count', pages[0])
+
+    def test_previous_links(self):
+        """Test previous links walk back to the same pages"""
+        _, pages = self.walk('/api/payments/?pagination=cursor')
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual(response.data['results'], pages[1]['results'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(response.data['results'], pages[0]['results'])
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_ordering_and_nulls(self):
+        """Test ?ordering= keys the cursor, NULLs sort last and a cursor for another ordering is rejected"""
+        job = create_invoice_graph(1, 0)[0].job
+        supplier = Supplier.objects.first()
+        Material.objects.bulk_create([
+            Material(job=job, supplier=supplier, name='Sand', quantity=1, unit='kg', unit_cost=1,
+                     expected_delivery_date=None if index % 4 == 0 else date.today() + timedelta(days=index % 3))
+            for index in range(23)
+        ])
+        ids, pages = self.walk('/api/materials/?pagination=cursor&ordering=expected_delivery_date')
+        rows = sorted(Material.objects.all(), key=lambda material: (material.expected_delivery_date is None, material.expected_delivery_date or date.min, material.pk))
+        self.assertEqual(ids, [material.pk for material in rows])
+        response = self.client.get(pages[1]['next'].replace('ordering=expected_delivery_date', 'ordering=-created_at'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get('/api/materials/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_forged_cursor_values(self):
+        """Test cursor values that do not fit their fields are rejected as an invalid cursor"""
+        def cursor(values):
+            payload = json.dumps({'o': ['-invoice_date', '-id'], 'v': values, 'r': False})
+            return urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+        for values in [['notadate', 1], [{'a': 1}, 1], ['2024-01-01', 'abc'], 'ab']:
+            with self.subTest(values=values):
+                response = self.client.get(f'/api/invoices/?cursor={cursor(values)}')
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f"/api/invoices/?cursor={cursor([date.today().isoformat(), 10 ** 9])}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_deep_pages_do_not_offset_or_count(self):
+        """Test a cursor page is fetched with a keyed WHERE clause, without OFFSET or COUNT"""
+        _, pages = self.walk('/api/payments/?pagination=cursor')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(pages[1]['next'])
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_approximate_count(self):
+        """Test ?count=approximate reports a reused estimate instead of counting every request"""
+        cache.clear()
+        response = self.client.get('/api/payments/?count=approximate')
+        self.assertEqual(response.data['count'], 25)
+        Payment.objects.create(invoice=Payment.objects.first().invoice, amount=1, payment_method='CASH', payment_date=date.today())
+        response = self.client.get('/api/payments/?count=approximate')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(self.client.get('/api/payments/').data['count'], 26)
+        response = self.client.get('/api/payments/?pagination=cursor&count=approximate')
+        self.assertEqual(response.data['count'], 25)
+
+
+class ListActionTest(APITestCase):
+    """Test cases for the extra list actions"""
+
+    def setUp(self):
+        self.invoices = create_invoices(12)
+
+    def test_actions_are_paginated_and_filtered(self):
+        """Test the list actions return pages and honour the filter backends"""
+        response = self.client.get('/api/invoices/unpaid/')
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(response.data['results']), 10)
+        response = self.client.get(f'/api/invoices/unpaid/?customer={self.invoices[3].customer_id}')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.invoices[3].pk])
+        response = self.client.get('/api/invoices/unpaid/?pagination=cursor&ordering=due_date')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_ndjson_stream(self):
+        """Test ?stream=ndjson returns every row, one JSON object per line"""
+        Invoice.objects.filter(pk=self.invoices[0].pk).update(status='PAID')
+        response = self.client.get('/api/invoices/unpaid/?stream=ndjson&fields=id,invoice_number')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(set(rows[0]), {'id', 'invoice_number'})
+        response = self.client.get('/api/invoices/?stream=ndjson')
+        rows = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(rows), 12)
+        self.assertIn('payments', json.loads(rows[0]))
+        response = self.client.get('/api/invoices/unpaid/?stream=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Customer, Estimate, Job, Invoice, Payment
+
+
+def create_invoices(count, labor_cost=Decimal('1000.00')):
+    invoices = []
+    for index in range(count):
+        customer = Customer.objects.create(
+            first_name='Payer',
+            last_name=str(index),
+            email=f'payer{index}@example.com',
+            phone='+254700000000',
+            address='Street',
+            city='Nairobi',
+            postal_code='00100'
+        )
+        estimate = Estimate.objects.create(customer=customer, work_description='Work')
+        job = Job.objects.create(
+            estimate=estimate,
+            customer=customer,
+            job_title=f'Job {index}',
+            description='Job',
+            scheduled_start_date=date.today(),
+            scheduled_end_date=date.today() + timedelta(days=3),
+            status='COMPLETED'
+        )
+        invoices.append(Invoice.objects.create(
+            job=job,
+            customer=customer,
+            due_date=date.today() + timedelta(days=30),
+            labor_cost=labor_cost,
+            status='SENT'
+        ))
+    return invoices
+
+
+class BulkPaymentAPITest(APITestCase):
+    """Test cases for the bulk payment endpoint"""
+
+    def setUp(self):
+        self.invoices = create_invoices(3)
+
+    def test_bulk_post_groups_updates(self):
+        """Test many payments are posted and summed per invoice"""
+        payload = [
+            {'invoice_id': invoice.pk, 'amount': '10.00', 'payment_method': 'CASH'}
+            for invoice in self.invoices for _ in range(40)
+        ]
+        payload.append({'invoice_id': self.invoices[0].pk, 'amount': '4000.00', 'payment_method': 'MOBILE_MONEY'})
+        response = self.client.post('/api/payments/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], len(payload))
+        self.assertEqual(response.data['invoices'], 3)
+        self.assertEqual(Payment.objects.count(), len(payload))
+        paid, partly_paid, _ = [Invoice.objects.get(pk=invoice.pk) for invoice in self.invoices]
+        self.assertEqual(paid.amount_paid, Decimal('4400.00'))
+        self.assertEqual(paid.status, 'PAID')
+        self.assertEqual(paid.balance_due, Decimal('-3400.00'))
+        self.assertEqual(partly_paid.amount_paid, Decimal('400.00'))
+        self.assertEqual(partly_paid.balance_due, Decimal('600.00'))
+        self.assertEqual(partly_paid.status, 'SENT')
+
+    def test_bulk_post_query_count(self):
+        """Test the query count does not grow with the number of payments"""
+        payload = [
+            {'invoice_id': self.invoices[index % 3].pk, 'amount': '1.00', 'payment_method': 'CASH'}
+            for index in range(300)
+        ]
+        with self.assertNumQueries(8):
+            response = self.client.post('/api/payments/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_post_is_all_or_nothing(self):
+        """Test one bad row rejects the whole batch with per-row errors"""
+        payload = [
+            {'invoice_id': self.invoices[0].pk, 'amount': '10.00', 'payment_method': 'CASH'},
+            {'invoice_id': 999999, 'amount': '10.00', 'payment_method': 'CASH'},
+            {'invoice_id': self.invoices[1].pk, 'amount': '0', 'payment_method': 'CASH'},
+        ]
+        response = self.client.post('/api/payments/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('amount', response.data[2])
+        payload.pop()
+        response = self.client.post('/api/payments/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('invoice_id', response.data[1])
+        self.assertFalse(Payment.objects.exists())
+
+    def test_bulk_post_requires_list(self):
+        """Test a non-list body is rejected"""
+        response = self.client.post('/api/payments/bulk/', {'invoice_id': self.invoices[0].pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConcurrentPaymentTest(TransactionTestCase):
+    """Test cases for payments posted from several threads at once"""
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('shared-cache in-memory SQLite raises "table is locked" instead of waiting for writers')
+
+    def test_no_lost_updates(self):
+        """Test concurrent payments on one invoice all count"""
+        invoice = create_invoices(1, labor_cost=Decimal('100000.00'))[0]
+        threads = 8
+        per_thread = 10
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def post_payments():
+            try:
+                barrier.wait()
+                for _ in range(per_thread):
+                    Payment.objects.create(invoice_id=invoice.pk, amount=Decimal('10.00'), payment_method='CASH')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post_payments) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.amount_paid, Decimal('10.00') * threads * per_thread)
+        self.assertEqual(invoice.balance_due, invoice.total_amount - invoice.amount_paid)
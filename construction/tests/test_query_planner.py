@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Customer, Estimate, Job, Invoice, Material, Payment, Supplier, Worker
+from construction.query_planner import plan_for_serializer
+from construction.serializers import InvoiceSerializer, PaymentSerializer
+
+
+def create_invoice_graph(count, start, customer=None):
+    """Create invoices whose jobs have workers, materials and payments"""
+    supplier = Supplier.objects.create(name=f'Supplier {start}', contact_person='Ann', email='s@example.com', phone='1', address='x')
+    invoices = []
+    for index in range(start, start + count):
+        owner = customer or Customer.objects.create(
+            first_name='Graph', last_name=str(index), email=f'graph{index}@example.com',
+            phone='1', address='Street', city='Nairobi', postal_code='00100'
+        )
+        estimate = Estimate.objects.create(customer=owner, work_description='Work')
+        job = Job.objects.create(
+            estimate=estimate, customer=owner, job_title=f'Job {index}', description='Job',
+            scheduled_start_date=date.today(), scheduled_end_date=date.today() + timedelta(days=3)
+        )
+        invoice = Invoice.objects.create(job=job, customer=owner, labor_cost=100)
+        for worker_index in range(2):
+            user = User.objects.create_user(username=f'worker-{index}-{worker_index}')
+            job.workers.add(Worker.objects.create(user=user, worker_type='PLUMBER', phone='1', hourly_rate=10, experience_years=1))
+            Material.objects.create(job=job, supplier=supplier, name='Pipe', quantity=1, unit='m', unit_cost=5)
+            Payment.objects.create(invoice=invoice, amount=10, payment_method='CASH', payment_date=date.today())
+        invoices.append(invoice)
+    return invoices
+
+
+class QueryPlannerTest(TestCase):
+    """Test cases for planning querysets from serializers"""
+
+    def test_invoice_plan(self):
+        """Test nested to-one relations are joined and to-many relations are prefetched"""
+        plan = plan_for_serializer(InvoiceSerializer)
+        self.assertEqual(plan.select, {
+            'customer', 'job', 'job__customer', 'job__estimate', 'job__estimate__customer',
+            'job__estimate__created_by', 'job__managed_by'
+        })
+        self.assertEqual(set(plan.prefetch), {'job__materials', 'job__workers', 'payments'})
+        self.assertEqual(plan.prefetch['job__workers'].select, {'user'})
+        self.assertEqual(plan.prefetch['job__materials'].select, {'supplier'})
+
+    def test_string_related_fields_join_what_str_reads(self):
+        """Test StringRelatedField joins the relations the model's __str__ uses"""
+        self.assertEqual(plan_for_serializer(PaymentSerializer).select, {'invoice', 'invoice__customer', 'received_by'})
+
+
+class ConstantQueryCountTest(APITestCase):
+    """Test cases for list and detail endpoints running a fixed number of queries"""
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_list_endpoints(self):
+        """Test list pages cost the same number of queries as rows are added"""
+        create_invoice_graph(1, 0)
+        start = 1
+        for url in ['/api/invoices/', '/api/jobs/', '/api/estimates/', '/api/payments/', '/api/materials/', '/api/workers/']:
+            with self.subTest(url=url):
+                before = self.count_queries(url)
+                create_invoice_graph(2, start)
+                start += 2
+                self.assertEqual(self.count_queries(url), before)
+
+    def test_customer_detail(self):
+        """Test the customer detail with nested estimates, jobs and invoices runs a fixed number of queries"""
+        customer = create_invoice_graph(1, 0)[0].customer
+        url = f'/api/customers/{customer.pk}/'
+        before = self.count_queries(url)
+        create_invoice_graph(3, 1, customer=customer)
+        self.assertEqual(self.count_queries(url), before)
+
+
+@override_settings(CUSTOMER_DETAIL_NESTED_LIMIT=2)
+class CustomerCollectionsTest(APITestCase):
+    """Test cases for the capped collections in the customer detail view"""
+
+    def setUp(self):
+        self.customer = create_invoice_graph(1, 0)[0].customer
+        create_invoice_graph(4, 1, customer=self.customer)
+        self.url = f'/api/customers/{self.customer.pk}/'
+
+    def test_detail_embeds_latest_items(self):
+        """Test only the latest items are embedded, with counts and next links"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        latest = list(self.customer.jobs.order_by('-created_at', '-id').values_list('pk', flat=True)[:2])
+        self.assertEqual([job['id'] for job in response.data['jobs']], latest)
+        self.assertEqual(len(response.data['estimates']), 2)
+        self.assertEqual(response.data['invoices_count'], 5)
+        self.assertTrue(response.data['jobs_next'].endswith(f'/api/customers/{self.customer.pk}/jobs/?page=2'))
+        # Each nested list is loaded as one slice, however many items the customer has
+        self.assertLess(len(queries), 25)
+
+    def test_collection_actions_are_paginated(self):
+        """Test the estimates, jobs and invoices actions page through everything"""
+        detail = self.client.get(self.url).data
+        first = self.client.get(f'/api/customers/{self.customer.pk}/jobs/')
+        self.assertEqual(first.data['count'], 5)
+        self.assertEqual([job['id'] for job in first.data['results']], [job['id'] for job in detail['jobs']])
+        second = self.client.get(detail['jobs_next'])
+        self.assertEqual(len(second.data['results']), 2)
+        self.assertNotIn(second.data['results'][0]['id'], [job['id'] for job in detail['jobs']])
+        response = self.client.get(f'/api/customers/{self.customer.pk}/estimates/?page_size=10')
+        self.assertEqual(len(response.data['results']), 5)
+        response = self.client.get(f'/api/customers/{self.customer.pk}/invoices/?fields=invoice_number')
+        self.assertEqual(set(response.data['results'][0]), {'invoice_number'})
+
+    def test_small_collections_have_no_next_link(self):
+        """Test no next link is given when everything is embedded"""
+        customer = create_invoice_graph(1, 10)[0].customer
+        response = self.client.get(f'/api/customers/{customer.pk}/')
+        self.assertIsNone(response.data['estimates_next'])
+        self.assertEqual(response.data['estimates_count'], 1)
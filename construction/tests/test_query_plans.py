@@ -0,0 +1,144 @@
+import json
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.analytics import _recent_activity
+from construction.models import Customer, Estimate, Invoice, Job, Material, Supplier, Worker
+
+SEED_SIZE = 300
+# A SQLite full table scan reads "SCAN <table>", with no index named after it
+SQLITE_TABLE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def _status(index, model, settled):
+    # One row in five is spread over the other statuses, the rest are settled
+    others = [value for value, _ in model.STATUS_CHOICES if value != settled]
+    return others[index // 5 % len(others)] if index % 5 == 0 else settled
+
+
+def seed_dataset(count=SEED_SIZE):
+    """
+    Seed a dataset shaped like production: most jobs are finished, most
+    invoices paid and most materials delivered, so the hot filters are selective
+    """
+    today = date.today()
+    supplier = Supplier.objects.create(name='Seed supplier', contact_person='Ann', email='seed@example.com', phone='1', address='x')
+    user = User.objects.create_user(username='seed-worker')
+    worker = Worker.objects.create(user=user, worker_type='PLUMBER', phone='1', hourly_rate=10, experience_years=1)
+    customers = Customer.objects.bulk_create([
+        Customer(first_name='Seed', last_name=str(index), email=f'seed{index}@example.com',
+                 phone='1', address='Street', city='Nairobi', postal_code='00100')
+        for index in range(count)
+    ])
+    estimates = Estimate.objects.bulk_create([
+        Estimate(customer=customer, work_description='Work', status=_status(index, Estimate, 'ACCEPTED'))
+        for index, customer in enumerate(customers)
+    ])
+    jobs = Job.objects.bulk_create([
+        Job(estimate=estimate, customer=estimate.customer, job_title=f'Job {index}', description='Job',
+            scheduled_start_date=today + timedelta(days=index % 40 - 30),
+            scheduled_end_date=today + timedelta(days=index % 40 - 20),
+            status=_status(index, Job, 'COMPLETED'))
+        for index, estimate in enumerate(estimates)
+    ])
+    Job.workers.through.objects.bulk_create([Job.workers.through(job=job, worker=worker) for job in jobs[::20]])
+    Material.objects.bulk_create([
+        Material(job=job, supplier=supplier, name='Pipe', quantity=1, unit='m', unit_cost=5,
+                 order_date=today - timedelta(days=index % 30), is_delivered=index % 5 != 0)
+        for index, job in enumerate(jobs)
+    ])
+    Invoice.objects.bulk_create([
+        Invoice(job=job, customer=job.customer, invoice_number=f'SEED-{index}', labor_cost=Decimal('100'),
+                due_date=today + timedelta(days=index % 60 - 45), status=_status(index, Invoice, 'PAID'))
+        for index, job in enumerate(jobs)
+    ])
+
+
+def _postgresql_seq_scans(plan):
+    if plan['Node Type'] == 'Seq Scan':
+        yield plan['Relation Name']
+    for child in plan.get('Plans', ()):
+        yield from _postgresql_seq_scans(child)
+
+
+def sequential_scans(sql):
+    """Return the tables the plan for sql reads with a full sequential scan"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # With seq scans priced out, one is only planned when no index applies
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return list(_postgresql_seq_scans(plan[0]['Plan']))
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        matches = (SQLITE_TABLE_SCAN.match(row[-1]) for row in cursor.fetchall())
+        return [match.group(1) for match in matches if match]
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'EXPLAIN parsing is implemented for SQLite and PostgreSQL')
+class HotFilterQueryPlanTest(APITestCase):
+    """Test cases for the hot filter queries using indexes rather than sequential scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertNoSequentialScans(self, queries, model):
+        # Joined and prefetched tables are read by primary or foreign key; the
+        # filtered table is the one that needs the new indexes
+        table = model._meta.db_table
+        reads_table = re.compile(rf'^(?:SELECT .*? FROM|UPDATE) "{table}"')
+        statements = [query['sql'] for query in queries if reads_table.match(query['sql'])]
+        self.assertTrue(statements)
+        for sql in statements:
+            with self.subTest(sql=sql):
+                self.assertNotIn(table, sequential_scans(sql))
+
+    def assertEndpointUsesIndexes(self, url, model):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNoSequentialScans(queries, model)
+
+    def test_job_actions(self):
+        """Test the upcoming, needs_confirmation and in_progress queries search job_status_start_idx"""
+        for url in ['/api/jobs/upcoming/', '/api/jobs/needs_confirmation/', '/api/jobs/in_progress/']:
+            with self.subTest(url=url):
+                self.assertEndpointUsesIndexes(url, Job)
+
+    def test_invoice_actions(self):
+        """Test the overdue update and list and the unpaid list search invoice_status_due_idx"""
+        for url in ['/api/invoices/overdue/', '/api/invoices/unpaid/']:
+            with self.subTest(url=url):
+                self.assertEndpointUsesIndexes(url, Invoice)
+
+    def test_pending_delivery(self):
+        """Test pending_delivery searches material_undelivered_idx"""
+        self.assertEndpointUsesIndexes('/api/materials/pending_delivery/', Material)
+
+    def test_estimate_actions(self):
+        """Test the estimate status actions search estimate_status_created_idx"""
+        for url in ['/api/estimates/pending_visits/', '/api/estimates/accepted/']:
+            with self.subTest(url=url):
+                self.assertEndpointUsesIndexes(url, Estimate)
+
+    def test_recent_activity(self):
+        """Test recent activity reads the newest rows from the updated_at indexes"""
+        with CaptureQueriesContext(connection) as queries:
+            _recent_activity()
+        self.assertNoSequentialScans(queries, Job)
+        self.assertNoSequentialScans(queries, Invoice)
@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Customer, Estimate, Job, Invoice
+from construction.tests.test_dashboard import create_dashboard_data
+
+
+def reference_customer_report():
+    """Build the customer report row by row the way the view used to"""
+    rows = []
+    for customer in Customer.objects.order_by('id'):
+        paid = sum(invoice.amount_paid for invoice in customer.invoices.filter(status='PAID'))
+        rows.append({
+            'id': customer.id,
+            'name': customer.full_name,
+            'email': customer.email,
+            'total_jobs': customer.jobs.count(),
+            'completed_jobs': customer.jobs.filter(status='COMPLETED').count(),
+            'total_spent': float(paid)
+        })
+    return rows
+
+
+class CustomerReportTest(APITestCase):
+    """Test cases for the customer report"""
+
+    def setUp(self):
+        create_dashboard_data(12)
+        # A second completed job with a paid invoice checks spend is not
+        # multiplied by the job join
+        invoice = Invoice.objects.filter(status='PAID').select_related('job', 'customer').first()
+        estimate = Estimate.objects.create(customer=invoice.customer, work_description='Extra work')
+        job = Job.objects.create(
+            estimate=estimate,
+            customer=invoice.customer,
+            job_title='Extra job',
+            description='Extra',
+            scheduled_start_date=invoice.job.scheduled_start_date,
+            scheduled_end_date=invoice.job.scheduled_end_date,
+            status='COMPLETED'
+        )
+        Invoice.objects.create(
+            job=job,
+            customer=invoice.customer,
+            due_date=invoice.due_date,
+            labor_cost=invoice.labor_cost,
+            amount_paid=invoice.amount_paid + 50,
+            status='PAID'
+        )
+
+    def test_matches_reference(self):
+        """Test the annotated report matches per-customer aggregation"""
+        response = self.client.get('/api/reports/?type=customer&limit=1000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(response.data['results'], reference_customer_report())
+
+    def test_constant_query_count(self):
+        """Test the report runs one query regardless of customer count"""
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/reports/?type=customer')
+        create_dashboard_data(20, offset=12)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get('/api/reports/?type=customer')
+        self.assertEqual(len(small), len(large))
+
+    def test_keyset_pagination(self):
+        """Test following next links walks every customer once"""
+        url = '/api/reports/?type=customer&limit=5'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 5)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, list(Customer.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_invalid_pagination(self):
+        """Test non-integer pagination parameters are rejected"""
+        response = self.client.get('/api/reports/?type=customer&after=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_ndjson(self):
+        """Test streaming the report as NDJSON"""
+        response = self.client.get('/api/reports/?type=customer&stream=ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], reference_customer_report())
+
+    def test_stream_csv(self):
+        """Test streaming the report as CSV"""
+        response = self.client.get('/api/reports/?type=customer&stream=csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        expected = reference_customer_report()
+        self.assertEqual(len(rows), len(expected))
+        self.assertEqual(rows[0]['email'], expected[0]['email'])
+        self.assertEqual(float(rows[-1]['total_spent']), expected[-1]['total_spent'])
+
+    def test_invalid_stream_format(self):
+        """Test an unknown stream format is rejected"""
+        response = self.client.get('/api/reports/?type=customer&stream=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,107 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from construction.models import Customer, Estimate, Invoice, Material
+from construction.search import has_fts_table
+from construction.tests.test_query_planner import create_invoice_graph
+from construction.tests.test_query_plans import sequential_scans
+
+
+def create_customer(first_name, last_name, **fields):
+    return Customer.objects.create(
+        first_name=first_name, last_name=last_name, email=fields.pop('email', f'{first_name}.{last_name}@example.com'.lower()),
+        phone='+254700000000', address='Street', city=fields.pop('city', 'Nairobi'), postal_code='00100', **fields
+    )
+
+
+class SearchDocumentTest(APITestCase):
+    """Test cases for keeping search documents current"""
+
+    def test_save_and_related_changes(self):
+        """Test documents are built on save and refreshed when the customer is renamed"""
+        invoice = create_invoice_graph(1, 0)[0]
+        customer = invoice.customer
+        self.assertEqual(customer.search_document, f'Graph 0 {customer.email} 1 Nairobi')
+        customer.last_name = 'Otieno'
+        customer.save()
+        self.assertIn('Otieno', Estimate.objects.get(customer=customer).search_document)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.search_document, f'{invoice.invoice_number} Graph Otieno')
+
+    def test_bulk_writes(self):
+        """Test bulk_create and bulk_update fill in the documents"""
+        response = self.client.post('/api/customers/', [
+            {'first_name': 'Bulk', 'last_name': str(index), 'email': f'bulk{index}@example.com',
+             'phone': '1', 'address': 'Street', 'city': 'Mombasa', 'postal_code': '00100'}
+            for index in range(3)
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Customer.objects.filter(search_document__contains='Mombasa').count(), 3)
+        create_invoice_graph(1, 0)
+        materials = list(Material.objects.all())
+        for material in materials:
+            material.name = 'Cement'
+        Material.objects.bulk_update(materials, ['name'])
+        self.assertEqual(set(Material.objects.values_list('search_document', flat=True)), {'Cement '})
+
+
+class FullTextSearchTest(APITestCase):
+    """Test cases for ?search= over the search document indexes"""
+
+    def setUp(self):
+        self.exact = create_customer('Kamau', 'Kamau', city='Nakuru')
+        self.partial = create_customer('Peter', 'Kamau')
+        self.other = create_customer('Achieng', 'Odhiambo', city='Kisumu')
+
+    def search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_fts_table_is_installed(self):
+        """Test the FTS5 shadow table is created after migrating (SQLite only)"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        self.assertTrue(has_fts_table(connection, Customer))
+
+    def test_results_are_ranked(self):
+        """Test the best match comes first, ahead of the default newest-first ordering"""
+        self.assertEqual(self.search('/api/customers/?search=kamau'), [self.exact.pk, self.partial.pk])
+        self.assertEqual(self.search('/api/customers/?search=kamau&ordering=-created_at'), [self.partial.pk, self.exact.pk])
+
+    def test_substrings_and_all_terms(self):
+        """Test terms match inside words and fields, and every term must match"""
+        self.assertEqual(self.search('/api/customers/?search=dhiamb'), [self.other.pk])
+        self.assertEqual(self.search('/api/customers/?search=peter.kamau@example'), [self.partial.pk])
+        self.assertEqual(self.search('/api/customers/?search=kamau nakuru'), [self.exact.pk])
+        self.assertEqual(self.search('/api/customers/?search=Ki'), [self.other.pk])
+
+    def test_related_fields_and_other_endpoints(self):
+        """Test estimates and invoices match their customer's name"""
+        invoice = create_invoice_graph(1, 0, customer=self.other)[0]
+        self.assertEqual(self.search('/api/invoices/?search=odhiambo'), [invoice.pk])
+        self.assertEqual(self.search(f'/api/invoices/?search={invoice.invoice_number}'), [invoice.pk])
+        self.assertEqual(self.search('/api/estimates/?search=achieng'), [invoice.job.estimate_id])
+        self.assertEqual(self.search('/api/materials/?search=pipe'), list(Material.objects.order_by('-created_at').values_list('pk', flat=True)))
+        self.assertEqual(Invoice.objects.count(), 1)
+
+    def test_cursor_pages(self):
+        """Test ranked results page with cursors"""
+        for index in range(12):
+            create_customer('Kamau', str(index))
+        response = self.client.get('/api/customers/?search=kamau&pagination=cursor')
+        ids = [row['id'] for row in response.data['results']]
+        ids += [row['id'] for row in self.client.get(response.data['next']).data['results']]
+        self.assertEqual(len(set(ids)), 14)
+        self.assertEqual(ids[0], self.exact.pk)
+
+    def test_search_does_not_scan_the_table(self):
+        """Test the search is answered from the index rather than a scan of the table"""
+        for index in range(50):
+            create_customer('Scan', str(index))
+        with CaptureQueriesContext(connection) as queries:
+            self.search('/api/customers/?search=odhiambo')
+        for query in queries:
+            self.assertNotIn(Customer._meta.db_table, sequential_scans(query['sql']))
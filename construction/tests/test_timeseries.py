@@ -0,0 +1,123 @@
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from datetime import date, timedelta
+from decimal import Decimal
+
+from construction.charts import monthly_completion_data, revenue_trend_data
+from construction.models import Invoice, Job
+from construction.tests.test_dashboard import create_dashboard_data
+from construction.timeseries import time_series, previous_buckets
+
+
+class TimeSeriesTest(TestCase):
+    """Test cases for the time-series aggregation service"""
+
+    def setUp(self):
+        create_dashboard_data(6)
+        self.today = date.today()
+        jobs = list(Job.objects.order_by('id'))
+        # Two completions this month, one three months ago
+        Job.objects.filter(pk__in=[jobs[0].pk, jobs[1].pk]).update(status='COMPLETED', actual_end_date=self.today)
+        Job.objects.filter(pk=jobs[2].pk).update(
+            status='COMPLETED',
+            actual_end_date=previous_buckets(self.today, 'month', 4)
+        )
+
+    def test_month_buckets_are_gap_filled(self):
+        """Test empty months are returned with zero"""
+        series = time_series('job', 'actual_end_date', bucket='month', filters={'status': 'COMPLETED'})
+        self.assertEqual(len(series), 12)
+        self.assertEqual(series[-1], {'period': self.today.replace(day=1), 'value': 2})
+        self.assertEqual(series[-4]['value'], 1)
+        self.assertEqual(sum(point['value'] for point in series), 3)
+
+    def test_single_query(self):
+        """Test the series is computed with one GROUP BY query"""
+        with self.assertNumQueries(1):
+            time_series('invoice', 'invoice_date', 'total', 'day', start=self.today - timedelta(days=60))
+
+    def test_sum_measure(self):
+        """Test summing stored invoice totals"""
+        series = time_series('invoice', 'created_at', 'total', 'week', start=self.today, end=self.today)
+        expected = sum(invoice.total_amount for invoice in Invoice.objects.all())
+        self.assertEqual(len(series), 1)
+        self.assertAlmostEqual(series[0]['value'], float(expected), places=2)
+
+    def test_week_buckets_start_on_monday(self):
+        """Test week buckets align with the database truncation"""
+        series = time_series('invoice', 'invoice_date', bucket='week', start=self.today - timedelta(days=20))
+        self.assertTrue(all(point['period'].weekday() == 0 for point in series))
+        self.assertEqual(series[-1]['value'], Invoice.objects.count())
+
+    def test_invalid_arguments(self):
+        """Test unsupported models, fields and ranges are rejected"""
+        with self.assertRaises(ValidationError):
+            time_series('customer', 'created_at')
+        with self.assertRaises(ValidationError):
+            time_series('invoice', 'labor_cost')
+        with self.assertRaises(ValidationError):
+            time_series('job', 'created_at', measure='total')
+        with self.assertRaises(ValidationError):
+            time_series('job', 'created_at', start=self.today, end=self.today - timedelta(days=1))
+
+    def test_charts_use_series(self):
+        """Test the completion and revenue charts are built from the series"""
+        with self.assertNumQueries(1):
+            completion = monthly_completion_data()
+        self.assertEqual(len(completion['labels']), 12)
+        self.assertEqual(completion['values'][-1], 2)
+        with self.assertNumQueries(1):
+            revenue = revenue_trend_data()
+        self.assertAlmostEqual(
+            sum(revenue['values']),
+            float(sum((invoice.total_amount for invoice in Invoice.objects.all()), Decimal('0'))),
+            places=2
+        )
+
+
+class TimeSeriesAPITest(APITestCase):
+    """Test cases for the time-series endpoint"""
+
+    def setUp(self):
+        create_dashboard_data(3)
+
+    def test_timeseries_endpoint(self):
+        """Test the endpoint returns gap-filled buckets"""
+        today = date.today()
+        start = today - timedelta(days=6)
+        response = self.client.get(
+            f'/api/timeseries/?model=invoice&field=invoice_date&measure=total&bucket=day'
+            f'&from={start.isoformat()}&to={today.isoformat()}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertGreater(response.data['results'][-1]['value'], 0)
+        self.assertEqual(response.data['results'][0]['value'], 0)
+
+    def test_timeseries_filters(self):
+        """Test filtering the series by status"""
+        response = self.client.get('/api/timeseries/?model=invoice&field=invoice_date&status=PAID')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(point['value'] for point in response.data['results']), 1)
+
+    def test_timeseries_bad_request(self):
+        """Test invalid parameters return 400"""
+        response = self.client.get('/api/timeseries/?model=invoice&field=invoice_date&from=yesterday')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/timeseries/?model=unknown&field=invoice_date')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timeseries_bad_filter_values(self):
+        """Test filter values that do not fit their fields return 400"""
+        for query in [
+            'model=invoice&field=invoice_date&customer=abc',
+            'model=invoice&field=invoice_date&status=LOST',
+            'model=material&field=order_date&is_delivered=foo',
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/timeseries/?{query}')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/timeseries/?model=material&field=order_date&is_delivered=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,198 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.db.models import BooleanField, Sum, Count, DateField
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+from django_filters import FilterSet, TypedChoiceFilter
+from django_filters.filterset import filterset_factory
+from rest_framework.exceptions import ValidationError
+
+from .analytics import material_cost_expression
+from .models import Estimate, Job, Material, Invoice, Payment
+
+BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Number of buckets returned when no start date is given
+DEFAULT_BUCKET_COUNTS = {
+    'day': 30,
+    'week': 12,
+    'month': 12,
+}
+
+MAX_BUCKETS = 1000
+
+# model key -> (model, date fields, measures, filterable fields)
+SERIES_SOURCES = {
+    'invoice': (
+        Invoice,
+        ['invoice_date', 'due_date', 'created_at', 'updated_at'],
+        {
+            'count': lambda: Count('id'),
+            'total': lambda: Sum('total_amount'),
+            'paid': lambda: Sum('amount_paid'),
+            'balance': lambda: Sum('balance_due'),
+        },
+        ['status', 'customer'],
+    ),
+    'payment': (
+        Payment,
+        ['payment_date', 'created_at'],
+        {
+            'count': lambda: Count('id'),
+            'total': lambda: Sum('amount'),
+        },
+        ['payment_method', 'invoice'],
+    ),
+    'job': (
+        Job,
+        ['scheduled_start_date', 'scheduled_end_date', 'actual_start_date', 'actual_end_date', 'created_at'],
+        {
+            'count': lambda: Count('id'),
+        },
+        ['status', 'customer'],
+    ),
+    'estimate': (
+        Estimate,
+        ['initial_contact_date', 'property_visit_date', 'estimate_sent_date', 'response_date', 'created_at'],
+        {
+            'count': lambda: Count('id'),
+            'total': lambda: Sum('estimated_cost'),
+        },
+        ['status', 'customer'],
+    ),
+    'material': (
+        Material,
+        ['order_date', 'expected_delivery_date', 'actual_delivery_date', 'created_at'],
+        {
+            'count': lambda: Count('id'),
+            'total': lambda: Sum(material_cost_expression()),
+        },
+        ['supplier', 'job', 'is_delivered'],
+    ),
+}
+
+
+def bucket_start(value, bucket):
+    """Truncate a date to the start of its bucket, matching the database functions"""
+    if bucket == 'month':
+        return value.replace(day=1)
+    if bucket == 'week':
+        return value - timedelta(days=value.weekday())
+    return value
+
+
+def next_bucket(value, bucket):
+    if bucket == 'month':
+        return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+    if bucket == 'week':
+        return value + timedelta(days=7)
+    return value + timedelta(days=1)
+
+
+def previous_buckets(end, bucket, count):
+    """Return the start of the bucket `count - 1` buckets before the one containing end"""
+    start = bucket_start(end, bucket)
+    for _ in range(count - 1):
+        if bucket == 'month':
+            start = (start - timedelta(days=1)).replace(day=1)
+        elif bucket == 'week':
+            start -= timedelta(days=7)
+        else:
+            start -= timedelta(days=1)
+    return start
+
+
+def bucket_range(start, end, bucket):
+    periods = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        periods.append(current)
+        if len(periods) > MAX_BUCKETS:
+            raise ValidationError({'detail': f'Range spans more than {MAX_BUCKETS} {bucket} buckets.'})
+        current = next_bucket(current, bucket)
+    return periods
+
+
+BOOLEAN_CHOICES = [('true', 'true'), ('false', 'false'), ('1', '1'), ('0', '0')]
+
+
+class SeriesFilterSet(FilterSet):
+    """Base FilterSet for the series filters; a malformed boolean is rejected instead of ignored"""
+
+    class Meta:
+        filter_overrides = {
+            BooleanField: {
+                'filter_class': TypedChoiceFilter,
+                'extra': lambda field: {'choices': BOOLEAN_CHOICES, 'coerce': lambda value: value in ('true', '1')},
+            },
+        }
+
+
+@lru_cache(maxsize=None)
+def _filterset_class(model_class, fields):
+    return filterset_factory(model_class, filterset=SeriesFilterSet, fields=list(fields))
+
+
+def filtered_rows(model_class, filter_fields, filters):
+    """Rows of model_class matching filters, validated and converted by a FilterSet over filter_fields"""
+    filterset = _filterset_class(model_class, tuple(filter_fields))(filters, queryset=model_class.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset.qs
+
+
+def time_series(model, field, measure='count', bucket='month', start=None, end=None, filters=None):
+    """
+    Aggregate `measure` over `model` grouped by `bucket` of the date `field`
+    Runs a single GROUP BY query and returns one entry per bucket between
+    start and end inclusive, filling buckets without rows with zero.
+    """
+    if model not in SERIES_SOURCES:
+        raise ValidationError({'model': f"Unsupported model. Choose from: {', '.join(SERIES_SOURCES)}."})
+    model_class, date_fields, measures, filter_fields = SERIES_SOURCES[model]
+    if field not in date_fields:
+        raise ValidationError({'field': f"Unsupported field for {model}. Choose from: {', '.join(date_fields)}."})
+    if measure not in measures:
+        raise ValidationError({'measure': f"Unsupported measure for {model}. Choose from: {', '.join(measures)}."})
+    if bucket not in BUCKETS:
+        raise ValidationError({'bucket': f"Unsupported bucket. Choose from: {', '.join(BUCKETS)}."})
+    filters = filters or {}
+    unknown = [name for name in filters if name not in filter_fields]
+    if unknown:
+        raise ValidationError({'detail': f"Unsupported filters: {', '.join(unknown)}."})
+    end = end or timezone.now().date()
+    start = start or previous_buckets(end, bucket, DEFAULT_BUCKET_COUNTS[bucket])
+    if start > end:
+        raise ValidationError({'from': 'Start date must be on or before the end date.'})
+    periods = bucket_range(start, end, bucket)
+    lookup = f'{field}__date' if _is_datetime(model_class, field) else field
+    rows = (
+        filtered_rows(model_class, filter_fields, filters)
+        .filter(**{f'{lookup}__gte': start, f'{lookup}__lte': end})
+        .annotate(period=BUCKETS[bucket](field, output_field=DateField()))
+        .values('period')
+        .annotate(value=measures[measure]())
+        .order_by('period')
+    )
+    values = {row['period']: row['value'] for row in rows}
+    return [
+        {'period': period, 'value': _number(values.get(period))}
+        for period in periods
+    ]
+
+
+def _is_datetime(model_class, field):
+    return model_class._meta.get_field(field).get_internal_type() == 'DateTimeField'
+
+
+def _number(value):
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    return float(value)
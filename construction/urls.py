@@ -5,9 +5,9 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
     CustomerViewSet, WorkerViewSet, EstimateViewSet,
     JobViewSet, SupplierViewSet, MaterialViewSet,
-    InvoiceViewSet, PaymentViewSet,
+    InvoiceViewSet, PaymentViewSet, ExportJobViewSet,
     register_user, current_user,
-    dashboard_view, dashboard_stats, dashboard_charts, export_dashboard, reports,
+    dashboard_view, dashboard_stats, dashboard_charts, export_dashboard, reports, timeseries,
     TopMaterialsByCost
 )
 
@@ -21,6 +21,7 @@ router.register(r'suppliers', SupplierViewSet, basename='supplier')
 router.register(r'materials', MaterialViewSet, basename='material')
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
 router.register(r'payments', PaymentViewSet, basename='payment')
+router.register(r'export-jobs', ExportJobViewSet, basename='export-job')
 
 urlpatterns = [
     # Authentication endpoints
@@ -35,6 +36,7 @@ urlpatterns = [
     path('dashboard-charts/', dashboard_charts, name='dashboard_charts'),
     path('export-dashboard/', export_dashboard, name='export_dashboard'),
     path('reports/', reports, name='reports'),
+    path('timeseries/', timeseries, name='timeseries'),
     path('materials/top-by-cost/', TopMaterialsByCost.as_view(), name='materials-top-by-cost'),
     
     # Include router URLs
@@ -1,62 +1,53 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.exceptions import ValidationError, NotFound, NotAuthenticated
+from rest_framework.exceptions import ValidationError, NotAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.views.decorators.http import require_GET
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-from django.db.models import Sum, Count, Q, Avg, F, ExpressionWrapper, DecimalField, DurationField
-from django.db.models.functions import Coalesce
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Q, F, ExpressionWrapper, DecimalField
 from django.shortcuts import render
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_http_date_safe
 from django.http import HttpResponse
-from datetime import timedelta, date
-from decimal import Decimal
-from collections import defaultdict
-import io
+from datetime import datetime, timedelta, timezone as dt_timezone
 import base64
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import numpy as np
-try:
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
-    from reportlab.lib import colors
-    HAS_REPORTLAB = True
-except ImportError:
-    HAS_REPORTLAB = False
-    A4 = landscape = canvas = ImageReader = colors = None
-
-try:
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment
-    from openpyxl.utils import get_column_letter
-    from openpyxl.drawing.image import Image as XLImage
-    HAS_OPENPYXL = True
-except ImportError:
-    HAS_OPENPYXL = False
-    Workbook = Font = Alignment = get_column_letter = XLImage = None
 
 from .models import (
     Customer, Worker, Estimate, Job, Supplier,
-    Material, Invoice, Payment
+    Material, Invoice, Payment, ExportJob
 )
+from .analytics import (
+    CUSTOMER_REPORT_COLUMNS, customer_report, customer_report_row,
+    PRODUCTIVITY_SOURCES, get_dashboard_stats, worker_productivity
+)
+from .charts import chart_versions, generate_dashboard_chart_data, generate_dashboard_charts, invalidate_chart_cache
+from .conditional import conditional_get, last_modified, make_etag, response_versions
+from .export_jobs import EXPORT_WRITERS, enqueue_export
+from .exports import HAS_OPENPYXL, HAS_REPORTLAB, build_excel_report, build_pdf_report, report_charts
+from .pagination import CustomerCollectionPagination
+from .query_planner import plan_queryset
+from .search import FullTextSearchFilter
+from .stats_cache import stats_cache, stats_versions
+from .streaming import STREAM_FORMATS, ranged_file_response, stream_rows
+from .timeseries import SERIES_SOURCES, time_series
 from .serializers import (
     UserSerializer, UserRegistrationSerializer,
     CustomerSerializer, CustomerDetailSerializer,
     WorkerSerializer, EstimateSerializer, JobSerializer,
-    JobDetailSerializer, SupplierSerializer, MaterialSerializer,
-    InvoiceSerializer, InvoiceDetailSerializer, PaymentSerializer
+    SupplierSerializer, MaterialSerializer,
+    InvoiceSerializer, InvoiceDetailSerializer, PaymentSerializer,
+    PaymentBulkSerializer, WorkerProductivitySerializer, ExportJobSerializer,
+    LATEST_FIRST
 )
 
-PRIMARY_COLOR = '#1b5e20'
-SECONDARY_COLOR = '#2e7d32'
-ACCENT_COLOR = '#a5d6a7'
-CHART_COLORS = ['#e53935', '#43a047', '#8e24aa', '#1e88e5', '#fb8c00']
 FAVICON_BYTES = base64.b64decode('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/x8AAwMCAOim7xkAAAAASUVORK5CYII=')
 
 
@@ -66,453 +57,6 @@ def favicon(request):
     return response
 
 
-def _palette(count, values=None, cmap_name=None):
-    if count <= 0:
-        return []
-    if not CHART_COLORS:
-        return []
-    colors = []
-    for idx in range(count):
-        colors.append(CHART_COLORS[idx % len(CHART_COLORS)])
-    return colors
-
-
-def _encode_figure(fig):
-    buffer = io.BytesIO()
-    fig.tight_layout()
-    fig.savefig(buffer, format='png', bbox_inches='tight')
-    buffer.seek(0)
-    image = base64.b64encode(buffer.read()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    return image
-
-
-def _month_sequence(count):
-    anchor = timezone.now().date().replace(day=1)
-    months = []
-    year = anchor.year
-    month = anchor.month
-    for _ in range(count):
-        months.append((year, month))
-        month -= 1
-        if month == 0:
-            month = 12
-            year -= 1
-    months.reverse()
-    return months
-
-
-def get_dashboard_stats():
-    today = timezone.now().date()
-    jobs = Job.objects.all()
-    invoices = Invoice.objects.select_related('customer')
-    workers = Worker.objects.select_related('user')
-    materials = Material.objects.all()
-    total_jobs = jobs.count()
-    active_jobs = jobs.filter(status='IN_PROGRESS').count()
-    scheduled_jobs = jobs.filter(status__in=['SCHEDULED', 'CONFIRMED']).count()
-    completed_jobs = jobs.filter(status='COMPLETED').count()
-    pending_estimates = Estimate.objects.filter(status='PENDING').count()
-    accepted_estimates = Estimate.objects.filter(status='ACCEPTED').count()
-    paid_invoices_qs = invoices.filter(status='PAID')
-    overdue_invoices = invoices.filter(Q(status='SENT') | Q(status='OVERDUE'), due_date__lt=today).count()
-    total_revenue = sum((invoice.total_amount for invoice in paid_invoices_qs), Decimal('0'))
-    pending_revenue = Decimal('0')
-    for invoice in invoices.exclude(status='PAID'):
-        pending_revenue += invoice.total_amount - invoice.amount_paid
-    worker_total = workers.count()
-    worker_available = workers.filter(is_available=True).count()
-    worker_availability = round((worker_available / worker_total) * 100, 2) if worker_total else 0
-    duration_qs = jobs.annotate(duration=ExpressionWrapper(F('scheduled_end_date') - F('scheduled_start_date'), output_field=DurationField()))
-    avg_duration = duration_qs.aggregate(value=Avg('duration'))['value']
-    average_job_duration = avg_duration.days if avg_duration else 0
-    customer_satisfaction = round((completed_jobs / total_jobs) * 100, 2) if total_jobs else 0
-    material_total = materials.annotate(
-        total_cost=ExpressionWrapper(F('quantity') * F('unit_cost'), output_field=DecimalField(max_digits=14, decimal_places=2))
-    ).aggregate(total=Coalesce(Sum('total_cost'), Decimal('0')))['total']
-    recent_activity = []
-    for job in jobs.order_by('-updated_at')[:5]:
-        recent_activity.append({
-            'type': 'Job',
-            'title': job.job_title,
-            'status': job.status,
-            'timestamp': job.updated_at.isoformat()
-        })
-    for invoice in invoices.order_by('-updated_at')[:5]:
-        recent_activity.append({
-            'type': 'Invoice',
-            'title': invoice.invoice_number,
-            'status': invoice.status,
-            'timestamp': invoice.updated_at.isoformat()
-        })
-    recent_activity = sorted(recent_activity, key=lambda item: item['timestamp'], reverse=True)[:6]
-    return {
-        'active_jobs': active_jobs,
-        'scheduled_jobs': scheduled_jobs,
-        'completed_jobs': completed_jobs,
-        'pending_estimates': pending_estimates,
-        'accepted_estimates': accepted_estimates,
-        'paid_invoices': paid_invoices_qs.count(),
-        'overdue_invoices': overdue_invoices,
-        'total_revenue': float(total_revenue),
-        'pending_revenue': float(pending_revenue),
-        'worker_availability': worker_availability,
-        'worker_counts': {
-            'total': worker_total,
-            'available': worker_available
-        },
-        'material_spend': float(material_total or 0),
-        'average_job_duration': average_job_duration,
-        'customer_satisfaction': customer_satisfaction,
-        'recent_activity': recent_activity,
-        'last_updated': timezone.now().isoformat()
-    }
-
-
-def chart_job_status():
-    data = list(Job.objects.values('status').annotate(total=Count('id')).order_by('status'))
-    if not data:
-        return None
-    labels = [dict(Job.STATUS_CHOICES).get(item['status'], item['status']) for item in data]
-    totals = [item['total'] for item in data]
-    fig, ax = plt.subplots(figsize=(6, 6))
-    colors = _palette(len(labels), totals, 'Greens')
-    ax.pie(totals, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-    ax.set_title('Job Status Distribution', color=PRIMARY_COLOR)
-    return {'key': 'job_status', 'title': 'Job Status Distribution', 'image': _encode_figure(fig)}
-
-
-def chart_invoice_status():
-    data = list(Invoice.objects.values('status').annotate(total=Count('id')).order_by('status'))
-    if not data:
-        return None
-    labels = [dict(Invoice.STATUS_CHOICES).get(item['status'], item['status']) for item in data]
-    totals = [item['total'] for item in data]
-    fig, ax = plt.subplots(figsize=(8, 5))
-    colors = _palette(len(labels), totals, 'YlOrBr')
-    ax.bar(labels, totals, color=colors)
-    ax.set_title('Invoice Status Distribution', color=PRIMARY_COLOR)
-    ax.set_ylabel('Invoices')
-    plt.xticks(rotation=30, ha='right')
-    return {'key': 'invoice_status', 'title': 'Invoice Status Distribution', 'image': _encode_figure(fig)}
-
-
-def chart_revenue_trend():
-    start_date = timezone.now().date() - timedelta(days=180)
-    invoices = Invoice.objects.filter(invoice_date__gte=start_date).order_by('invoice_date')
-    if not invoices:
-        return None
-    monthly_totals = defaultdict(Decimal)
-    for invoice in invoices:
-        month_key = invoice.invoice_date.strftime('%b %Y')
-        monthly_totals[month_key] += invoice.total_amount
-    months = list(monthly_totals.keys())
-    values = [float(monthly_totals[month]) for month in months]
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(months, values, color=CHART_COLORS[3], linewidth=3, marker='o')
-    ax.set_title('Revenue Trend (6 Months)', color=PRIMARY_COLOR)
-    ax.set_ylabel('Revenue ($)')
-    ax.set_xlabel('Month')
-    ax.grid(alpha=0.3)
-    plt.xticks(rotation=35, ha='right')
-    return {'key': 'revenue_trend', 'title': 'Revenue Trend (6 Months)', 'image': _encode_figure(fig)}
-
-
-def chart_top_materials():
-    materials = list(
-        Material.objects.annotate(
-            total_cost=ExpressionWrapper(F('quantity') * F('unit_cost'), output_field=DecimalField(max_digits=14, decimal_places=2))
-        ).order_by('-total_cost')[:10]
-    )
-    if not materials:
-        return None
-    names = [material.name for material in materials][::-1]
-    costs = [float(material.total_cost) for material in materials][::-1]
-    fig, ax = plt.subplots(figsize=(10, 6))
-    colors = _palette(len(names), costs, 'YlGn')
-    ax.barh(names, costs, color=colors)
-    ax.set_title('Top Materials by Cost', color=PRIMARY_COLOR)
-    ax.set_xlabel('Cost ($)')
-    return {'key': 'materials_cost', 'title': 'Top Materials by Cost', 'image': _encode_figure(fig)}
-
-
-def chart_worker_cost_breakdown():
-    data = list(Worker.objects.values('worker_type').annotate(total=Sum('hourly_rate')).order_by('worker_type'))
-    if not data:
-        return None
-    labels = [dict(Worker.WORKER_TYPES).get(item['worker_type'], item['worker_type']) for item in data]
-    totals = [float(item['total']) for item in data]
-    fig, ax = plt.subplots(figsize=(8, 5))
-    colors = _palette(len(labels), totals, 'BuPu')
-    ax.bar(labels, totals, color=colors)
-    ax.set_title('Cost Breakdown by Worker Type', color=PRIMARY_COLOR)
-    ax.set_ylabel('Hourly Rate Total ($)')
-    plt.xticks(rotation=35, ha='right')
-    return {'key': 'worker_costs', 'title': 'Cost Breakdown by Worker Type', 'image': _encode_figure(fig)}
-
-
-def chart_worker_distribution():
-    data = list(Worker.objects.values('worker_type').annotate(total=Count('id')).order_by('worker_type'))
-    if not data:
-        return None
-    labels = [dict(Worker.WORKER_TYPES).get(item['worker_type'], item['worker_type']) for item in data]
-    totals = [item['total'] for item in data]
-    fig, ax = plt.subplots(figsize=(6, 6))
-    colors = _palette(len(labels), totals, 'PuBuGn')
-    ax.pie(totals, labels=labels, autopct='%1.1f%%', colors=colors)
-    ax.set_title('Worker Type Distribution', color=PRIMARY_COLOR)
-    return {'key': 'worker_distribution', 'title': 'Worker Type Distribution', 'image': _encode_figure(fig)}
-
-
-def chart_worker_productivity():
-    entries = []
-    workers = Worker.objects.select_related('user')
-    for worker in workers:
-        completed = worker.jobs.filter(status='COMPLETED').count()
-        scheduled = worker.jobs.filter(status__in=['SCHEDULED', 'CONFIRMED']).count()
-        if completed == 0 and scheduled == 0:
-            continue
-        name = worker.user.get_full_name() or worker.user.username
-        earnings = float(worker.hourly_rate) * completed * 8
-        entries.append((name, completed, scheduled, earnings))
-    entries = sorted(entries, key=lambda item: item[1], reverse=True)[:8]
-    if not entries:
-        return None
-    names = [item[0] for item in entries]
-    completed_values = [item[1] for item in entries]
-    scheduled_values = [item[2] for item in entries]
-    earnings = [item[3] for item in entries]
-    x = np.arange(len(names))
-    fig, ax1 = plt.subplots(figsize=(12, 6))
-    ax1.bar(x - 0.15, completed_values, width=0.3, label='Completed', color=CHART_COLORS[0])
-    ax1.bar(x + 0.15, scheduled_values, width=0.3, label='Scheduled', color=CHART_COLORS[1])
-    ax1.set_xticks(x)
-    ax1.set_xticklabels(names, rotation=35, ha='right')
-    ax1.set_ylabel('Jobs')
-    ax1.legend(loc='upper left')
-    ax2 = ax1.twinx()
-    ax2.plot(x, earnings, color=CHART_COLORS[2], linewidth=3, marker='o', label='Earnings')
-    ax2.set_ylabel('Earnings ($)')
-    ax2.legend(loc='upper right')
-    ax1.set_title('Worker Productivity Metrics', color=PRIMARY_COLOR)
-    return {'key': 'worker_productivity', 'title': 'Worker Productivity Metrics', 'image': _encode_figure(fig)}
-
-
-def chart_monthly_completion():
-    months = _month_sequence(12)
-    labels = []
-    totals = []
-    for year, month in months:
-        label_date = date(year, month, 1)
-        labels.append(label_date.strftime('%b %Y'))
-        totals.append(
-            Job.objects.filter(status='COMPLETED', actual_end_date__year=year, actual_end_date__month=month).count()
-        )
-    if not any(totals):
-        return None
-    fig, ax = plt.subplots(figsize=(11, 5))
-    ax.plot(labels, totals, color=CHART_COLORS[4], linewidth=3, marker='o')
-    ax.set_title('Monthly Job Completion Rate', color=PRIMARY_COLOR)
-    ax.set_ylabel('Completed Jobs')
-    ax.set_xlabel('Month')
-    ax.grid(alpha=0.3)
-    plt.xticks(rotation=35, ha='right')
-    return {'key': 'monthly_completion', 'title': 'Monthly Job Completion Rate', 'image': _encode_figure(fig)}
-
-
-def chart_customer_completion():
-    customers = list(
-        Customer.objects.annotate(
-            total_jobs=Count('jobs'),
-            completed_jobs=Count('jobs', filter=Q(jobs__status='COMPLETED'))
-        ).filter(total_jobs__gt=0).order_by('-completed_jobs')[:8]
-    )
-    if not customers:
-        return None
-    names = [customer.full_name for customer in customers]
-    rates = [round((customer.completed_jobs / customer.total_jobs) * 100, 2) for customer in customers]
-    fig, ax = plt.subplots(figsize=(10, 6))
-    colors = _palette(len(names), rates, 'YlGnBu')
-    ax.bar(names, rates, color=colors)
-    ax.set_title('Customer Completion Rates', color=PRIMARY_COLOR)
-    ax.set_ylabel('Completion %')
-    plt.xticks(rotation=35, ha='right')
-    return {'key': 'customer_completion', 'title': 'Customer Completion Rates', 'image': _encode_figure(fig)}
-
-
-def generate_dashboard_charts():
-    builders = [
-        chart_job_status,
-        chart_invoice_status,
-        chart_revenue_trend,
-        chart_top_materials,
-        chart_worker_cost_breakdown,
-        chart_worker_distribution,
-        chart_worker_productivity,
-        chart_monthly_completion,
-        chart_customer_completion
-    ]
-    charts = {}
-    for builder in builders:
-        try:
-            chart = builder()
-        except Exception:
-            chart = None
-        if chart:
-            charts[chart['key']] = {
-                'title': chart['title'],
-                'image': chart['image']
-            }
-    return charts
-
-
-def build_pdf_report(stats, charts):
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="dashboard-report.pdf"'
-    pdf = canvas.Canvas(response, pagesize=landscape(A4))
-    page_width, page_height = landscape(A4)
-    pdf.setFont('Helvetica-Bold', 22)
-    pdf.setFillColor(colors.HexColor(PRIMARY_COLOR))
-    pdf.drawString(40, page_height - 50, 'Construction Intelligence Dashboard')
-    pdf.setFont('Helvetica', 12)
-    pdf.setFillColor(colors.black)
-    pdf.drawString(40, page_height - 80, f"Generated {timezone.now().strftime('%Y-%m-%d %H:%M')}")
-    summary_rows = [
-        ('Active Jobs', 'active_jobs'),
-        ('Scheduled Jobs', 'scheduled_jobs'),
-        ('Completed Jobs', 'completed_jobs'),
-        ('Pending Estimates', 'pending_estimates'),
-        ('Accepted Estimates', 'accepted_estimates'),
-        ('Paid Invoices', 'paid_invoices'),
-        ('Overdue Invoices', 'overdue_invoices'),
-        ('Total Revenue', 'total_revenue'),
-        ('Pending Revenue', 'pending_revenue'),
-        ('Material Spend', 'material_spend'),
-        ('Average Job Duration (days)', 'average_job_duration'),
-        ('Worker Availability (%)', 'worker_availability'),
-        ('Customer Satisfaction (%)', 'customer_satisfaction')
-    ]
-    pdf.setFont('Helvetica', 11)
-    y = page_height - 120
-    for label, key in summary_rows:
-        value = stats.get(key, 0)
-        if key in ['total_revenue', 'pending_revenue', 'material_spend']:
-            value_text = f"${value:,.2f}"
-        elif key in ['worker_availability', 'customer_satisfaction']:
-            value_text = f"{value:.1f}%"
-        else:
-            value_text = f"{value:,}"
-        pdf.drawString(40, y, f"{label}: {value_text}")
-        y -= 18
-        if y < 80:
-            pdf.showPage()
-            page_width, page_height = landscape(A4)
-            pdf.setFont('Helvetica', 11)
-            y = page_height - 60
-    chart_items = list(charts.values())
-    if chart_items:
-        pdf.showPage()
-        index = 0
-        while index < len(chart_items):
-            page_width, page_height = landscape(A4)
-            x_positions = [40, page_width / 2 + 20]
-            y = page_height - 80
-            for column in range(2):
-                if index >= len(chart_items):
-                    break
-                chart = chart_items[index]
-                pdf.setFont('Helvetica-Bold', 14)
-                pdf.setFillColor(colors.black)
-                pdf.drawString(x_positions[column], y, chart['title'])
-                image_stream = io.BytesIO(base64.b64decode(chart['image']))
-                pdf.drawImage(
-                    ImageReader(image_stream),
-                    x_positions[column],
-                    y - 270,
-                    width=page_width / 2 - 80,
-                    height=220,
-                    preserveAspectRatio=True,
-                    mask='auto'
-                )
-                index += 1
-            if index < len(chart_items):
-                pdf.showPage()
-    pdf.save()
-    return response
-
-
-def build_excel_report(stats, charts):
-    workbook = Workbook()
-    summary_sheet = workbook.active
-    summary_sheet.title = 'Summary'
-    summary_sheet.append(['Metric', 'Value'])
-    for cell in summary_sheet[1]:
-        cell.font = Font(bold=True)
-    summary_data = [
-        ('Active Jobs', stats.get('active_jobs', 0)),
-        ('Scheduled Jobs', stats.get('scheduled_jobs', 0)),
-        ('Completed Jobs', stats.get('completed_jobs', 0)),
-        ('Pending Estimates', stats.get('pending_estimates', 0)),
-        ('Accepted Estimates', stats.get('accepted_estimates', 0)),
-        ('Paid Invoices', stats.get('paid_invoices', 0)),
-        ('Overdue Invoices', stats.get('overdue_invoices', 0)),
-        ('Total Revenue', f"${stats.get('total_revenue', 0):,.2f}"),
-        ('Pending Revenue', f"${stats.get('pending_revenue', 0):,.2f}"),
-        ('Material Spend', f"${stats.get('material_spend', 0):,.2f}"),
-        ('Average Job Duration (days)', stats.get('average_job_duration', 0)),
-        ('Worker Availability (%)', f"{stats.get('worker_availability', 0):.1f}%"),
-        ('Customer Satisfaction (%)', f"{stats.get('customer_satisfaction', 0):.1f}%")
-    ]
-    for label, value in summary_data:
-        summary_sheet.append([label, value])
-    for column in range(1, 3):
-        summary_sheet.column_dimensions[get_column_letter(column)].width = 32
-    activity_sheet = workbook.create_sheet(title='Recent Activity')
-    activity_sheet.append(['Type', 'Title', 'Status', 'Timestamp'])
-    for cell in activity_sheet[1]:
-        cell.font = Font(bold=True)
-    for item in stats.get('recent_activity', []):
-        activity_sheet.append([
-            item.get('type'),
-            item.get('title'),
-            item.get('status'),
-            item.get('timestamp')
-        ])
-    for column in range(1, 5):
-        activity_sheet.column_dimensions[get_column_letter(column)].width = 30
-    existing_titles = {sheet.title for sheet in workbook.worksheets}
-    for index, chart in enumerate(charts.values(), start=1):
-        base_title = f"Chart {index}"
-        title = base_title
-        suffix = 1
-        while title in existing_titles:
-            suffix += 1
-            title = f"{base_title} {suffix}"
-        chart_sheet = workbook.create_sheet(title=title[:31])
-        chart_sheet.append([chart['title']])
-        chart_sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=4)
-        chart_sheet['A1'].font = Font(bold=True, size=16)
-        chart_sheet['A1'].alignment = Alignment(horizontal='center')
-        image_stream = io.BytesIO(base64.b64decode(chart['image']))
-        image = XLImage(image_stream)
-        image.width = 960
-        image.height = 420
-        chart_sheet.add_image(image, 'A3')
-        for column in range(1, 5):
-            chart_sheet.column_dimensions[get_column_letter(column)].width = 35
-        existing_titles.add(chart_sheet.title)
-    output = io.BytesIO()
-    workbook.save(output)
-    output.seek(0)
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="dashboard-report.xlsx"'
-    return response
-
-
 # Authentication Views
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -536,16 +80,116 @@ def current_user(request):
     return Response(serializer.data)
 
 
+BULK_CREATE_LIMIT = 10000
+
+
+class BulkCreateMixin:
+    """
+    Accept a JSON array on create and insert it with batched bulk_create
+    The whole list is validated before anything is written; errors come back
+    as one entry per item in list order, and a valid list is created in a
+    single transaction by the serializer's BulkListSerializer.
+    """
+    
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=BULK_CREATE_LIMIT)
+        serializer.is_valid(raise_exception=True)
+        try:
+            self.perform_create(serializer)
+        except IntegrityError as exc:
+            # Duplicates are reported per item by validation; this only catches a concurrent insert
+            return Response({'detail': f'Could not create the items: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'created': len(serializer.instance),
+            'ids': [obj.pk for obj in serializer.instance]
+        }, status=status.HTTP_201_CREATED)
+
+
+class PlannedQuerysetMixin:
+    """Add the select_related/prefetch_related the action's serializer needs to the queryset"""
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'destroy':
+            return queryset
+        return plan_queryset(queryset, self.get_serializer())
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs whose If-None-Match (or If-Modified-Since) still matches with 304
+    The validators come from the versions of the rows' table and of the tables
+    the serializer reads, plus today's date for actions filtered relative to
+    it, so nothing is fetched or serialized first.
+    """
+    
+    def conditional(self, queryset, respond, serializer_class=None, detail=False, sources=()):
+        serializer_class = serializer_class or self.get_serializer_class()
+        if detail and not queryset.exists():
+            # Nothing to validate; the detail view answers 404
+            return respond()
+        versions = response_versions(queryset.model, serializer_class, sources)
+        etag = make_etag(self.request, versions, timezone.now().date())
+        return conditional_get(self.request, etag, respond, last_modified(versions) if detail else None)
+    
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        
+        def respond():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            # get_object turns a malformed lookup into a 404
+            return respond()
+        return self.conditional(queryset, respond, detail=True)
+
+
+LIST_STREAM_CHUNK_SIZE = 500
+
+
+class ListActionMixin(ConditionalGetMixin):
+    """
+    Filter, paginate or stream the list endpoint and the extra list actions
+    ?stream=ndjson returns every matching row as newline-delimited JSON,
+    serialized one chunk of rows at a time instead of as one page.
+    """
+    
+    def list(self, request, *args, **kwargs):
+        return self.list_action(self.get_queryset())
+    
+    def list_action(self, queryset):
+        queryset = self.filter_queryset(queryset)
+        return self.conditional(queryset, lambda: self.list_response(queryset))
+    
+    def list_response(self, queryset):
+        stream_format = self.request.query_params.get('stream')
+        if stream_format:
+            if stream_format != 'ndjson':
+                return Response({'error': 'Invalid stream format'}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = self.get_serializer()
+            rows = (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=LIST_STREAM_CHUNK_SIZE))
+            return stream_rows(rows, stream_format, None, f'{self.basename}-{self.action}')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
 # ViewSets
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Customer CRUD operations
     Provides list, create, retrieve, update, and delete operations
     """
     queryset = Customer.objects.all()
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    search_fields = ['first_name', 'last_name', 'email', 'phone', 'city']
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
+    search_fields = Customer.search_document_fields
     ordering_fields = ['created_at', 'first_name', 'last_name']
     ordering = ['-created_at']
     
@@ -554,24 +198,37 @@ class CustomerViewSet(viewsets.ModelViewSet):
             return CustomerDetailSerializer
         return CustomerSerializer
     
+    def collection(self, request, related_name, serializer_class):
+        """Page through one of the customer's collections, latest first"""
+        customer = self.get_object()
+        context = self.get_serializer_context()
+        queryset = getattr(customer, related_name).order_by(*LATEST_FIRST)
+        queryset = plan_queryset(queryset, serializer_class(context=context))
+        
+        def respond():
+            paginator = CustomerCollectionPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            serializer = serializer_class(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
+        return self.conditional(queryset, respond, serializer_class)
+    
     @action(detail=True, methods=['get'])
     def estimates(self, request, pk=None):
-        """Get all estimates for a specific customer"""
-        customer = self.get_object()
-        estimates = customer.estimates.all()
-        serializer = EstimateSerializer(estimates, many=True)
-        return Response(serializer.data)
+        """Get the estimates for a specific customer, a page at a time"""
+        return self.collection(request, 'estimates', EstimateSerializer)
     
     @action(detail=True, methods=['get'])
     def jobs(self, request, pk=None):
-        """Get all jobs for a specific customer"""
-        customer = self.get_object()
-        jobs = customer.jobs.all()
-        serializer = JobSerializer(jobs, many=True)
-        return Response(serializer.data)
+        """Get the jobs for a specific customer, a page at a time"""
+        return self.collection(request, 'jobs', JobSerializer)
+    
+    @action(detail=True, methods=['get'])
+    def invoices(self, request, pk=None):
+        """Get the invoices for a specific customer, a page at a time"""
+        return self.collection(request, 'invoices', InvoiceSerializer)
 
 
-class WorkerViewSet(viewsets.ModelViewSet):
+class WorkerViewSet(PlannedQuerysetMixin, ListActionMixin, viewsets.ModelViewSet):
     """
     ViewSet for Worker CRUD operations
     """
@@ -583,25 +240,41 @@ class WorkerViewSet(viewsets.ModelViewSet):
     search_fields = ['user__first_name', 'user__last_name', 'worker_type']
     ordering_fields = ['created_at', 'hourly_rate', 'experience_years']
     ordering = ['user__first_name']
+    productivity_ordering_fields = ['completed_jobs', 'scheduled_jobs', 'earnings', 'hourly_rate', 'user__first_name']
     
     @action(detail=False, methods=['get'])
     def available(self, request):
         """Get all available workers"""
-        workers = self.queryset.filter(is_available=True)
-        serializer = self.get_serializer(workers, many=True)
-        return Response(serializer.data)
+        return self.list_action(self.get_queryset().filter(is_available=True))
+    
+    @action(detail=False, methods=['get'])
+    def productivity(self, request):
+        """Get completed/scheduled job counts and earnings for every worker"""
+        workers = worker_productivity(self.filter_queryset(self.get_queryset()))
+        fields = [field.strip() for field in request.query_params.get('ordering', '').split(',')]
+        ordering = [field for field in fields if field.lstrip('-') in self.productivity_ordering_fields]
+        workers = workers.order_by(*(ordering or ['-completed_jobs']), 'id')
+        
+        def respond():
+            page = self.paginate_queryset(workers)
+            if page is not None:
+                serializer = WorkerProductivitySerializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = WorkerProductivitySerializer(workers, many=True)
+            return Response(serializer.data)
+        return self.conditional(workers, respond, WorkerProductivitySerializer, sources=PRODUCTIVITY_SOURCES)
 
 
-class EstimateViewSet(viewsets.ModelViewSet):
+class EstimateViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Estimate CRUD operations
     """
     queryset = Estimate.objects.all()
     serializer_class = EstimateSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['status', 'customer']
-    search_fields = ['customer__first_name', 'customer__last_name', 'work_description']
+    search_fields = Estimate.search_document_fields
     ordering_fields = ['created_at', 'property_visit_date', 'estimated_cost']
     ordering = ['-created_at']
     
@@ -612,19 +285,15 @@ class EstimateViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending_visits(self, request):
         """Get estimates pending property visit"""
-        estimates = self.queryset.filter(status='PENDING')
-        serializer = self.get_serializer(estimates, many=True)
-        return Response(serializer.data)
+        return self.list_action(self.get_queryset().filter(status='PENDING'))
     
     @action(detail=False, methods=['get'])
     def accepted(self, request):
         """Get accepted estimates ready for job scheduling"""
-        estimates = self.queryset.filter(status='ACCEPTED')
-        serializer = self.get_serializer(estimates, many=True)
-        return Response(serializer.data)
+        return self.list_action(self.get_queryset().filter(status='ACCEPTED'))
 
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Job CRUD operations
     """
@@ -642,31 +311,27 @@ class JobViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming jobs"""
-        upcoming_jobs = self.queryset.filter(
+        upcoming_jobs = self.get_queryset().filter(
             scheduled_start_date__gte=timezone.now().date(),
             status__in=['SCHEDULED', 'CONFIRMED']
         )
-        serializer = self.get_serializer(upcoming_jobs, many=True)
-        return Response(serializer.data)
+        return self.list_action(upcoming_jobs)
     
     @action(detail=False, methods=['get'])
     def in_progress(self, request):
         """Get jobs currently in progress"""
-        in_progress_jobs = self.queryset.filter(status='IN_PROGRESS')
-        serializer = self.get_serializer(in_progress_jobs, many=True)
-        return Response(serializer.data)
+        return self.list_action(self.get_queryset().filter(status='IN_PROGRESS'))
     
     @action(detail=False, methods=['get'])
     def needs_confirmation(self, request):
         """Get jobs that need customer confirmation"""
         today = timezone.now().date()
         confirmation_window = today + timedelta(days=5)
-        jobs = self.queryset.filter(
+        jobs = self.get_queryset().filter(
             scheduled_start_date__range=[today + timedelta(days=1), confirmation_window],
             status='SCHEDULED'
         )
-        serializer = self.get_serializer(jobs, many=True)
-        return Response(serializer.data)
+        return self.list_action(jobs)
     
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
@@ -699,50 +364,48 @@ class JobViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Supplier CRUD operations
     """
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['is_active']
-    search_fields = ['name', 'contact_person', 'email']
+    search_fields = Supplier.search_document_fields
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
 
-class MaterialViewSet(viewsets.ModelViewSet):
+class MaterialViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Material CRUD operations
     """
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['job', 'supplier', 'is_delivered']
-    search_fields = ['name', 'description']
+    search_fields = Material.search_document_fields
     ordering_fields = ['created_at', 'order_date', 'expected_delivery_date']
     ordering = ['-created_at']
     
     @action(detail=False, methods=['get'])
     def pending_delivery(self, request):
         """Get materials pending delivery"""
-        materials = self.queryset.filter(is_delivered=False, order_date__isnull=False)
-        serializer = self.get_serializer(materials, many=True)
-        return Response(serializer.data)
+        return self.list_action(self.get_queryset().filter(is_delivered=False, order_date__isnull=False))
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Invoice CRUD operations
     """
     queryset = Invoice.objects.all()
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['status', 'customer']
-    search_fields = ['invoice_number', 'customer__first_name', 'customer__last_name']
+    search_fields = Invoice.search_document_fields
     ordering_fields = ['invoice_date', 'due_date', 'created_at']
     ordering = ['-invoice_date']
     
@@ -755,24 +418,26 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def overdue(self, request):
         """Get overdue invoices"""
         today = timezone.now().date()
-        overdue_invoices = self.queryset.filter(
+        overdue_invoices = self.get_queryset().filter(
             Q(status='SENT') | Q(status='OVERDUE'),
             due_date__lt=today
         )
-        # Update status to overdue
-        overdue_invoices.update(status='OVERDUE')
-        serializer = self.get_serializer(overdue_invoices, many=True)
-        return Response(serializer.data)
+        # Flag the newly overdue ones (all of them, whatever the filters or page); a
+        # poll with nothing new to flag writes nothing, so its ETag still matches
+        overdue_invoices.filter(status='SENT').update(status='OVERDUE', updated_at=timezone.now())
+        return self.list_action(overdue_invoices)
     
     @action(detail=False, methods=['get'])
     def unpaid(self, request):
         """Get all unpaid invoices"""
-        unpaid_invoices = self.queryset.filter(status__in=['SENT', 'OVERDUE'])
-        serializer = self.get_serializer(unpaid_invoices, many=True)
-        return Response(serializer.data)
+        return self.list_action(self.get_queryset().filter(status__in=['SENT', 'OVERDUE']))
+
 
+PAYMENT_BULK_LIMIT = 10000
+PAYMENT_BULK_BATCH_SIZE = 1000
 
-class PaymentViewSet(viewsets.ModelViewSet):
+
+class PaymentViewSet(PlannedQuerysetMixin, ListActionMixin, BulkCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Payment CRUD operations
     """
@@ -788,6 +453,75 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Set the received_by field to the current user"""
         serializer.save(received_by=self.request.user)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Post a list of payments in one transaction with one grouped update per invoice batch"""
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'detail': 'Expected a non-empty list of payments.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > PAYMENT_BULK_LIMIT:
+            return Response({'detail': f'At most {PAYMENT_BULK_LIMIT} payments can be posted at once.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = PaymentBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data
+        existing = set(Invoice.objects.filter(pk__in={row['invoice_id'] for row in rows}).values_list('pk', flat=True))
+        errors = [
+            {} if row['invoice_id'] in existing else {'invoice_id': [f"Invalid pk \"{row['invoice_id']}\" - object does not exist."]}
+            for row in rows
+        ]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        received_by = request.user if request.user.is_authenticated else None
+        payments = [Payment(received_by=received_by, **row) for row in rows]
+        # PaymentQuerySet.bulk_create posts the payments with one grouped update per invoice batch
+        Payment.objects.bulk_create(payments, batch_size=PAYMENT_BULK_BATCH_SIZE)
+        return Response({
+            'created': len(payments),
+            'invoices': len({payment.invoice_id for payment in payments}),
+            'ids': [payment.pk for payment in payments]
+        }, status=status.HTTP_201_CREATED)
+
+
+class ExportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet for dashboard exports built in the background
+    POST {"format": "pdf" | "excel", "filters": {"from": ..., "to": ...}} queues
+    a job (or returns the identical one already queued); poll the job until it
+    is COMPLETED and fetch the file from its download_url.
+    """
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['status', 'export_format']
+    ordering = ['-created_at']
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if data['export_format'] == 'excel' and not HAS_OPENPYXL:
+            return Response({'detail': 'Excel export requires openpyxl. Install it via pip to enable this feature.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if data['export_format'] == 'pdf' and not HAS_REPORTLAB:
+            return Response({'detail': 'PDF export requires reportlab. Install it via pip to enable this feature.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        job, created = enqueue_export(data['export_format'], data.get('filters', {}), request.user)
+        response_serializer = self.get_serializer(job)
+        headers = {'Location': reverse('export-job-detail', args=[job.pk], request=request)}
+        return Response(
+            response_serializer.data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+            headers=headers
+        )
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download a finished export, honouring HTTP Range requests"""
+        job = self.get_object()
+        if job.status != 'COMPLETED' or not job.file:
+            return Response({'detail': f'Export is {job.status.lower()}.', 'status': job.status}, status=status.HTTP_409_CONFLICT)
+        _, extension, content_type = EXPORT_WRITERS[job.export_format]
+        return ranged_file_response(request, job.file, content_type, f'dashboard-report.{extension}')
 
 
 # Dashboard and Analytics Views
@@ -800,32 +534,100 @@ def dashboard_view(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def dashboard_stats(request):
-    return Response(get_dashboard_stats())
+    versions = stats_versions()
+    etag = make_etag(request, versions, timezone.now().date())
+    return conditional_get(request, etag, lambda: Response(stats_cache.get(versions)))
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def dashboard_charts(request):
+    """
+    Dashboard charts as base64 PNGs, or with ?mode=data as labels and series
+    so the browser can draw them without server-side rendering
+    """
+    if request.query_params.get('refresh') in ['1', 'true']:
+        invalidate_chart_cache()
+        return chart_response(request)
+    versions = chart_versions()
+    etag = make_etag(request, versions, timezone.now().date())
+    return conditional_get(request, etag, lambda: chart_response(request))
+
+
+def chart_response(request):
+    chart_mode = request.query_params.get('mode', 'image').lower()
+    if chart_mode == 'data':
+        return Response(generate_dashboard_chart_data())
+    if chart_mode != 'image':
+        return Response({'detail': 'Unsupported mode'}, status=status.HTTP_400_BAD_REQUEST)
     return Response(generate_dashboard_charts())
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def export_dashboard(request):
-    export_format = request.query_params.get('format', 'pdf').lower()
-    stats = get_dashboard_stats()
-    charts = generate_dashboard_charts()
+    # ?format= is taken by DRF's renderer override, so the file type comes from ?type=
+    export_format = request.query_params.get('type', 'pdf').lower()
     if export_format == 'excel':
         if not HAS_OPENPYXL:
             return Response({'detail': 'Excel export requires openpyxl. Install it via pip to enable this feature.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return build_excel_report(stats, charts)
+        return build_excel_report(get_dashboard_stats(), report_charts(export_format))
     if export_format == 'pdf':
         if not HAS_REPORTLAB:
             return Response({'detail': 'PDF export requires reportlab. Install it via pip to enable this feature.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return build_pdf_report(stats, charts)
+        return build_pdf_report(get_dashboard_stats(), report_charts(export_format))
     return Response({'detail': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _query_date(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Use the YYYY-MM-DD format.'})
+    return parsed
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def timeseries(request):
+    """
+    Aggregate a measure over time buckets with empty buckets filled with zero
+    e.g. ?model=invoice&field=invoice_date&measure=total&bucket=month&from=2024-01-01&to=2024-06-30
+    """
+    params = request.query_params
+    model = params.get('model', '')
+    filter_fields = SERIES_SOURCES[model][3] if model in SERIES_SOURCES else []
+    filters = {name: params[name] for name in filter_fields if params.get(name)}
+    series = time_series(
+        model,
+        params.get('field', ''),
+        measure=params.get('measure', 'count'),
+        bucket=params.get('bucket', 'month'),
+        start=_query_date(request, 'from'),
+        end=_query_date(request, 'to'),
+        filters=filters
+    )
+    return Response({
+        'model': model,
+        'field': params.get('field'),
+        'measure': params.get('measure', 'count'),
+        'bucket': params.get('bucket', 'month'),
+        'from': series[0]['period'] if series else None,
+        'to': series[-1]['period'] if series else None,
+        'results': series
+    })
+
+
+REPORT_PAGE_SIZE = 100
+REPORT_MAX_PAGE_SIZE = 1000
+REPORT_CHUNK_SIZE = 2000
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def reports(request):
@@ -846,18 +648,26 @@ def reports(request):
     
     elif report_type == 'customer':
         # Customer report with their jobs and payments
-        customers = Customer.objects.all()
-        customer_data = []
-        for customer in customers:
-            customer_data.append({
-                'id': customer.id,
-                'name': customer.full_name,
-                'email': customer.email,
-                'total_jobs': customer.jobs.count(),
-                'completed_jobs': customer.jobs.filter(status='COMPLETED').count(),
-                'total_spent': float(customer.invoices.filter(status='PAID').aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0)
-            })
-        return Response(customer_data)
+        customers = customer_report()
+        stream_format = request.query_params.get('stream')
+        if stream_format:
+            if stream_format not in STREAM_FORMATS:
+                return Response({'error': 'Invalid stream format'}, status=status.HTTP_400_BAD_REQUEST)
+            rows = (customer_report_row(row) for row in customers.iterator(chunk_size=REPORT_CHUNK_SIZE))
+            return stream_rows(rows, stream_format, CUSTOMER_REPORT_COLUMNS, 'customer-report')
+        # Keyset pagination on id: ?after=<last id>&limit=<page size>
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = int(request.query_params.get('limit', REPORT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            return Response({'error': 'after and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, REPORT_MAX_PAGE_SIZE))
+        rows = [customer_report_row(row) for row in customers.filter(id__gt=after)[:limit + 1]]
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_url = replace_query_param(request.build_absolute_uri(), 'after', rows[-1]['id'])
+        return Response({'next': next_url, 'results': rows})
     
     elif report_type == 'financial':
         # Financial report
@@ -866,7 +676,7 @@ def reports(request):
         
         return Response({
             'total_revenue': float(paid_invoices.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0),
-            'pending_revenue': float(unpaid_invoices.count()) * 1000,  # Simplified
+            'pending_revenue': float(unpaid_invoices.aggregate(Sum('balance_due'))['balance_due__sum'] or 0),
             'total_invoices': Invoice.objects.count(),
             'paid_invoices': paid_invoices.count(),
             'unpaid_invoices': unpaid_invoices.count(),
@@ -933,30 +743,86 @@ class TopMaterialsByCost(APIView):
             return [payload]
         raise ValidationError({'detail': 'Payload must be an object or list of objects.'})
 
-    def _update_material(self, record, partial, request):
-        material_id = record.get('id') if isinstance(record, dict) else None
-        if not material_id:
-            raise ValidationError({'id': 'Material id is required for updates.'})
-        try:
-            instance = Material.objects.get(pk=material_id)
-        except Material.DoesNotExist:
-            raise NotFound(f'Material with id {material_id} not found.')
-        serializer = MaterialSerializer(
-            instance,
-            data=record,
-            partial=partial,
-            context={'request': request}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return serializer.data
+    def _bulk_update(self, request, partial):
+        """
+        Update every record in one transaction or none of them
+        Targets are fetched and locked with one query, validated together and
+        written with bulk_update. A record may carry 'if_unmodified_since' (an
+        HTTP date or ISO 8601 timestamp; the If-Unmodified-Since header is the
+        default) and fails with 412 if the material changed after that time.
+        """
+        records = self._normalize_payload(request.data)
+        default_since = request.headers.get('If-Unmodified-Since')
+        ids = [_record_id(record) for record in records]
+        with transaction.atomic():
+            materials = (
+                Material.objects.select_related('supplier')
+                .select_for_update(of=('self',))
+                .in_bulk({material_id for material_id in ids if material_id is not None})
+            )
+            errors = []
+            failures = set()
+            seen = set()
+            for record, material_id in zip(records, ids):
+                material = materials.get(material_id)
+                if material_id is None:
+                    error, failure = {'id': ['Material id is required for updates.']}, status.HTTP_400_BAD_REQUEST
+                elif material is None:
+                    error, failure = {'id': [f'Material with id {material_id} not found.']}, status.HTTP_404_NOT_FOUND
+                elif material_id in seen:
+                    error, failure = {'id': [f'Material with id {material_id} appears more than once.']}, status.HTTP_400_BAD_REQUEST
+                else:
+                    error, failure = _check_unmodified_since(material, record.get('if_unmodified_since') or default_since)
+                seen.add(material_id)
+                errors.append(error)
+                if failure:
+                    failures.add(failure)
+            if failures:
+                # Malformed records outrank missing ones, which outrank stale ones
+                return Response(errors, status=min(failures, key=[400, 404, 412].index))
+            serializer = MaterialSerializer(
+                [materials[material_id] for material_id in ids],
+                data=records,
+                many=True,
+                partial=partial,
+                context={'request': request}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response({'updated': len(records), 'results': serializer.data})
 
     def put(self, request, *args, **kwargs):
-        records = self._normalize_payload(request.data)
-        updated = [self._update_material(record, partial=False, request=request) for record in records]
-        return Response({'updated': len(updated), 'results': updated})
+        return self._bulk_update(request, partial=False)
 
     def patch(self, request, *args, **kwargs):
-        records = self._normalize_payload(request.data)
-        updated = [self._update_material(record, partial=True, request=request) for record in records]
-        return Response({'updated': len(updated), 'results': updated})
+        return self._bulk_update(request, partial=True)
+
+
+def _record_id(record):
+    if not isinstance(record, dict):
+        return None
+    try:
+        return int(record.get('id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _check_unmodified_since(material, value):
+    """Return (error, status) for a record whose material changed after its If-Unmodified-Since time"""
+    if not value:
+        return {}, None
+    since = parse_datetime(value) if isinstance(value, str) else None
+    if since is None:
+        timestamp = parse_http_date_safe(value) if isinstance(value, str) else None
+        if timestamp is None:
+            return {'if_unmodified_since': ['Expected an HTTP date or an ISO 8601 timestamp.']}, status.HTTP_400_BAD_REQUEST
+        since = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+    elif timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    updated_at = material.updated_at
+    if not since.microsecond:
+        # Compare at the precision the client sent; HTTP dates have whole seconds
+        updated_at = updated_at.replace(microsecond=0)
+    if updated_at > since:
+        return {'if_unmodified_since': [f'Material was modified at {material.updated_at.isoformat()}.']}, status.HTTP_412_PRECONDITION_FAILED
+    return {}, None